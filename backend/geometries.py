@@ -0,0 +1,130 @@
+"""
+Precomputed route geometry delivery.
+
+GeometryStore holds the per-leg geometries from route_geometries.json, keyed
+by "fromNodeId-toNodeId". The full payload is serialized and gzip-compressed
+once per format and tagged with a content ETag, so repeat downloads cost a
+header compare (304) and first downloads cost no re-serialization. Single
+legs can be looked up individually for clients that only need a few.
+
+The geometries themselves can be loaded lazily (GeometryStore(loader=...)),
+so a worker that never serves a map pays nothing for them.
+
+Two coordinate formats:
+    "coords"   — {"coordinates": [[lat, lon], ...], "distance", "duration"}  (as stored)
+    "polyline" — {"polyline": "<encoded>", "distance", "duration"}  (Google encoded
+                 polyline, precision 5 — typically 4-5x smaller than coords)
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Literal
+
+GeometryFormat = Literal["coords", "polyline"]
+
+
+def encode_polyline(coordinates: list[list[float]], precision: int = 5) -> str:
+    """Encodes [[lat, lon], ...] with Google's encoded polyline algorithm."""
+    factor = 10 ** precision
+    out: list[str] = []
+    prev_lat = prev_lon = 0
+    for lat, lon in coordinates:
+        ilat = round(lat * factor)
+        ilon = round(lon * factor)
+        for delta in (ilat - prev_lat, ilon - prev_lon):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                out.append(chr((0x20 | (value & 0x1F)) + 63))
+                value >>= 5
+            out.append(chr(value + 63))
+        prev_lat, prev_lon = ilat, ilon
+    return "".join(out)
+
+
+def decode_polyline(encoded: str, precision: int = 5) -> list[list[float]]:
+    """Inverse of encode_polyline."""
+    factor = 10 ** precision
+    coordinates: list[list[float]] = []
+    index = lat = lon = 0
+    while index < len(encoded):
+        deltas = []
+        for _ in range(2):
+            shift = result = 0
+            while True:
+                b = ord(encoded[index]) - 63
+                index += 1
+                result |= (b & 0x1F) << shift
+                shift += 5
+                if b < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lon += deltas[1]
+        coordinates.append([lat / factor, lon / factor])
+    return coordinates
+
+
+@dataclass
+class EncodedPayload:
+    body: bytes
+    gzipped: bytes
+    etag: str
+
+
+class GeometryStore:
+    def __init__(
+        self,
+        geometries: dict[str, dict] | None = None,
+        loader: Callable[[], dict[str, dict]] | None = None,
+    ) -> None:
+        if (geometries is None) == (loader is None):
+            raise ValueError("Pass exactly one of geometries or loader")
+        self._geometries = geometries
+        self._loader = loader
+        self._load_lock = threading.Lock()
+        self._polylines: dict[str, dict] = {}
+        self._payloads: dict[GeometryFormat, EncodedPayload] = {}
+
+    @property
+    def geometries(self) -> dict[str, dict]:
+        if self._geometries is None:
+            with self._load_lock:
+                if self._geometries is None:
+                    self._geometries = self._loader()
+        return self._geometries
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.geometries
+
+    def leg(self, key: str, fmt: GeometryFormat = "coords") -> dict:
+        """One leg by "from-to" key. Raises KeyError if unknown."""
+        if fmt == "coords":
+            return self.geometries[key]
+        leg = self._polylines.get(key)
+        if leg is None:
+            g = self.geometries[key]
+            leg = {"polyline": encode_polyline(g["coordinates"]), "distance": g["distance"], "duration": g["duration"]}
+            self._polylines[key] = leg
+        return leg
+
+    def legs(self, keys: list[str], fmt: GeometryFormat = "coords") -> dict[str, dict]:
+        """The requested legs (deduplicated, in first-seen order). Raises KeyError if any is unknown."""
+        return {key: self.leg(key, fmt) for key in dict.fromkeys(keys)}
+
+    def payload(self, fmt: GeometryFormat = "coords") -> EncodedPayload:
+        """Every leg, serialized and compressed on first use and reused afterwards."""
+        payload = self._payloads.get(fmt)
+        if payload is None:
+            everything = self.geometries if fmt == "coords" else self.legs(list(self.geometries), fmt)
+            body = json.dumps(everything, separators=(",", ":")).encode()
+            payload = EncodedPayload(
+                body=body,
+                gzipped=gzip.compress(body, compresslevel=9, mtime=0),
+                etag='"' + hashlib.sha256(body).hexdigest()[:32] + '"',
+            )
+            self._payloads[fmt] = payload
+        return payload
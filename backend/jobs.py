@@ -0,0 +1,88 @@
+"""
+Background optimization jobs.
+
+JobQueue runs submitted work on a bounded thread pool and keeps each job's
+result around for polling. At most max_workers jobs run at once and at most
+queue_depth more wait behind them; further submissions are rejected rather
+than queued without bound. Finished jobs are dropped after ttl_seconds,
+checked whenever a job is submitted or looked up.
+"""
+
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Literal
+
+JobStatus = Literal["queued", "running", "done", "failed"]
+
+
+class QueueFull(Exception):
+    pass
+
+
+@dataclass
+class Job:
+    id: str
+    submitted_at: float
+    status: JobStatus = "queued"
+    result: Any = None
+    error: str | None = None
+    started_at: float | None = None
+    finished_at: float | None = None
+
+
+class JobQueue:
+    def __init__(self, max_workers: int, queue_depth: int, ttl_seconds: float = 3600) -> None:
+        self.max_workers = max_workers
+        self.queue_depth = queue_depth
+        self.ttl_seconds = ttl_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: dict[str, Job] = {}
+        self._pending = 0  # queued + running
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Job:
+        """Schedules fn(*args). Raises QueueFull if no slot is free."""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            if self._pending >= self.max_workers + self.queue_depth:
+                raise QueueFull(f"{self._pending} jobs already queued or running")
+            job = Job(id=str(uuid.uuid4()), submitted_at=now)
+            self._jobs[job.id] = job
+            self._pending += 1
+        self._executor.submit(self._run, job, fn, args)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            self._expire(time.time())
+            return self._jobs.get(job_id)
+
+    def _run(self, job: Job, fn: Callable[..., Any], args: tuple) -> None:
+        job.started_at = time.time()
+        job.status = "running"
+        try:
+            job.result = fn(*args)
+            job.status = "done"
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._pending -= 1
+
+    def _expire(self, now: float) -> None:
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and now - job.finished_at > self.ttl_seconds
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,13 +1,33 @@
+import asyncio
+import hashlib
 import json
+import math
+import os
+import time
+from collections import defaultdict
+from collections.abc import AsyncIterator, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
 from typing import Literal
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-
-from science.structs import Container, TruckSize
-from science.batcher import batch_containers, savings_batch_containers
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+
+from geometries import EncodedPayload, GeometryFormat, GeometryStore
+from jobs import Job, JobQueue, QueueFull
+from metrics import Metrics
+from snapshot import load_snapshot
+from spatial import NodeIndex
+from science.structs import Container, Deadline, PhaseTimer, TruckSize
+from science.lru import LRUCache
+from science.batcher import ALGORITHM_VERSION, RoutedTruck, batch_containers, savings_batch_containers, solve_plans
+from science.parallel import SourcePool
+from science.neighbors import neighbor_lists
+from science.route_cache import route_cache
 
 app = FastAPI()
 
@@ -21,47 +41,123 @@ app.add_middleware(
     allow_headers=["Content-Type"],
 )
 
+
+# --- Instrumentation ---
+#
+# Every request gets a PhaseTimer that the handlers and solvers fill in. It is
+# reported back as a Server-Timing header and aggregated at GET /metrics.
+# ROUTING_METRICS=0 switches both off: no timers are created at all.
+
+_metrics_enabled = os.getenv("ROUTING_METRICS", "1") != "0"
+metrics = Metrics()
+metrics.describe("routing_request_duration_seconds", "Request latency by route")
+metrics.describe("routing_phase_duration_seconds", "Time spent per phase of a request")
+metrics.describe("routing_problem_containers", "Containers in the last solved plan")
+metrics.describe("routing_problem_sources", "Sources in the last solved plan")
+metrics.describe("routing_problem_destinations", "Destinations in the last solved plan")
+metrics.describe("routing_merge_evaluations_total", "Truck pairs priced during consolidation")
+metrics.describe("routing_merges_total", "Consolidation merges applied")
+metrics.describe("routing_route_solves_total", "Stop sets routed (route cache misses: NN, Held-Karp or 2-opt/Or-opt runs)")
+metrics.describe("routing_route_cache_hits_total", "Stop sets served from the route cache")
+metrics.describe("routing_two_opt_passes_total", "2-opt and Or-opt sweeps over routes longer than Held-Karp solves")
+metrics.describe("routing_result_cache_hits_total", "Plans served from the result cache")
+
+
+if _metrics_enabled:
+    @app.middleware("http")
+    async def time_request(request: Request, call_next):
+        timer = PhaseTimer()
+        request.state.timer = timer
+        request.state.started_at = started_at = time.perf_counter()
+        response = await call_next(request)
+        finished_at = time.perf_counter()
+
+        handler_done_at = getattr(request.state, "handler_done_at", None)
+        if handler_done_at is not None:
+            timer.add("serialize", finished_at - handler_done_at)
+        timer.add("total", finished_at - started_at)
+        response.headers["Server-Timing"] = ", ".join(
+            f"{name};dur={seconds * 1000:.1f}" for name, seconds in timer.phases.items()
+        )
+
+        route = request.scope.get("route")
+        labels = {"method": request.method, "path": route.path if route else "unmatched", "status": str(response.status_code)}
+        metrics.observe("routing_request_duration_seconds", finished_at - started_at, labels)
+        for name, seconds in timer.phases.items():
+            if name != "total":
+                metrics.observe("routing_phase_duration_seconds", seconds, {"phase": name})
+        for name, count in timer.counts.items():
+            metrics.inc(f"routing_{name}_total", count)
+        return response
+
+
+def _request_timer(request: Request) -> PhaseTimer | None:
+    """
+    The request's timer (None when metrics are off), with "parse" recorded:
+    everything between arrival and the handler — body read and validation.
+    """
+    timer = getattr(request.state, "timer", None)
+    if timer is not None:
+        timer.add("parse", time.perf_counter() - request.state.started_at)
+    return timer
+
+
+def _handler_done(request: Request) -> None:
+    """Marks the end of the handler, so the middleware can time serialization."""
+    request.state.handler_done_at = time.perf_counter()
+
+
+def _phase(timer: PhaseTimer | None, name: str):
+    return timer.phase(name) if timer is not None else nullcontext()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    if not _metrics_enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (ROUTING_METRICS=0)")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 BASE_DIR = Path(__file__).parent
 
-with open(BASE_DIR / "data" / "config.jsonc") as f:
-    config = json.load(f)
-
-with open(BASE_DIR / "data" / "distance_matrix.json") as f:
-    _dm = json.load(f)
-
-_route_geom_path = BASE_DIR / "data" / "route_geometries.json"
-if _route_geom_path.exists():
-    with open(_route_geom_path) as f:
-        route_geometries = json.load(f)
-else:
-    route_geometries = None
-
-# Build node list: id, name, lat, lon
-nodes = [
-    {
-        "id": i,
-        "name": list(entry.keys())[0],
-        "lat": list(entry.values())[0][0],
-        "lon": list(entry.values())[0][1],
-    }
-    for i, entry in enumerate(config["locations"])
-]
+# Config, matrices and geometries come from a precompiled snapshot (see
+# snapshot.py), rebuilt automatically when any source file changes. The matrix
+# is memory-mapped; geometries are only loaded on first use.
+_snapshot = load_snapshot(BASE_DIR / "data")
+_matrix_store = _snapshot.matrix
+route_geometries = _snapshot.geometries
+
+# Node list: id, name, lat, lon
+nodes = _snapshot.nodes
+
+distance_matrix = _matrix_store.distance
+duration_matrix = _matrix_store.duration
+neighbor_lists(distance_matrix)  # nearest-candidate lists, built once for every request
 
-distance_matrix: list[list[int]] = _dm["distance_matrix"]
-duration_matrix: list[list[int]] = _dm["duration_matrix"]
+# Solve sources in parallel worker processes when ROUTING_WORKERS > 1.
+_routing_workers = int(os.getenv("ROUTING_WORKERS", "1"))
+source_pool = SourcePool.from_store(_matrix_store, _routing_workers) if _routing_workers > 1 else None
 
-# lat/lon -> node ID index for fast lookup
-_coord_to_node_id: dict[tuple[float, float], int] = {
-    (node["lat"], node["lon"]): node["id"] for node in nodes
-}
+# Request coordinates snap to the nearest node within
+# ROUTING_SNAP_TOLERANCE_METERS, so clients may round or reformat them.
+node_index = NodeIndex(nodes, tolerance_meters=float(os.getenv("ROUTING_SNAP_TOLERANCE_METERS", "50")))
 
 
-def _resolve_node_id(lat: str, lon: str) -> int:
-    key = (float(lat), float(lon))
-    node_id = _coord_to_node_id.get(key)
-    if node_id is None:
-        raise HTTPException(status_code=400, detail=f"Unknown location: lat={lat} lon={lon}")
-    return node_id
+def _coordinate(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return math.nan  # matches no node
+
+
+def _resolve_locations(coords: Iterable[tuple[str, str]]) -> dict[tuple[str, str], int | None]:
+    """
+    Node IDs for (lat, lon) strings, in one pass over the node index. None
+    for locations with no node within tolerance (or that don't parse).
+    """
+    keys = list(dict.fromkeys(coords))
+    node_ids = node_index.nearest_many((_coordinate(lat), _coordinate(lon)) for lat, lon in keys)
+    return dict(zip(keys, node_ids))
 
 
 # --- Request / Response models ---
@@ -87,6 +183,9 @@ class OptimizeRequest(BaseModel):
     destinations: list[LocationIn]
     containers: list[ContainerIn]
     truck_size: TruckSizeIn
+    # Cap on the optimized solve; past it the best plan so far is returned.
+    # Defaults to ROUTING_TIME_BUDGET_MS (unset: no cap).
+    time_budget_ms: int | None = Field(default=None, gt=0)
 
 class TruckOut(BaseModel):
     id: str
@@ -101,9 +200,18 @@ class SolutionOut(BaseModel):
     total_distance_meters: int
     total_duration_seconds: int
 
+class RouteGeometryOut(BaseModel):
+    # "fromNodeId-toNodeId" -> leg geometry; each leg appears once, however
+    # many trucks (in either solution) drive it.
+    legs: dict[str, dict]
+    # truck ID -> leg keys in driving order (source -> first stop -> ...)
+    trucks: dict[str, list[str]]
+
 class OptimizeResponse(BaseModel):
     greedy: SolutionOut
     optimized: SolutionOut
+    optimized_complete: bool = True  # False if the time budget cut the optimized solve short
+    geometry: RouteGeometryOut | None = None
 
 
 # --- Endpoints ---
@@ -113,13 +221,81 @@ def get_nodes():
     return nodes
 
 
-@app.get("/route-geometries")
-def get_route_geometries():
+def _require_geometries() -> GeometryStore:
     if route_geometries is None:
         raise HTTPException(status_code=404, detail="Route geometries not precomputed")
     return route_geometries
 
 
+def _legs_or_404(store: GeometryStore, keys: list[str], fmt: GeometryFormat) -> dict[str, dict]:
+    try:
+        return store.legs(keys, fmt)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Unknown route leg: {e.args[0]}")
+
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """
+    Whether an Accept-Encoding header allows gzip: listed with a non-zero
+    q-value, or not listed and "*" allowed.
+    """
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding:
+            weights[coding.lower()] = q
+    return weights.get("gzip", weights.get("*", 0.0)) > 0
+
+
+def _encoded_response(request: Request, payload: EncodedPayload) -> Response:
+    """Serves a pre-serialized payload, honouring If-None-Match and Accept-Encoding: gzip."""
+    headers = {
+        "ETag": payload.etag,
+        "Cache-Control": "public, max-age=3600",
+        "Vary": "Accept-Encoding",
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if payload.etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    if _accepts_gzip(request.headers.get("accept-encoding", "")):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=payload.gzipped, media_type="application/json", headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+
+@app.get("/route-geometries")
+def get_route_geometries(
+    request: Request,
+    pairs: str | None = Query(default=None, description='Comma-separated "from-to" node ID pairs, e.g. "0-3,3-5"'),
+    fmt: GeometryFormat = Query(default="coords", alias="format"),
+):
+    store = _require_geometries()
+    if pairs is not None:
+        return _legs_or_404(store, [p.strip() for p in pairs.split(",") if p.strip()], fmt)
+    return _encoded_response(request, store.payload(fmt))
+
+
+class RouteLegsQuery(BaseModel):
+    routes: list[list[int]]  # node ID sequences, e.g. [source, dest1, dest2]; each consecutive pair is a leg
+    format: GeometryFormat = "coords"
+
+
+@app.post("/route-geometries/legs")
+def query_route_legs(query: RouteLegsQuery):
+    """The legs needed to draw the given routes (e.g. one solution's trucks), each once."""
+    store = _require_geometries()
+    keys = [f"{a}-{b}" for route in query.routes for a, b in zip(route, route[1:])]
+    return _legs_or_404(store, keys, query.format)
+
+
 def _build_solution(routed_trucks, node_to_dest_id) -> SolutionOut:
     trucks = [
         TruckOut(
@@ -139,21 +315,70 @@ def _build_solution(routed_trucks, node_to_dest_id) -> SolutionOut:
     )
 
 
-@app.post("/optimize", response_model=OptimizeResponse)
-def optimize(request: OptimizeRequest):
-    source_node_ids = {s.id: _resolve_node_id(s.lat, s.lon) for s in request.sources}
-    destination_node_ids = {d.id: _resolve_node_id(d.lat, d.lon) for d in request.destinations}
+# Identical plans are served from memory. Solving is deterministic apart from
+# the generated truck IDs, so a cached answer is as good as a fresh one.
+result_cache = LRUCache(
+    maxsize=int(os.getenv("ROUTING_CACHE_SIZE", "256")),
+    ttl_seconds=float(os.getenv("ROUTING_CACHE_TTL_SECONDS", "600")),
+)
 
-    containers = [
-        Container(
-            container_id=c.container_id,
-            source_id=c.source_id,
-            destination_id=c.destination_id,
-            size=c.size,
-            temperature=c.temperature,
-        )
-        for c in request.containers
-    ]
+
+_default_time_budget_ms = int(os.getenv("ROUTING_TIME_BUDGET_MS", "0")) or None
+
+
+def _prepare(
+    request: OptimizeRequest,
+    resolved: dict[tuple[str, str], int | None] | None = None,
+) -> tuple[dict, dict[int, str], str, int | None]:
+    """
+    Resolves locations to node IDs and converts the request to science
+    structs. Raises a 400 for unknown locations or destinations that resolve
+    to the same node, so callers can fail fast before any solving starts. `resolved` is a _resolve_locations() result
+    covering the request's locations, for callers that resolve in bulk.
+
+    Containers are put in a canonical order, so the solution depends only on
+    the plan and not on how the client listed it — which is what makes the
+    returned cache key safe to use.
+
+    Returns (batcher kwargs, node ID -> destination ID, cache key, time
+    budget in ms or None). The budget is not part of the key: only complete
+    results are cached, and those don't depend on it.
+    """
+    locations = request.sources + request.destinations
+    if resolved is None:
+        resolved = _resolve_locations((loc.lat, loc.lon) for loc in locations)
+    for loc in locations:
+        if resolved[(loc.lat, loc.lon)] is None:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown location: lat={loc.lat} lon={loc.lon} "
+                f"(no node within {node_index.tolerance_meters:g} m)",
+            )
+    source_node_ids = {s.id: resolved[(s.lat, s.lon)] for s in request.sources}
+    destination_node_ids = {d.id: resolved[(d.lat, d.lon)] for d in request.destinations}
+    # Routes and responses identify stops by node, so two destinations can't share one.
+    node_to_dest_id: dict[int, str] = {}
+    for dest_id, node_id in destination_node_ids.items():
+        other = node_to_dest_id.setdefault(node_id, dest_id)
+        if other != dest_id:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Destinations {other} and {dest_id} resolve to the same node ({nodes[node_id]['name']})",
+            )
+
+    containers = sorted(
+        (
+            Container(
+                container_id=c.container_id,
+                source_id=c.source_id,
+                destination_id=c.destination_id,
+                size=c.size,
+                temperature=c.temperature,
+            )
+            for c in request.containers
+        ),
+        key=lambda c: (c.container_id, c.source_id, c.destination_id, c.size, c.temperature),
+    )
 
     truck_size = TruckSize(AM=request.truck_size.AM, RE=request.truck_size.RE)
     kwargs = dict(
@@ -163,11 +388,412 @@ def optimize(request: OptimizeRequest):
         truck_size=truck_size,
         distance_matrix=distance_matrix,
         duration_matrix=duration_matrix,
+        pool=source_pool,
     )
 
-    node_to_dest_id = {v: k for k, v in destination_node_ids.items()}
+    canonical = json.dumps([
+        ALGORITHM_VERSION,
+        sorted(source_node_ids.items()),
+        sorted(destination_node_ids.items()),
+        [(c.container_id, c.source_id, c.destination_id, c.size, c.temperature) for c in containers],
+        [truck_size.AM, truck_size.RE],
+    ])
+    cache_key = hashlib.sha256(canonical.encode()).hexdigest()
+
+    time_budget_ms = request.time_budget_ms or _default_time_budget_ms
+    return kwargs, node_to_dest_id, cache_key, time_budget_ms
+
+
+def _deadline(time_budget_ms: int | None) -> Deadline | None:
+    return None if time_budget_ms is None else Deadline.after_ms(time_budget_ms)
+
+
+def _floor_by_source(greedy: list[RoutedTruck], optimized: list[RoutedTruck]) -> list[RoutedTruck]:
+    """
+    For a cut-off savings run: per source, whichever of the two plans uses
+    fewer trucks (then less distance), so the result is never worse than greedy.
+    """
+    def by_source(routed: list[RoutedTruck]) -> dict[str, list[RoutedTruck]]:
+        grouped: dict[str, list[RoutedTruck]] = defaultdict(list)
+        for rt in routed:
+            grouped[rt.truck.source_id].append(rt)
+        return grouped
+
+    def cost(trucks: list[RoutedTruck]) -> tuple[int, int]:
+        return len(trucks), sum(rt.route_distance_meters for rt in trucks)
+
+    greedy_by_source = by_source(greedy)
+    return [
+        rt
+        for source_id, trucks in by_source(optimized).items()
+        for rt in min(trucks, greedy_by_source[source_id], key=cost)
+    ]
+
 
-    return OptimizeResponse(
-        greedy=_build_solution(batch_containers(**kwargs), node_to_dest_id),
-        optimized=_build_solution(savings_batch_containers(**kwargs), node_to_dest_id),
+def _solve(
+    kwargs: dict,
+    node_to_dest_id: dict[int, str],
+    cache_key: str,
+    time_budget_ms: int | None = None,
+    timer: PhaseTimer | None = None,
+) -> OptimizeResponse:
+    """
+    A timer, if given, collects the solvers' phases, counters, and "build"
+    (turning the routed trucks into the response).
+    """
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        if timer is not None:
+            timer.count("result_cache_hits")
+        return cached
+    deadline = _deadline(time_budget_ms)
+    greedy = batch_containers(**kwargs, timer=timer)
+    optimized = savings_batch_containers(**kwargs, deadline=deadline, timer=timer)
+    complete = deadline is None or not deadline.hit
+    return _respond(greedy, optimized, complete, node_to_dest_id, cache_key, timer)
+
+
+def _respond(
+    greedy: list[RoutedTruck],
+    optimized: list[RoutedTruck],
+    complete: bool,
+    node_to_dest_id: dict[int, str],
+    cache_key: str,
+    timer: PhaseTimer | None = None,
+) -> OptimizeResponse:
+    """Builds the response for solved plans, caching it if the solve was complete."""
+    with _phase(timer, "build"):
+        if not complete:
+            optimized = _floor_by_source(greedy, optimized)
+        response = OptimizeResponse(
+            greedy=_build_solution(greedy, node_to_dest_id),
+            optimized=_build_solution(optimized, node_to_dest_id),
+            optimized_complete=complete,
+        )
+    if complete:
+        result_cache.put(cache_key, response)
+    return response
+
+
+def _with_geometry(response: OptimizeResponse, kwargs: dict, fmt: GeometryFormat) -> OptimizeResponse:
+    """
+    Returns a copy of response with every truck's route stitched from the
+    precomputed legs, so clients can draw the whole solution from one payload.
+    """
+    store = _require_geometries()
+    source_node_ids = kwargs["source_node_ids"]
+    destination_node_ids = kwargs["destination_node_ids"]
+    truck_legs: dict[str, list[str]] = {}
+    for truck in response.greedy.trucks + response.optimized.trucks:
+        stops = [source_node_ids[truck.source_id]] + [destination_node_ids[d] for d in truck.destination_ids]
+        truck_legs[truck.id] = [f"{a}-{b}" for a, b in zip(stops, stops[1:])]
+    legs = _legs_or_404(store, [key for keys in truck_legs.values() for key in keys], fmt)
+    return response.model_copy(update={"geometry": RouteGeometryOut(legs=legs, trucks=truck_legs)})
+
+
+@app.post("/optimize", response_model=OptimizeResponse, response_model_exclude_none=True)
+def optimize(
+    request: OptimizeRequest,
+    http_request: Request,
+    include_geometry: bool = False,
+    geometry_format: GeometryFormat = "polyline",
+):
+    timer = _request_timer(http_request)
+    if include_geometry:
+        _require_geometries()  # fail before solving, not after
+    with _phase(timer, "resolve"):
+        prepared = _prepare(request)
+    if timer is not None:
+        metrics.set("routing_problem_containers", len(request.containers))
+        metrics.set("routing_problem_sources", len(request.sources))
+        metrics.set("routing_problem_destinations", len(request.destinations))
+    response = _solve(*prepared, timer=timer)
+    if include_geometry:
+        with _phase(timer, "geometry"):
+            response = _with_geometry(response, prepared[0], geometry_format)
+    _handler_done(http_request)
+    return response
+
+
+# Savings solves behind /optimize/stream, at most ROUTING_STREAM_CONCURRENCY
+# at once; further streams wait for a slot after sending their greedy plan.
+_stream_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("ROUTING_STREAM_CONCURRENCY", "4")),
+    thread_name_prefix="optimize-stream",
+)
+
+
+async def _client_gone(http_request: Request) -> None:
+    """
+    Returns once the client disconnects. Streams can go quiet for a long time
+    (nothing is sent while consolidation prices its pairs), so a failed send
+    can't be relied on to notice; and Request.is_disconnected() never sees
+    the disconnect through the metrics middleware, whose receive() always
+    suspends. Waiting on receive() itself works either way.
+    """
+    while (await http_request.receive())["type"] != "http.disconnect":
+        pass
+
+
+async def _stream_solutions(
+    http_request: Request,
+    kwargs: dict,
+    node_to_dest_id: dict[int, str],
+    cache_key: str,
+    time_budget_ms: int | None = None,
+) -> AsyncIterator[bytes]:
+    """
+    NDJSON lines, each {"stage", "solution", ...}:
+        "greedy"    — the greedy solution, as soon as it exists (it is cheap)
+        "progress"  — a complete plan: greedy trucks for sources the savings
+                      algorithm hasn't reached yet, its latest result for the
+                      rest. "phase" is that source's savings / consolidation /
+                      final step, "source_id" the source that changed.
+        "optimized" — the final savings solution (last line); "complete" is
+                      false if the time budget cut it short
+        "error"     — solving failed; "detail" says why (last line)
+    """
+    def line(stage: str, solution: SolutionOut | None = None, **extra) -> bytes:
+        payload = {"stage": stage, **extra}
+        if solution is not None:
+            payload["solution"] = solution.model_dump()
+        return json.dumps(payload).encode() + b"\n"
+
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        yield line("greedy", cached.greedy)
+        yield line("optimized", cached.optimized, complete=True)
+        return
+
+    greedy_routed = await run_in_threadpool(batch_containers, **kwargs)
+    greedy = _build_solution(greedy_routed, node_to_dest_id)
+    yield line("greedy", greedy)
+
+    # Latest trucks per source, seeded with greedy; only the solver thread writes it.
+    current: dict[str, list[RoutedTruck]] = defaultdict(list)
+    for rt in greedy_routed:
+        current[rt.truck.source_id].append(rt)
+    loop = asyncio.get_running_loop()
+    updates: asyncio.Queue[bytes | None] = asyncio.Queue()
+
+    def publish(chunk: bytes | None) -> None:
+        loop.call_soon_threadsafe(updates.put_nowait, chunk)
+
+    def on_progress(source_id: str, phase: str, routed: list[RoutedTruck]) -> None:
+        current[source_id] = routed
+        solution = _build_solution([rt for trucks in current.values() for rt in trucks], node_to_dest_id)
+        publish(line("progress", solution, phase=phase, source_id=source_id))
+
+    # Cancelled as soon as the client disconnects (or the generator is closed),
+    # so the solve stops instead of running for nobody. (With ROUTING_WORKERS
+    # > 1, sources already handed to workers still finish.)
+    deadline = _deadline(time_budget_ms) or Deadline.never()
+
+    def solve() -> None:
+        try:
+            optimized_routed = savings_batch_containers(**kwargs, on_progress=on_progress, deadline=deadline)
+            complete = not deadline.hit
+            if not complete:
+                optimized_routed = _floor_by_source(greedy_routed, optimized_routed)
+            optimized = _build_solution(optimized_routed, node_to_dest_id)
+            if complete:
+                result_cache.put(cache_key, OptimizeResponse(greedy=greedy, optimized=optimized))
+            publish(line("optimized", optimized, complete=complete))
+        except Exception as e:
+            publish(line("error", detail=f"{type(e).__name__}: {e}"))
+        publish(None)
+
+    future = _stream_executor.submit(solve)
+    gone = asyncio.ensure_future(_client_gone(http_request))
+    try:
+        while True:
+            update = asyncio.ensure_future(updates.get())
+            await asyncio.wait((update, gone), return_when=asyncio.FIRST_COMPLETED)
+            if not update.done():
+                update.cancel()
+                return
+            if (chunk := update.result()) is None:
+                return
+            yield chunk
+    finally:
+        gone.cancel()
+        future.cancel()  # still queued: never starts
+        deadline.cancel()
+
+
+@app.post("/optimize/stream")
+def optimize_stream(request: OptimizeRequest, http_request: Request):
+    """Like /optimize, streamed as NDJSON so clients can show the greedy plan immediately."""
+    prepared = _prepare(request)  # unknown locations still fail with a plain 400
+    return StreamingResponse(_stream_solutions(http_request, *prepared), media_type="application/x-ndjson")
+
+
+@app.get("/optimize/cache")
+def get_optimize_cache_stats():
+    return result_cache.stats()
+
+
+# Routed stop sets, shared by every request in this process (see
+# science/route_cache.py). Worker processes keep their own.
+route_cache.maxsize = int(os.getenv("ROUTING_ROUTE_CACHE_SIZE", str(route_cache.maxsize)))
+
+
+@app.get("/optimize/route-cache")
+def get_route_cache_stats():
+    return route_cache.stats()
+
+
+# --- Bulk scenarios ---
+#
+# What-if sweeps (several truck sizes, container subsets, ...) in one call.
+# Scenarios share one node resolution pass. With ROUTING_WORKERS > 1 each
+# scenario is solved whole in a worker process, so a sweep uses every worker.
+# Otherwise they run on ROUTING_BATCH_CONCURRENCY threads in this process,
+# which share one core: solving is CPU-bound Python.
+
+_batch_max_scenarios = int(os.getenv("ROUTING_BATCH_MAX_SCENARIOS", "100"))
+_batch_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("ROUTING_BATCH_CONCURRENCY", "4")),
+    thread_name_prefix="scenario",
+)
+
+
+class BatchOptimizeRequest(BaseModel):
+    scenarios: list[OptimizeRequest]
+
+class ScenarioResultOut(BaseModel):
+    ok: bool
+    result: OptimizeResponse | None = None
+    status_code: int = 200
+    error: str | None = None
+
+class BatchOptimizeResponse(BaseModel):
+    results: list[ScenarioResultOut]  # same order as the submitted scenarios
+
+
+def _scenario_failure(e: Exception) -> ScenarioResultOut:
+    if isinstance(e, HTTPException):
+        return ScenarioResultOut(ok=False, status_code=e.status_code, error=str(e.detail))
+    return ScenarioResultOut(ok=False, status_code=500, error=f"{type(e).__name__}: {e}")
+
+
+def _solve_scenario(prepared: tuple) -> ScenarioResultOut:
+    try:
+        return ScenarioResultOut(ok=True, result=_solve(*prepared))
+    except Exception as e:
+        return _scenario_failure(e)
+
+
+def _solve_scenarios_in_workers(prepared: list[tuple | None], results: list[ScenarioResultOut | None]) -> None:
+    """Fills results[k] for each prepared[k], solving cache misses whole in source_pool's workers."""
+    futures = {}
+    for k, scenario in enumerate(prepared):
+        if scenario is None:
+            continue
+        kwargs, node_to_dest_id, cache_key, time_budget_ms = scenario
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            results[k] = ScenarioResultOut(ok=True, result=cached)
+            continue
+        futures[k] = source_pool.submit(solve_plans, (
+            kwargs["containers"], kwargs["source_node_ids"], kwargs["destination_node_ids"],
+            kwargs["truck_size"], time_budget_ms,
+        ))
+    for k, future in futures.items():
+        _, node_to_dest_id, cache_key, _ = prepared[k]
+        try:
+            result = _respond(*future.result(), node_to_dest_id, cache_key)
+            results[k] = ScenarioResultOut(ok=True, result=result)
+        except Exception as e:
+            results[k] = _scenario_failure(e)
+
+
+@app.post("/optimize/batch", response_model=BatchOptimizeResponse)
+def optimize_batch(request: BatchOptimizeRequest):
+    if len(request.scenarios) > _batch_max_scenarios:
+        raise HTTPException(
+            status_code=413,
+            detail=f"{len(request.scenarios)} scenarios exceeds the limit of {_batch_max_scenarios}",
+        )
+
+    # Scenarios in a sweep mostly reuse the same locations: resolve them all
+    # at once, each distinct one once.
+    resolved = _resolve_locations(
+        (loc.lat, loc.lon) for scenario in request.scenarios for loc in scenario.sources + scenario.destinations
     )
+
+    results: list[ScenarioResultOut | None] = [None] * len(request.scenarios)
+    prepared: list[tuple | None] = []
+    for k, scenario in enumerate(request.scenarios):
+        try:
+            prepared.append(_prepare(scenario, resolved))
+        except HTTPException as e:
+            prepared.append(None)
+            results[k] = _scenario_failure(e)
+
+    if source_pool is not None:
+        _solve_scenarios_in_workers(prepared, results)
+    else:
+        pending = [k for k, scenario in enumerate(prepared) if scenario is not None]
+        for k, result in zip(pending, _batch_executor.map(_solve_scenario, [prepared[k] for k in pending])):
+            results[k] = result
+    return BatchOptimizeResponse(results=results)
+
+
+# --- Background jobs ---
+#
+# For plans too large to solve within a request: submit, then poll.
+
+job_queue = JobQueue(
+    max_workers=int(os.getenv("ROUTING_JOB_WORKERS", "2")),
+    queue_depth=int(os.getenv("ROUTING_JOB_QUEUE_DEPTH", "16")),
+    ttl_seconds=float(os.getenv("ROUTING_JOB_TTL_SECONDS", "3600")),
+)
+
+
+class JobOut(BaseModel):
+    job_id: str
+    status: Literal["queued", "running", "done", "failed"]
+    result: OptimizeResponse | None = None
+    error: str | None = None
+
+
+def _job_out(job: Job) -> JobOut:
+    return JobOut(job_id=job.id, status=job.status, result=job.result, error=job.error)
+
+
+def _solve_job(
+    kwargs: dict,
+    node_to_dest_id: dict[int, str],
+    cache_key: str,
+    time_budget_ms: int | None,
+    geometry_format: GeometryFormat | None,
+) -> OptimizeResponse:
+    response = _solve(kwargs, node_to_dest_id, cache_key, time_budget_ms)
+    if geometry_format is not None:
+        response = _with_geometry(response, kwargs, geometry_format)
+    return response
+
+
+@app.post("/jobs", response_model=JobOut, status_code=202)
+def submit_job(
+    request: OptimizeRequest,
+    include_geometry: bool = False,
+    geometry_format: GeometryFormat = "polyline",
+):
+    if include_geometry:
+        _require_geometries()
+    prepared = _prepare(request)
+    try:
+        job = job_queue.submit(_solve_job, *prepared, geometry_format if include_geometry else None)
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=f"Job queue is full: {e}", headers={"Retry-After": "30"})
+    return _job_out(job)
+
+
+@app.get("/jobs/{job_id}", response_model=JobOut)
+def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return _job_out(job)
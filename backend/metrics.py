@@ -0,0 +1,98 @@
+"""
+Minimal Prometheus-style metrics for the API.
+
+Counters, gauges and histograms kept in memory and rendered in the Prometheus
+text exposition format by Metrics.render() (served at GET /metrics). Values
+are per process. Thread-safe: requests are handled on FastAPI's threadpool.
+"""
+
+import threading
+from collections import defaultdict
+
+# Latency buckets in seconds, from a cache hit up to a pathological solve.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _labels(labels: dict[str, str] | None) -> Labels:
+    return tuple(sorted((labels or {}).items()))
+
+
+def _format(name: str, labels: Labels, value: float) -> str:
+    text = str(int(value)) if float(value).is_integer() else repr(float(value))
+    if labels:
+        inner = ",".join(f'{k}="{v}"' for k, v in labels)
+        return f"{name}{{{inner}}} {text}"
+    return f"{name} {text}"
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+
+class Metrics:
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self._help: dict[str, str] = {}
+        self._counters: dict[str, dict[Labels, float]] = defaultdict(dict)
+        self._gauges: dict[str, dict[Labels, float]] = defaultdict(dict)
+        self._histograms: dict[str, dict[Labels, _Histogram]] = defaultdict(dict)
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1, labels: dict[str, str] | None = None) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters[name]
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, labels: dict[str, str] | None = None) -> None:
+        with self._lock:
+            self._gauges[name][_labels(labels)] = value
+
+    def observe(self, name: str, value: float, labels: dict[str, str] | None = None) -> None:
+        key = _labels(labels)
+        with self._lock:
+            hist = self._histograms[name].get(key)
+            if hist is None:
+                hist = self._histograms[name][key] = _Histogram(self.buckets)
+            for k, bound in enumerate(self.buckets):
+                if value <= bound:
+                    hist.counts[k] += 1
+                    break
+            hist.sum += value
+            hist.count += 1
+
+    def render(self) -> str:
+        lines: list[str] = []
+        with self._lock:
+            for kind, families in (("counter", self._counters), ("gauge", self._gauges)):
+                for name, series in sorted(families.items()):
+                    self._header(lines, name, kind)
+                    for labels, value in sorted(series.items()):
+                        lines.append(_format(name, labels, value))
+            for name, series in sorted(self._histograms.items()):
+                self._header(lines, name, "histogram")
+                for labels, hist in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(self.buckets, hist.counts):
+                        cumulative += count
+                        lines.append(_format(f"{name}_bucket", labels + (("le", f"{bound:g}"),), cumulative))
+                    lines.append(_format(f"{name}_bucket", labels + (("le", "+Inf"),), hist.count))
+                    lines.append(_format(f"{name}_sum", labels, hist.sum))
+                    lines.append(_format(f"{name}_count", labels, hist.count))
+        return "\n".join(lines) + "\n"
+
+    def _header(self, lines: list[str], name: str, kind: str) -> None:
+        help_text = self._help.get(name)
+        if help_text:
+            lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
@@ -20,20 +20,64 @@ Clarke-Wright savings strategy:
 1. Start with one truck per destination (direct source → dest → source).
 2. Compute savings(i, j) = dist(src,i) + dist(src,j) - dist(i,j) for all pairs.
    Merging i and j into one route saves this amount vs. two separate trips.
-3. Sort savings descending; merge pairs if capacity constraints allow.
+3. Take pairs in descending savings order; merge if capacity allows.
+   Savings are computed with numpy a slice of matrix rows at a time and
+   handed out in blocks, best first, so memory stays bounded however many
+   destinations there are; each block's scan skips pairs that can no longer
+   merge, and merging stops once none are left. Destination ownership is tracked with union-find, so
+   each merge is near-constant time.
 4. Post-merge consolidation: repeatedly force the cheapest feasible merge of
    any remaining truck pair (even at a distance penalty) until no merge is
-   possible — minimizing truck count.
-5. Route each resulting truck with nearest-neighbor + 2-opt improvement.
+   possible — minimizing truck count. Pair costs are cached and driven by a
+   priority queue, so each merge only re-prices pairs of the absorbing truck.
+5. Route each resulting truck exactly (Held-Karp) when it has at most
+   HELD_KARP_MAX_STOPS stops, otherwise with nearest-neighbor + 2-opt +
+   Or-opt. Consolidation prices candidate merges the same way; exact orders
+   are cached process-wide (science.route_cache), so stop sets seen before
+   cost a lookup.
+
+Given a Deadline, the savings strategy runs in anytime mode: every step above
+leaves a complete, capacity-feasible plan, so once the deadline passes the
+remaining merging, consolidation and route improvement are skipped and the
+plan as it stands is routed with nearest-neighbor. Sources reached after that
+never scan for savings either, so the overrun is only the cost of writing out
+their one-truck-per-destination plans, which is linear in their containers.
 """
 
+import heapq
+import time
 import uuid
+from bisect import bisect_left, insort
 from collections import defaultdict
+from collections.abc import Callable, Iterator
+from functools import partial
 from dataclasses import dataclass
-from itertools import combinations
+from itertools import chain, combinations
 
-from science.structs import Container, Truck, TruckSize
-from science.router import nearest_neighbor_route, total_route_distance, two_opt_improve, three_opt_improve
+import numpy as np
+
+from science.matrix import Matrix, submatrix
+from science.parallel import SourcePool
+from science.structs import Container, Deadline, DisjointSet, PhaseTimer, Truck, TruckSize
+from science.neighbors import neighbor_lists
+from science.route_cache import RouteAlgorithm, route_cache
+
+
+# Fewest savings pairs sorted per block.
+SAVINGS_BLOCK_SIZE = 4_096
+
+# Most pairs per block, and about the most savings computed per numpy call
+# while scanning: together they bound the savings queue's memory, however
+# many destinations a source has.
+SAVINGS_MAX_BLOCK = 262_144
+SAVINGS_SCAN_PAIRS = 262_144
+
+# Minimum seconds between intermediate "consolidation" progress reports.
+PROGRESS_INTERVAL_SECONDS = 0.25
+
+# Identifies the solver behaviour for result caching. Bump whenever a change
+# alters the solutions these functions produce for the same input.
+ALGORITHM_VERSION = 5
 
 
 @dataclass
@@ -44,229 +88,735 @@ class RoutedTruck:
     route_duration_seconds: int
 
 
+# on_progress(source_id, phase, routed_trucks) — see savings_batch_containers.
+ProgressCallback = Callable[[str, str, list[RoutedTruck]], None]
+
+
+def _skip_lap(name: str) -> None:
+    pass
+
+
+def _route_truck(
+    truck: Truck,
+    algorithm: RouteAlgorithm,
+    src_node: int,
+    destination_node_ids: dict[str, int],
+    distance_matrix: Matrix,
+    duration_matrix: Matrix,
+    timer: PhaseTimer | None = None,
+) -> RoutedTruck:
+    """Routes the truck's stops through the shared route cache."""
+    dest_nodes = [destination_node_ids[d] for d in truck.destination_ids]
+    if len(dest_nodes) == 1:
+        # Nothing to order, and cheaper than a cache lookup — this is most
+        # trucks when a deadline cut merging short.
+        if timer is not None:
+            timer.count("route_solves")
+        node = dest_nodes[0]
+        return RoutedTruck(
+            truck=truck,
+            ordered_destination_node_ids=dest_nodes,
+            route_distance_meters=int(distance_matrix[src_node][node]),
+            route_duration_seconds=int(duration_matrix[src_node][node]),
+        )
+    route = route_cache.route(algorithm, src_node, dest_nodes, distance_matrix, duration_matrix, timer)
+    return RoutedTruck(
+        truck=truck,
+        ordered_destination_node_ids=list(route.order),
+        route_distance_meters=route.distance,
+        route_duration_seconds=route.duration,
+    )
+
+
+def _solve_by_source(
+    solve: Callable[..., list[RoutedTruck]],
+    containers: list[Container],
+    source_node_ids: dict[str, int],
+    destination_node_ids: dict[str, int],
+    truck_size: TruckSize,
+    distance_matrix: Matrix,
+    duration_matrix: Matrix,
+    pool: SourcePool | None,
+    on_progress: ProgressCallback | None = None,
+    deadline: Deadline | None = None,
+    timer: PhaseTimer | None = None,
+) -> list[RoutedTruck]:
+    """
+    Groups containers by source and runs solve() on each source — trucks
+    never cross sources, so every source is an independent subproblem.
+
+    With on_progress, solve() also receives a per-source progress callback
+    when running in-process. Worker processes can't call back mid-solve, so
+    under a pool only each source's "final" result is reported, as it lands.
+
+    A deadline is passed on to solve(). Workers get their own copy and
+    report whether they hit it, so under a pool deadline.hit is set
+    afterwards if any source was cut short.
+
+    A timer collects solve()'s per-phase times in-process only; under a pool
+    the phases run in the workers and aren't recorded.
+    """
+    options = {} if deadline is None else {"deadline": deadline}
+    by_source: dict[str, list[Container]] = defaultdict(list)
+    for c in containers:
+        by_source[c.source_id].append(c)
+
+    if pool is None:
+        results: list[RoutedTruck] = []
+        for src_id, src_containers in by_source.items():
+            progress = {} if on_progress is None else {"progress": partial(on_progress, src_id)}
+            timed = {} if timer is None else {"timer": timer}
+            results.extend(solve(
+                src_id, src_containers, source_node_ids[src_id], destination_node_ids,
+                truck_size, distance_matrix, duration_matrix, **progress, **options, **timed,
+            ))
+        return results
+
+    if not pool.serves(distance_matrix, duration_matrix):
+        raise ValueError("SourcePool was created for different matrices")
+    # Only ship each worker the destinations its source actually uses.
+    tasks = [
+        (
+            src_id,
+            src_containers,
+            source_node_ids[src_id],
+            {c.destination_id: destination_node_ids[c.destination_id] for c in src_containers},
+            truck_size,
+        )
+        for src_id, src_containers in by_source.items()
+    ]
+    on_result = None
+    if on_progress is not None:
+        src_ids = list(by_source)
+        on_result = lambda k, result: on_progress(src_ids[k], "final", result[0])
+    solved = pool.map(partial(_report_hit, solve), tasks, on_result=on_result, kwargs=options)
+    if deadline is not None and any(hit for _, hit in solved):
+        deadline.hit = True
+    return [rt for routed, _ in solved for rt in routed]
+
+
+def _report_hit(
+    solve: Callable[..., list[RoutedTruck]], *args, deadline: Deadline | None = None, **kwargs,
+) -> tuple[list[RoutedTruck], bool]:
+    """Runs solve() in a worker, returning whether it hit its copy of the deadline too."""
+    if deadline is None:
+        return solve(*args, **kwargs), False
+    return solve(*args, deadline=deadline, **kwargs), deadline.hit
+
+
 def batch_containers(
     containers: list[Container],
     source_node_ids: dict[str, int],       # logical source ID -> node ID
     destination_node_ids: dict[str, int],  # logical destination ID -> node ID
     truck_size: TruckSize,
-    distance_matrix: list[list[int]],
-    duration_matrix: list[list[int]],
+    distance_matrix: Matrix,
+    duration_matrix: Matrix,
+    pool: SourcePool | None = None,
+    timer: PhaseTimer | None = None,
 ) -> list[RoutedTruck]:
     """
     Returns a list of RoutedTruck objects with containers assigned and
     destinations ordered by the nearest-neighbor route.
+
+    With a SourcePool, sources are solved in parallel worker processes;
+    results come back in the same order as a serial run.
+
+    A timer, if given, accumulates "greedy.assign" and "greedy.route" time
+    and counts route cache hits / route solves.
     """
-    by_source: dict[str, list[Container]] = defaultdict(list)
-    for c in containers:
-        by_source[c.source_id].append(c)
+    return _solve_by_source(
+        _greedy_source, containers, source_node_ids, destination_node_ids,
+        truck_size, distance_matrix, duration_matrix, pool, timer=timer,
+    )
+
 
+def _greedy_source(
+    src_id: str,
+    src_containers: list[Container],
+    src_node: int,
+    destination_node_ids: dict[str, int],
+    truck_size: TruckSize,
+    distance_matrix: Matrix,
+    duration_matrix: Matrix,
+    timer: PhaseTimer | None = None,
+) -> list[RoutedTruck]:
+    """Greedy assignment + nearest-neighbor routing for one source's containers."""
+    lap = timer.laps() if timer is not None else _skip_lap
     results: list[RoutedTruck] = []
+    trucks = _OpenTrucks(src_containers, destination_node_ids, distance_matrix)
 
-    for src_id, src_containers in by_source.items():
-        src_node = source_node_ids[src_id]
-        open_trucks: list[Truck] = []
-
-        for container in src_containers:
-            c_node = destination_node_ids[container.destination_id]
-            placed = False
-
-            # 1. Truck already going to this exact destination with room.
-            for truck in open_trucks:
-                if container.destination_id in truck.destination_ids and truck.can_fit(container):
-                    truck.add(container)
-                    placed = True
-                    break
-
-            # 2. Any truck with capacity, preferring geographically closest.
-            if not placed:
-                capable = [t for t in open_trucks if t.can_fit(container)]
-                if capable:
-                    def _proximity(truck: Truck) -> int:
-                        truck_dest_nodes = [destination_node_ids[d] for d in truck.destination_ids]
-                        if not truck_dest_nodes:
-                            return distance_matrix[src_node][c_node]
-                        return min(distance_matrix[d][c_node] for d in truck_dest_nodes)
-
-                    best = min(capable, key=_proximity)
-                    best.add(container)
-                    placed = True
-
-            # 3. Open a new truck.
-            if not placed:
-                truck = Truck(id=str(uuid.uuid4()), source_id=src_id, truck_size=truck_size)
-                truck.add(container)
-                open_trucks.append(truck)
-
-        # Route each truck's stops with nearest-neighbor from its source node.
-        for truck in open_trucks:
-            dest_nodes = [destination_node_ids[d] for d in truck.destination_ids]
-            ordered_nodes = nearest_neighbor_route(src_node, dest_nodes, distance_matrix)
-            results.append(RoutedTruck(
-                truck=truck,
-                ordered_destination_node_ids=ordered_nodes,
-                route_distance_meters=total_route_distance(src_node, ordered_nodes, distance_matrix),
-                route_duration_seconds=total_route_distance(src_node, ordered_nodes, duration_matrix),
-            ))
+    for container in src_containers:
+        # 1. Truck already going to this exact destination with room.
+        best = trucks.with_destination(container)
+
+        # 2. Any truck with capacity, preferring geographically closest.
+        if best is None:
+            best = trucks.nearest(container, destination_node_ids[container.destination_id])
+
+        # 3. Open a new truck.
+        if best is None:
+            best = trucks.open(Truck(id=str(uuid.uuid4()), source_id=src_id, truck_size=truck_size))
+        trucks.add(best, container)
+
+    lap("greedy.assign")
+
+    # Route each truck's stops with nearest-neighbor from its source node.
+    for truck in trucks.trucks:
+        results.append(_route_truck(truck, "nearest_neighbor", src_node, destination_node_ids, distance_matrix, duration_matrix, timer))
+    lap("greedy.route")
 
     return results
 
 
+class _OpenTrucks:
+    """
+    The greedy assigner's trucks, indexed per temperature by the stops they
+    make: destination ID -> trucks, and stop node -> trucks. Index lists hold
+    truck positions in opening order, which is the greedy tie-break.
+
+    A truck leaves a temperature's indexes once it has no room left for the
+    smallest container of that temperature, so lookups only visit trucks
+    that might still take the container at hand.
+    """
+
+    def __init__(self, containers: list[Container], destination_node_ids: dict[str, int], distance_matrix: Matrix) -> None:
+        self.trucks: list[Truck] = []
+        self._destination_node_ids = destination_node_ids
+        self._distance_matrix = distance_matrix
+        self._candidates = neighbor_lists(distance_matrix)
+        self._min_size = {
+            temperature: size
+            for temperature in ("AM", "RE")
+            if (size := min((c.size for c in containers if c.temperature == temperature), default=None)) is not None
+        }
+        self._open: dict[str, set[int]] = {t: set() for t in self._min_size}
+        self._by_destination: dict[str, dict[str, list[int]]] = {t: {} for t in self._min_size}
+        self._by_node: dict[str, dict[int, list[int]]] = {t: {} for t in self._min_size}
+
+    def open(self, truck: Truck) -> int:
+        k = len(self.trucks)
+        self.trucks.append(truck)
+        for open_trucks in self._open.values():
+            open_trucks.add(k)
+        return k
+
+    def add(self, k: int, container: Container) -> None:
+        truck = self.trucks[k]
+        new_stop = not truck.has_destination(container.destination_id)
+        truck.add(container)
+        for temperature, open_trucks in self._open.items():
+            if k not in open_trucks:
+                continue
+            remaining = truck.am_remaining if temperature == "AM" else truck.re_remaining
+            if remaining < self._min_size[temperature]:
+                open_trucks.discard(k)
+                for destination_id in truck.destination_ids:
+                    self._unindex(temperature, destination_id, k)
+            elif new_stop:
+                self._index(temperature, container.destination_id, k)
+
+    def with_destination(self, container: Container) -> int | None:
+        """The first truck already stopping at the container's destination that fits it."""
+        for k in self._by_destination[container.temperature].get(container.destination_id, ()):
+            if self.trucks[k].can_fit(container):
+                return k
+        return None
+
+    def nearest(self, container: Container, c_node: int) -> int | None:
+        """
+        The truck fitting the container with a stop nearest to c_node
+        (distance stop -> c_node), the first opened among equally near ones.
+
+        Walks c_node's in-list nearest first, so the search usually ends at
+        the first node a fitting truck stops at. When there are few open
+        stops, or the list is inconclusive, all open stops are sorted by
+        distance and walked instead.
+        """
+        d = self._distance_matrix
+        at_node = self._by_node[container.temperature]
+        if not at_node:
+            return None
+        best: tuple[int, int] | None = None  # (distance, truck)
+        if len(at_node) > self._candidates.k:  # otherwise sorting them all is cheaper
+            for node in chain((c_node,), self._candidates.into_of(c_node)):
+                if best is not None and d[node][c_node] != best[0]:
+                    return best[1]  # past the ties of the nearest fitting stop
+                if node in at_node and (k := self._first_fit(at_node, node, container)) is not None:
+                    best = (d[node][c_node], k) if best is None else (best[0], min(best[1], k))
+
+        nodes = list(at_node)
+        if isinstance(d, np.ndarray):
+            distances = d[nodes, c_node].tolist()
+        else:
+            distances = [d[node][c_node] for node in nodes]
+        best = None
+        for i in sorted(range(len(nodes)), key=distances.__getitem__):
+            if best is not None and distances[i] != best[0]:
+                break
+            k = self._first_fit(at_node, nodes[i], container)
+            if k is not None:
+                best = (distances[i], k) if best is None else (best[0], min(best[1], k))
+        return best[1] if best is not None else None
+
+    def _first_fit(self, at_node: dict[int, list[int]], node: int, container: Container) -> int | None:
+        for k in at_node.get(node, ()):
+            if self.trucks[k].can_fit(container):
+                return k
+        return None
+
+    def _index(self, temperature: str, destination_id: str, k: int) -> None:
+        insort(self._by_destination[temperature].setdefault(destination_id, []), k)
+        at_node = self._by_node[temperature].setdefault(self._destination_node_ids[destination_id], [])
+        i = bisect_left(at_node, k)
+        if i == len(at_node) or at_node[i] != k:
+            at_node.insert(i, k)
+
+    def _unindex(self, temperature: str, destination_id: str, k: int) -> None:
+        _discard(self._by_destination[temperature], destination_id, k)
+        _discard(self._by_node[temperature], self._destination_node_ids[destination_id], k)
+
+
+def _discard(index: dict, key, k: int) -> None:
+    """Removes k from index[key], dropping the key once its list is empty."""
+    entries = index.get(key)
+    if entries is None:
+        return
+    i = bisect_left(entries, k)
+    if i < len(entries) and entries[i] == k:
+        del entries[i]
+        if not entries:
+            del index[key]
+
+
+def _consolidate(
+    trucks: dict[str, Truck],
+    src_node: int,
+    destination_node_ids: dict[str, int],
+    distance_matrix: Matrix,
+    duration_matrix: Matrix,
+    on_merge: Callable[[], None] | None = None,
+    deadline: Deadline | None = None,
+    timer: PhaseTimer | None = None,
+) -> None:
+    """
+    Repeatedly applies the cheapest feasible merge of any two trucks (tj into
+    ti, mutating `trucks`) until no pair fits together or the deadline passes.
+    on_merge, if given, is called after every merge. A timer, if given, counts
+    "merge_evaluations" (pairs priced) and "merges".
+
+    The extra distance of merging a pair only changes when one of its trucks
+    changes, so pair costs are cached and fed to a min-heap. After a merge only
+    pairs involving the absorbing truck are re-evaluated; heap entries whose
+    cached cost was invalidated are skipped when popped. Ties resolve in truck
+    order (ti before tj), same as a full rescan each round would.
+    """
+    rank = {t_id: k for k, t_id in enumerate(trucks)}
+    solo: dict[str, int] = {}                    # truck id -> distance routed on its own
+    costs: dict[tuple[str, str], int] = {}       # (ti id, tj id) -> extra distance of merging
+    heap: list[tuple[int, int, int, str, str]] = []
+
+    def nodes_of(t: Truck) -> list[int]:
+        return [destination_node_ids[d] for d in t.destination_ids]
+
+    def route_distance(nodes: list[int]) -> int:
+        return route_cache.route("exact", src_node, nodes, distance_matrix, duration_matrix, timer).distance
+
+    def solo_distance(t: Truck) -> int:
+        return route_distance(nodes_of(t))
+
+    def evaluate(ti: Truck, tj: Truck) -> None:
+        if rank[ti.id] > rank[tj.id]:
+            ti, tj = tj, ti
+        if not ti.can_absorb(tj):
+            return
+        if timer is not None:
+            timer.count("merge_evaluations")
+        # Cost of merging: route ti's stops + tj's stops together vs separately.
+        merged_dist = route_distance(nodes_of(ti) + nodes_of(tj))
+        extra = merged_dist - solo[ti.id] - solo[tj.id]
+        costs[ti.id, tj.id] = extra
+        heapq.heappush(heap, (extra, rank[ti.id], rank[tj.id], ti.id, tj.id))
+
+    for t in trucks.values():
+        if deadline is not None and deadline.expired():
+            return
+        solo[t.id] = solo_distance(t)
+    for ti, tj in combinations(list(trucks.values()), 2):
+        if deadline is not None and deadline.expired():
+            return
+        evaluate(ti, tj)
+
+    while heap:
+        if deadline is not None and deadline.expired():
+            return
+        extra, _, _, ti_id, tj_id = heapq.heappop(heap)
+        if costs.get((ti_id, tj_id)) != extra:
+            continue  # stale: one of the trucks has changed since this was pushed
+
+        ti = trucks[ti_id]
+        ti.absorb(trucks.pop(tj_id))
+        if timer is not None:
+            timer.count("merges")
+
+        # Invalidate every cached pair touching either truck, then re-price ti.
+        for other_id in trucks:
+            for pair in ((ti_id, other_id), (other_id, ti_id), (tj_id, other_id), (other_id, tj_id)):
+                costs.pop(pair, None)
+        costs.pop((ti_id, tj_id), None)
+        del solo[tj_id]
+        solo[ti_id] = solo_distance(ti)
+        for other in trucks.values():
+            if deadline is not None and deadline.expired():
+                return
+            if other is not ti:
+                evaluate(ti, other)
+
+        if on_merge is not None:
+            on_merge()
+
+
 def savings_batch_containers(
     containers: list[Container],
     source_node_ids: dict[str, int],
     destination_node_ids: dict[str, int],
     truck_size: TruckSize,
-    distance_matrix: list[list[int]],
-    duration_matrix: list[list[int]],
+    distance_matrix: Matrix,
+    duration_matrix: Matrix,
+    pool: SourcePool | None = None,
+    on_progress: ProgressCallback | None = None,
+    deadline: Deadline | None = None,
+    timer: PhaseTimer | None = None,
 ) -> list[RoutedTruck]:
     """
-    Clarke-Wright savings algorithm with 2-opt route improvement.
+    Clarke-Wright savings algorithm with exact / 2-opt + Or-opt routing.
 
     Tends to produce fewer trucks and shorter total distance than the greedy
     approach, especially when many containers share nearby destinations.
+
+    With a SourcePool, sources are solved in parallel worker processes;
+    results come back in the same order as a serial run.
+
+    on_progress(source_id, phase, routed_trucks) receives each source's
+    intermediate solutions: "savings" once Clarke-Wright merging is done,
+    "consolidation" at most every PROGRESS_INTERVAL_SECONDS while trucks are
+    being force-merged, and "final". Intermediate routes are nearest-neighbor
+    only. Every report covers all of that source's containers.
+
+    With a deadline, returns the best plan found once it passes instead of
+    finishing (see module docstring); deadline.hit tells whether it did.
+
+    A timer, if given, accumulates "savings.merge", "savings.consolidate" and
+    "savings.route" time (progress reporting is included in the phase it
+    interrupts) and counts merge evaluations, merges, route solves and
+    2-opt / Or-opt passes.
     """
-    by_source: dict[str, list[Container]] = defaultdict(list)
-    for c in containers:
-        by_source[c.source_id].append(c)
+    return _solve_by_source(
+        _savings_source, containers, source_node_ids, destination_node_ids,
+        truck_size, distance_matrix, duration_matrix, pool, on_progress, deadline, timer,
+    )
 
-    results: list[RoutedTruck] = []
 
-    for src_id, src_containers in by_source.items():
-        src_node = source_node_ids[src_id]
-
-        # Group containers by destination — each dest starts as its own "route"
-        by_dest: dict[str, list[Container]] = defaultdict(list)
-        for c in src_containers:
-            by_dest[c.destination_id].append(c)
-
-        # One truck per destination to start
-        trucks: dict[str, Truck] = {}
-        for dest_id, dest_containers in by_dest.items():
-            t = Truck(id=str(uuid.uuid4()), source_id=src_id, truck_size=truck_size)
-            for c in dest_containers:
-                if t.can_fit(c):
-                    t.add(c)
-                else:
-                    # Overflow: open another truck for this destination
-                    trucks[t.id] = t
-                    t = Truck(id=str(uuid.uuid4()), source_id=src_id, truck_size=truck_size)
-                    t.add(c)
-            trucks[t.id] = t
-
-        # Compute Clarke-Wright savings for all pairs of destinations.
-        # savings(i, j) = dist(src→i) + dist(src→j) - dist(i→j)
-        # A higher saving means combining i and j onto one route is more valuable.
-        dest_ids = list(by_dest.keys())
-        savings: list[tuple[int, str, str]] = []
-        for di, dj in combinations(dest_ids, 2):
-            ni = destination_node_ids[di]
-            nj = destination_node_ids[dj]
-            s = distance_matrix[src_node][ni] + distance_matrix[src_node][nj] - distance_matrix[ni][nj]
-            savings.append((s, di, dj))
-        savings.sort(reverse=True)
-
-        # Greedily merge truck pairs in savings order if capacity allows.
-        # We track which truck each destination currently belongs to.
-        dest_to_truck: dict[str, str] = {
-            dest_id: t_id
-            for t_id, t in trucks.items()
-            for dest_id in t.destination_ids
-        }
+def solve_plans(
+    containers: list[Container],
+    source_node_ids: dict[str, int],
+    destination_node_ids: dict[str, int],
+    truck_size: TruckSize,
+    time_budget_ms: int | None,
+    distance_matrix: Matrix,
+    duration_matrix: Matrix,
+) -> tuple[list[RoutedTruck], list[RoutedTruck], bool]:
+    """
+    The greedy and savings plans for one whole problem, solved serially in
+    this process. Shaped as a SourcePool task (matrices last), so independent
+    problems — e.g. the scenarios of a sweep — can each run in a worker. The
+    time budget, if any, starts when solving does.
+
+    Returns (greedy, savings, complete); complete is False if the time budget
+    cut the savings run short.
+    """
+    deadline = None if time_budget_ms is None else Deadline.after_ms(time_budget_ms)
+    args = (containers, source_node_ids, destination_node_ids, truck_size, distance_matrix, duration_matrix)
+    greedy = batch_containers(*args)
+    optimized = savings_batch_containers(*args, deadline=deadline)
+    return greedy, optimized, deadline is None or not deadline.hit
 
-        for _, di, dj in savings:
-            ti_id = dest_to_truck.get(di)
-            tj_id = dest_to_truck.get(dj)
-            if ti_id is None or tj_id is None or ti_id == tj_id:
-                continue  # already merged or missing
 
+def _savings_source(
+    src_id: str,
+    src_containers: list[Container],
+    src_node: int,
+    destination_node_ids: dict[str, int],
+    truck_size: TruckSize,
+    distance_matrix: Matrix,
+    duration_matrix: Matrix,
+    progress: Callable[[str, list[RoutedTruck]], None] | None = None,
+    deadline: Deadline | None = None,
+    timer: PhaseTimer | None = None,
+) -> list[RoutedTruck]:
+    """Clarke-Wright savings + consolidation + exact or NN/2-opt/Or-opt routing for one source's containers."""
+    lap = timer.laps() if timer is not None else _skip_lap
+    results: list[RoutedTruck] = []
+
+    def out_of_time() -> bool:
+        return deadline is not None and deadline.expired()
+
+    def report(phase: str) -> None:
+        if progress is not None:
+            progress(phase, _route_snapshot(trucks, src_node, destination_node_ids, distance_matrix, duration_matrix))
+
+    # Group containers by destination — each dest starts as its own "route"
+    by_dest: dict[str, list[Container]] = defaultdict(list)
+    for c in src_containers:
+        by_dest[c.destination_id].append(c)
+
+    # One truck per destination to start
+    trucks: dict[str, Truck] = {}
+    for dest_id, dest_containers in by_dest.items():
+        t = Truck(id=str(uuid.uuid4()), source_id=src_id, truck_size=truck_size)
+        for c in dest_containers:
+            if t.can_fit(c):
+                t.add(c)
+            else:
+                # Overflow: open another truck for this destination
+                trucks[t.id] = t
+                t = Truck(id=str(uuid.uuid4()), source_id=src_id, truck_size=truck_size)
+                t.add(c)
+        trucks[t.id] = t
+
+    # Clarke-Wright savings for all pairs of destinations, consumed best
+    # first. A higher saving means combining i and j onto one route is more
+    # valuable.
+    # Each block's scan is quadratic in destinations, so none starts once out
+    # of time, and a scan in progress stops when the deadline passes.
+    dest_ids = list(by_dest.keys())
+    queue = _SavingsQueue(src_node, dest_ids, destination_node_ids, distance_matrix, deadline=deadline)
+
+    # Greedily merge truck pairs in savings order if capacity allows.
+    # Destinations merged onto one truck share a disjoint set; the set's
+    # representative maps to the truck that currently owns them all.
+    owners = DisjointSet()
+    root_truck: dict[str, str] = {}
+    for t_id, t in trucks.items():
+        for dest_id in t.destination_ids:
+            owners.add(dest_id)
+            root_truck[dest_id] = t_id  # overflow: the last truck for a destination owns it
+
+    while not out_of_time():
+        # Skip pairs that can no longer merge; stop once there are none.
+        queue.prune(*_owner_loads(dest_ids, owners, root_truck, trucks), truck_size)
+        block = queue.next_block()
+        if block is None:
+            break
+        for di, dj in block:
+            if out_of_time():
+                break
+            ri = owners.find(di)
+            rj = owners.find(dj)
+            if ri == rj:
+                continue  # already merged
+
+            ti_id = root_truck[ri]
+            tj_id = root_truck[rj]
             ti = trucks[ti_id]
             tj = trucks[tj_id]
 
-            # Check if all of tj's containers fit into ti cumulatively.
-            # We must simulate adding them in sequence — can_fit checks remaining
-            # capacity, so we can't test each container independently (that would
-            # allow the combined load to exceed capacity).
-            am_after = ti.am_used
-            re_after = ti.re_used
-            can_merge = True
-            for c in tj.containers:
-                if c.temperature == 'AM':
-                    am_after += c.size
-                else:
-                    re_after += c.size
-                if am_after > truck_size.AM or re_after > truck_size.RE:
-                    can_merge = False
-                    break
-            if not can_merge:
+            # All of tj's containers must fit into ti cumulatively — checked
+            # against the combined load, not container by container.
+            if not ti.can_absorb(tj):
                 continue
 
-            # Merge tj into ti
-            for c in tj.containers:
-                ti.add(c)
-            # Update dest→truck mapping for everything that was in tj
-            for dest_id in list(dest_to_truck):
-                if dest_to_truck[dest_id] == tj_id:
-                    dest_to_truck[dest_id] = ti_id
+            # Merge tj into ti; everything tj owned now belongs to ti.
+            ti.absorb(tj)
+            del root_truck[ri], root_truck[rj]
+            root_truck[owners.union(ri, rj)] = ti_id
             del trucks[tj_id]
 
-        # Post-merge consolidation: force-merge truck pairs to reduce truck count,
-        # even when savings is negative (i.e., accepting a small distance penalty).
-        # We repeatedly find the cheapest feasible merge until none remain.
-        changed = True
-        while changed:
-            changed = False
-            truck_list = list(trucks.values())
-            best_merge: tuple[int, str, str] | None = None  # (extra_distance, ti_id, tj_id)
-
-            for ti, tj in combinations(truck_list, 2):
-                am_after = ti.am_used
-                re_after = ti.re_used
-                can_merge = True
-                for c in tj.containers:
-                    if c.temperature == 'AM':
-                        am_after += c.size
-                    else:
-                        re_after += c.size
-                    if am_after > truck_size.AM or re_after > truck_size.RE:
-                        can_merge = False
-                        break
-                if not can_merge:
-                    continue
-
-                # Cost of merging: route ti's stops + tj's stops together vs separately.
-                ti_nodes = [destination_node_ids[d] for d in ti.destination_ids]
-                tj_nodes = [destination_node_ids[d] for d in tj.destination_ids]
-                merged_nodes = ti_nodes + tj_nodes
-                merged_route = two_opt_improve(src_node, nearest_neighbor_route(src_node, merged_nodes, distance_matrix), distance_matrix)
-                merged_dist = total_route_distance(src_node, merged_route, distance_matrix)
-                separate_dist = (
-                    total_route_distance(src_node, nearest_neighbor_route(src_node, ti_nodes, distance_matrix), distance_matrix) +
-                    total_route_distance(src_node, nearest_neighbor_route(src_node, tj_nodes, distance_matrix), distance_matrix)
-                )
-                extra = merged_dist - separate_dist
-
-                if best_merge is None or extra < best_merge[0]:
-                    best_merge = (extra, ti.id, tj.id)
-
-            if best_merge is not None:
-                _, ti_id, tj_id = best_merge
-                ti = trucks[ti_id]
-                tj = trucks[tj_id]
-                for c in tj.containers:
-                    ti.add(c)
-                del trucks[tj_id]
-                changed = True
-
-        # Route each merged truck with NN + 2-opt improvement
-        for truck in trucks.values():
-            dest_nodes = [destination_node_ids[d] for d in truck.destination_ids]
-            nn_route = nearest_neighbor_route(src_node, dest_nodes, distance_matrix)
-            ordered_nodes = two_opt_improve(src_node, nn_route, distance_matrix)
-            results.append(RoutedTruck(
-                truck=truck,
-                ordered_destination_node_ids=ordered_nodes,
-                route_distance_meters=total_route_distance(src_node, ordered_nodes, distance_matrix),
-                route_duration_seconds=total_route_distance(src_node, ordered_nodes, duration_matrix),
-            ))
+    report("savings")
+    lap("savings.merge")
 
+    # Post-merge consolidation: force-merge truck pairs to reduce truck count,
+    # even when savings is negative (i.e., accepting a small distance penalty).
+    on_merge = None
+    if progress is not None:
+        last_report = time.monotonic()
+
+        def on_merge() -> None:
+            nonlocal last_report
+            if time.monotonic() - last_report >= PROGRESS_INTERVAL_SECONDS:
+                report("consolidation")
+                last_report = time.monotonic()
+
+    _consolidate(trucks, src_node, destination_node_ids, distance_matrix, duration_matrix, on_merge, deadline, timer)
+    lap("savings.consolidate")
+
+    # Route each merged truck exactly or with NN + 2-opt + Or-opt (NN only once out of time)
+    for truck in trucks.values():
+        algorithm = "nearest_neighbor" if out_of_time() else "exact"
+        results.append(_route_truck(truck, algorithm, src_node, destination_node_ids, distance_matrix, duration_matrix, timer))
+    lap("savings.route")
+
+    if progress is not None:
+        progress("final", results)
     return results
+
+
+class _SavingsQueue:
+    """
+    Destination pairs in descending Clarke-Wright savings order,
+
+        savings(i, j) = dist(src→i) + dist(src→j) - dist(i→j)
+
+    handed out a block at a time. Savings are never held for every pair:
+    each block rescans the destinations a slice of matrix rows at a time,
+    computing those rows' savings with numpy, and keeps only the best pairs
+    after the ones already handed out. Pairs that can no longer merge (see
+    prune()) are skipped while scanning, so they are never ordered or turned
+    into Python tuples. Memory is bounded by max_block and scan_pairs, not by
+    the number of pairs.
+
+    Ties are broken as sorting (saving, di, dj) tuples in reverse would: by
+    destination ID, descending. That order is total, so each block ends at
+    an exact pair and the next scan resumes strictly after it.
+    """
+
+    def __init__(
+        self,
+        src_node: int,
+        dest_ids: list[str],
+        destination_node_ids: dict[str, int],
+        distance_matrix: Matrix,
+        block_size: int = SAVINGS_BLOCK_SIZE,
+        max_block: int = SAVINGS_MAX_BLOCK,
+        scan_pairs: int = SAVINGS_SCAN_PAIRS,
+        deadline: Deadline | None = None,
+    ) -> None:
+        n = len(dest_ids)
+        self._dest_ids = dest_ids
+        self._nodes = [destination_node_ids[d] for d in dest_ids]
+        self._matrix = distance_matrix
+        self._from_src = submatrix(distance_matrix, [src_node], self._nodes)[0]
+        self._rank = np.empty(n, dtype=np.int64)
+        self._rank[sorted(range(n), key=dest_ids.__getitem__)] = np.arange(n)
+        self._block_size = block_size
+        self._max_block = max(max_block, block_size)
+        self._scan_rows = max(scan_pairs // max(n, 1), 1)
+        self._deadline = deadline
+        self._left = n * (n - 1) // 2  # pairs still to come, as of the last scan
+        self._after: tuple[int, int, int] | None = None  # (saving, rank i, rank j) of the last pair handed out
+        self._mergeable: tuple[np.ndarray, np.ndarray, np.ndarray, TruckSize] | None = None
+
+    def prune(self, owner: np.ndarray, am_used: np.ndarray, re_used: np.ndarray, truck_size: TruckSize) -> None:
+        """
+        From the next block on, skips the pairs that can no longer be merged:
+        both destinations on one truck already, or the two trucks' loads
+        don't fit on one. Arrays are per destination (by position in
+        dest_ids): its truck, as any integer, and that truck's loads. Loads
+        only grow, so skipped pairs could never have merged later either.
+        """
+        self._mergeable = (owner, am_used, re_used, truck_size)
+
+    def next_block(self) -> Iterator[tuple[str, str]] | None:
+        """
+        The next best pairs, in order; None once there are none left, or if
+        the deadline passes while scanning.
+        """
+        # At least block_size pairs, or a quarter of those left if more (so
+        # the number of scans stays logarithmic), but never over max_block.
+        size = min(max(self._block_size, self._left // 4), self._max_block)
+        rank = self._rank
+        savings = np.empty(0, dtype=np.int64)
+        rows = cols = np.empty(0, dtype=np.intp)
+        found = 0
+        for lo in range(0, len(self._dest_ids) - 1, self._scan_rows):
+            if self._deadline is not None and self._deadline.expired():
+                return None
+            s, i, j = self._scan(lo, lo + self._scan_rows)
+            found += len(s)
+            savings, rows, cols = np.concatenate((savings, s)), np.concatenate((rows, i)), np.concatenate((cols, j))
+            if len(savings) > 2 * size:
+                # Keep everything at or above the size-th best saving, ties
+                # included (exactly size pairs if ties would overflow).
+                best = savings >= np.partition(savings, len(savings) - size)[len(savings) - size]
+                if best.sum() > 2 * size:
+                    best = np.lexsort((rank[cols], rank[rows], savings))[::-1][:size]
+                savings, rows, cols = savings[best], rows[best], cols[best]
+        if not found:
+            return None
+
+        order = np.lexsort((rank[cols], rank[rows], savings))[::-1][:size]
+        savings, rows, cols = savings[order], rows[order], cols[order]
+        self._left = found - len(savings)
+        self._after = (int(savings[-1]), int(rank[rows[-1]]), int(rank[cols[-1]]))
+        return self._pairs(rows, cols)
+
+    def _scan(self, lo: int, hi: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(savings, i, j) of the pairs i < j with lo <= i < hi still to come, row by row."""
+        n = len(self._dest_ids)
+        rows = np.arange(lo, min(hi, n - 1))
+        cols = np.arange(lo + 1, n)
+        savings = (
+            self._from_src[rows, None] + self._from_src[None, cols]
+            - submatrix(self._matrix, self._nodes[lo:rows[-1] + 1], self._nodes[lo + 1:])
+        )
+        keep = cols[None, :] > rows[:, None]
+        if self._after is not None:
+            saving, rank_i, rank_j = self._after
+            ri, rj = self._rank[rows][:, None], self._rank[cols][None, :]
+            keep &= (savings < saving) | ((savings == saving) & ((ri < rank_i) | ((ri == rank_i) & (rj < rank_j))))
+        if self._mergeable is not None:
+            owner, am_used, re_used, truck_size = self._mergeable
+            keep &= (
+                (owner[rows][:, None] != owner[cols][None, :])
+                & (am_used[rows][:, None] + am_used[cols][None, :] <= truck_size.AM)
+                & (re_used[rows][:, None] + re_used[cols][None, :] <= truck_size.RE)
+            )
+        a, b = np.nonzero(keep)
+        return savings[a, b], rows[a], cols[b]
+
+    def _pairs(self, rows: np.ndarray, cols: np.ndarray) -> Iterator[tuple[str, str]]:
+        # Converted a slice at a time, so a large block never exists as tuples.
+        dest_ids = self._dest_ids
+        for start in range(0, len(rows), SAVINGS_BLOCK_SIZE):
+            end = start + SAVINGS_BLOCK_SIZE
+            for i, j in zip(rows[start:end].tolist(), cols[start:end].tolist()):
+                yield dest_ids[i], dest_ids[j]
+
+
+def _owner_loads(
+    dest_ids: list[str],
+    owners: DisjointSet,
+    root_truck: dict[str, str],
+    trucks: dict[str, Truck],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per destination (by position in dest_ids): its owning set's index, and its truck's AM and RE load."""
+    index: dict[str, int] = {}
+    owner, am_used, re_used = [], [], []
+    for d in dest_ids:
+        root = owners.find(d)
+        if root not in index:
+            index[root] = len(index)
+        owner.append(index[root])
+        truck = trucks[root_truck[root]]
+        am_used.append(truck.am_used)
+        re_used.append(truck.re_used)
+    return np.array(owner, dtype=np.int32), np.array(am_used, dtype=np.int64), np.array(re_used, dtype=np.int64)
+
+
+def _route_snapshot(
+    trucks: dict[str, Truck],
+    src_node: int,
+    destination_node_ids: dict[str, int],
+    distance_matrix: Matrix,
+    duration_matrix: Matrix,
+) -> list[RoutedTruck]:
+    """
+    Nearest-neighbor routes for the trucks as they stand, on copies of the
+    trucks so later merges don't change what was reported.
+    """
+    return [
+        _route_truck(
+            Truck(id=truck.id, source_id=truck.source_id, truck_size=truck.truck_size, containers=list(truck.containers)),
+            "nearest_neighbor", src_node, destination_node_ids, distance_matrix, duration_matrix,
+        )
+        for truck in trucks.values()
+    ]
@@ -8,11 +8,11 @@ Run with:
     cd backend && .venv/bin/python -m science.benchmark
 """
 
-import json
 import random
 from dataclasses import dataclass
 from pathlib import Path
 
+from science.matrix import Matrix, open_matrix_store
 from science.structs import Container, TruckSize
 from science.batcher import batch_containers, savings_batch_containers, RoutedTruck
 
@@ -20,9 +20,8 @@ DATA_DIR = Path(__file__).parent.parent / "data"
 
 
 def load_matrix():
-    with open(DATA_DIR / "distance_matrix.json") as f:
-        d = json.load(f)
-    return d["distance_matrix"], d["duration_matrix"], d["id_to_name"]
+    store = open_matrix_store(DATA_DIR / "distance_matrix.json")
+    return store.distance, store.duration, store.id_to_name
 
 
 @dataclass
@@ -53,8 +52,8 @@ def run_scenario(
     source_node_ids: dict[str, int],
     destination_node_ids: dict[str, int],
     truck_size: TruckSize,
-    dist: list[list[int]],
-    dur: list[list[int]],
+    dist: Matrix,
+    dur: Matrix,
 ) -> ScenarioResult:
     def total_km(trucks: list[RoutedTruck]) -> float:
         return sum(t.route_distance_meters for t in trucks) / 1000
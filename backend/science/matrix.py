@@ -0,0 +1,147 @@
+"""
+Distance / duration matrix storage.
+
+MatrixStore          — int32 distance + duration matrices memory-mapped from one binary file
+convert_json_matrix  — one-time converter from distance_matrix.json to the binary format
+open_matrix_store    — opens the binary file, converting from JSON first if it is missing or stale
+submatrix            — the rows/columns for a subset of nodes, as a dense array
+
+Every routing function accepts either the nested lists from distance_matrix.json
+or the arrays held by a MatrixStore — both are indexed as matrix[from][to].
+
+Binary layout (little-endian):
+    magic     4 bytes   b"RDMX"
+    version   uint32
+    n         uint32
+    meta_len  uint32
+    meta      meta_len bytes of UTF-8 JSON ({"id_to_name": {...}}), zero-padded to 8 bytes
+    distance  int32[n][n]   meters
+    duration  int32[n][n]   seconds
+"""
+
+import json
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+Matrix = list[list[int]] | np.ndarray
+
+MAGIC = b"RDMX"
+VERSION = 1
+_HEADER = struct.Struct("<4sIII")
+_DTYPE = np.dtype("<i4")
+
+
+@dataclass
+class MatrixStore:
+    path: Path | None  # None: held in memory, not backed by a file
+    distance: np.ndarray
+    duration: np.ndarray
+    id_to_name: dict[str, str]
+
+    @property
+    def n(self) -> int:
+        return self.distance.shape[0]
+
+    @classmethod
+    def open(cls, path: str | Path) -> "MatrixStore":
+        """Memory-maps a binary matrix file. Pages are loaded lazily by the OS."""
+        path = Path(path)
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                raise ValueError(f"{path} is truncated")
+            magic, version, n, meta_len = _HEADER.unpack(header)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a matrix store (bad magic {magic!r})")
+            if version != VERSION:
+                raise ValueError(f"{path} has unsupported matrix store version {version}")
+            meta = json.loads(f.read(meta_len))
+
+        offset = _data_offset(meta_len)
+        cells = n * n * _DTYPE.itemsize
+        if path.stat().st_size < offset + 2 * cells:
+            raise ValueError(f"{path} is truncated")
+        # Plain ndarray views over the mapping: element access on np.memmap
+        # subclasses is noticeably slower in the routers' Python loops.
+        distance = np.memmap(path, dtype=_DTYPE, mode="r", offset=offset, shape=(n, n)).view(np.ndarray)
+        duration = np.memmap(path, dtype=_DTYPE, mode="r", offset=offset + cells, shape=(n, n)).view(np.ndarray)
+        return cls(path=path, distance=distance, duration=duration, id_to_name=meta["id_to_name"])
+
+
+def submatrix(matrix: Matrix, nodes: list[int], columns: list[int] | None = None) -> np.ndarray:
+    """
+    Returns the len(nodes) x len(nodes) matrix restricted to nodes, in the
+    given order: submatrix(m, nodes)[a][b] == m[nodes[a]][nodes[b]]. With
+    columns, the len(nodes) x len(columns) block with rows nodes instead.
+    """
+    if columns is None:
+        columns = nodes
+    if isinstance(matrix, np.ndarray):
+        return matrix[np.ix_(np.asarray(nodes, dtype=np.intp), np.asarray(columns, dtype=np.intp))].astype(np.int64)
+    return np.array([[matrix[a][b] for b in columns] for a in nodes], dtype=np.int64).reshape(len(nodes), len(columns))
+
+
+def _data_offset(meta_len: int) -> int:
+    return (_HEADER.size + meta_len + 7) // 8 * 8
+
+
+def write_matrix_store(
+    path: str | Path,
+    distance_matrix: Matrix,
+    duration_matrix: Matrix,
+    id_to_name: dict[str, str],
+) -> None:
+    """Writes distance + duration matrices to the binary format."""
+    distance = np.asarray(distance_matrix, dtype=np.int64)
+    duration = np.asarray(duration_matrix, dtype=np.int64)
+    n = distance.shape[0]
+    if distance.shape != (n, n) or duration.shape != (n, n):
+        raise ValueError(f"Matrices must be square and equal size, got {distance.shape} and {duration.shape}")
+    for name, m in (("distance", distance), ("duration", duration)):
+        if m.size and (m.min() < np.iinfo(_DTYPE).min or m.max() > np.iinfo(_DTYPE).max):
+            raise ValueError(f"{name} matrix values do not fit in int32")
+
+    meta = json.dumps({"id_to_name": id_to_name}).encode()
+    path = Path(path)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, n, len(meta)))
+        f.write(meta)
+        f.write(b"\0" * (_data_offset(len(meta)) - _HEADER.size - len(meta)))
+        f.write(distance.astype(_DTYPE).tobytes())
+        f.write(duration.astype(_DTYPE).tobytes())
+    tmp.replace(path)  # atomic, so concurrent readers never see a partial file
+
+
+def convert_json_matrix(json_path: str | Path, bin_path: str | Path) -> None:
+    """Converts a distance_matrix.json file to the binary matrix store format."""
+    with open(json_path) as f:
+        d = json.load(f)
+    write_matrix_store(bin_path, d["distance_matrix"], d["duration_matrix"], d["id_to_name"])
+
+
+def open_matrix_store(json_path: str | Path, bin_path: str | Path | None = None) -> MatrixStore:
+    """
+    Opens the binary matrix store next to json_path (same name, .bin suffix),
+    converting from JSON first if the binary file is missing or older than the JSON.
+    """
+    json_path = Path(json_path)
+    bin_path = Path(bin_path) if bin_path is not None else json_path.with_suffix(".bin")
+    if not bin_path.exists() or bin_path.stat().st_mtime < json_path.stat().st_mtime:
+        convert_json_matrix(json_path, bin_path)
+    return MatrixStore.open(bin_path)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) not in (2, 3):
+        sys.exit("usage: python -m science.matrix <distance_matrix.json> [<out.bin>]")
+    src = Path(sys.argv[1])
+    dst = Path(sys.argv[2]) if len(sys.argv) == 3 else src.with_suffix(".bin")
+    convert_json_matrix(src, dst)
+    store = MatrixStore.open(dst)
+    print(f"Saved {store.n}x{store.n} matrix store to {dst} ({dst.stat().st_size} bytes).")
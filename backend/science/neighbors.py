@@ -0,0 +1,102 @@
+"""
+Precomputed nearest-neighbour candidate lists.
+
+The node set is fixed for a deployment, so for every node we can sort the
+others by distance once and reuse that order in every solve:
+
+    out[u]   — the k nodes nearest to u by distance u -> v
+    into[v]  — the k nodes nearest to v by distance u -> v
+
+Rows are sorted nearest first, ties by lower node ID, and never contain the
+node itself. They are held as (n, k) int32 arrays; Python code walks them
+through out_of() / into_of(), which convert (and keep) one row at a time.
+
+neighbor_lists() builds the lists once per matrix and process, like
+science.route_cache; main.py and the SourcePool workers build them at startup.
+Only the MAX_MATRICES most recently registered matrices keep their lists, so
+library callers cycling through matrices don't hold on to every one of them.
+"""
+
+import threading
+
+import numpy as np
+
+from science.matrix import Matrix
+
+NEIGHBOR_LIST_SIZE = 32
+
+# Matrices whose lists are kept; registering another drops the oldest.
+MAX_MATRICES = 4
+
+# Rows sorted per numpy call while building: bounds the temporary int64 arrays.
+_BUILD_CHUNK = 256
+
+
+class NeighborLists:
+    __slots__ = ("k", "out", "into", "_out_rows", "_into_rows")
+
+    def __init__(self, out: np.ndarray, into: np.ndarray) -> None:
+        self.k = out.shape[1]
+        self.out = out
+        self.into = into
+        self._out_rows: list[list[int] | None] = [None] * out.shape[0]
+        self._into_rows: list[list[int] | None] = [None] * into.shape[0]
+
+    @classmethod
+    def build(cls, distance_matrix: Matrix, k: int = NEIGHBOR_LIST_SIZE) -> "NeighborLists":
+        d = np.asarray(distance_matrix)
+        return cls(_nearest(d, k), _nearest(d.T, k))
+
+    def out_of(self, node: int) -> list[int]:
+        row = self._out_rows[node]
+        if row is None:
+            row = self._out_rows[node] = self.out[node].tolist()
+        return row
+
+    def into_of(self, node: int) -> list[int]:
+        row = self._into_rows[node]
+        if row is None:
+            row = self._into_rows[node] = self.into[node].tolist()
+        return row
+
+
+def _nearest(d: np.ndarray, k: int) -> np.ndarray:
+    """For each row u of d, the k columns with the smallest d[u][v], v != u."""
+    n = d.shape[0]
+    k = min(k, n - 1)
+    out = np.empty((n, k), dtype=np.int32)
+    for start in range(0, n, _BUILD_CHUNK):
+        rows = np.arange(start, min(start + _BUILD_CHUNK, n))
+        order = np.argsort(d[rows], axis=1, kind="stable")[:, : k + 1]
+        keep = order != rows[:, None]
+        # Rows whose own node isn't among the first k + 1 drop the last one.
+        keep[keep.all(axis=1), k] = False
+        out[rows] = order[keep].reshape(len(rows), k)
+    return out
+
+
+_lists: dict[int, tuple[Matrix, NeighborLists]] = {}
+_lock = threading.Lock()
+
+
+def neighbor_lists(distance_matrix: Matrix) -> NeighborLists:
+    """
+    The NeighborLists of this matrix, built on first use. Keyed by identity
+    and holding a reference to the matrix, so an id() is never reused while
+    its lists are kept.
+    """
+    entry = _lists.get(id(distance_matrix))
+    if entry is None:
+        with _lock:
+            entry = _lists.get(id(distance_matrix))
+            if entry is None:
+                entry = _lists[id(distance_matrix)] = (distance_matrix, NeighborLists.build(distance_matrix))
+                while len(_lists) > MAX_MATRICES:
+                    del _lists[next(iter(_lists))]
+    return entry[1]
+
+
+def clear_neighbor_lists() -> None:
+    """Drop every matrix's lists (route_cache.clear() does this too)."""
+    with _lock:
+        _lists.clear()
@@ -0,0 +1,126 @@
+"""
+Parallel per-source solving.
+
+Trucks never cross sources, so each source is an independent subproblem that
+can be solved in its own process. SourcePool hands the matrices to each worker
+once, when the worker starts — a MatrixStore is re-opened (memory-mapped, so
+workers share the same physical pages) and nested lists are pickled once per
+worker rather than once per task. Tasks then carry only their source's
+containers and node IDs — or, via submit(), a whole problem when callers have
+several independent ones to solve (see batcher.solve_plans).
+"""
+
+import os
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from science.matrix import Matrix, MatrixStore
+from science.neighbors import neighbor_lists
+
+# Per-worker matrices, set by _init_worker.
+_distance_matrix: Matrix | None = None
+_duration_matrix: Matrix | None = None
+
+
+def _init_worker(store_path: Path | None, distance_matrix: Matrix | None, duration_matrix: Matrix | None) -> None:
+    global _distance_matrix, _duration_matrix
+    if store_path is not None:
+        store = MatrixStore.open(store_path)
+        distance_matrix, duration_matrix = store.distance, store.duration
+    _distance_matrix = distance_matrix
+    _duration_matrix = duration_matrix
+    neighbor_lists(distance_matrix)  # built once per worker, before any task
+
+
+def _run(solve: Callable, args: tuple, kwargs: dict):
+    return solve(*args, _distance_matrix, _duration_matrix, **kwargs)
+
+
+class SourcePool:
+    """
+    A process pool bound to one pair of distance/duration matrices.
+
+    Pass it as `pool=` to batch_containers / savings_batch_containers. Results
+    are returned in task order, so output is deterministic regardless of which
+    worker finishes first.
+    """
+
+    def __init__(
+        self,
+        distance_matrix: Matrix,
+        duration_matrix: Matrix,
+        max_workers: int | None = None,
+        store: MatrixStore | None = None,
+    ) -> None:
+        self.distance_matrix = distance_matrix
+        self.duration_matrix = duration_matrix
+        if store is not None:
+            initargs = (store.path, None, None)
+        else:
+            initargs = (None, distance_matrix, duration_matrix)
+        self._executor = ProcessPoolExecutor(
+            max_workers=max_workers or os.cpu_count(),
+            initializer=_init_worker,
+            initargs=initargs,
+        )
+
+    @classmethod
+    def from_store(cls, store: MatrixStore, max_workers: int | None = None) -> "SourcePool":
+        """
+        Workers memory-map the store's file instead of receiving a copy (a
+        store held in memory is copied to them).
+        """
+        return cls(store.distance, store.duration, max_workers=max_workers, store=store if store.path else None)
+
+    def serves(self, distance_matrix: Matrix, duration_matrix: Matrix) -> bool:
+        """True if the workers hold these matrices."""
+        return distance_matrix is self.distance_matrix and duration_matrix is self.duration_matrix
+
+    def map(
+        self,
+        solve: Callable,
+        tasks: Iterable[tuple],
+        on_result: Callable[[int, object], None] | None = None,
+        kwargs: dict | None = None,
+    ) -> list:
+        """
+        Runs solve(*task, distance_matrix, duration_matrix, **kwargs) for each
+        task in a worker and returns the results in task order. solve must be
+        a module-level function so it can be sent to the workers by reference.
+
+        on_result(task_index, result), if given, is called in this process as
+        each task finishes, in completion order.
+        """
+        tasks = list(tasks)
+        kwargs = kwargs or {}
+        if len(tasks) <= 1:
+            # Not worth a round trip to a worker.
+            results = []
+            for k, args in enumerate(tasks):
+                results.append(solve(*args, self.distance_matrix, self.duration_matrix, **kwargs))
+                if on_result is not None:
+                    on_result(k, results[-1])
+            return results
+
+        futures = {self.submit(solve, args, kwargs): k for k, args in enumerate(tasks)}
+        results: list = [None] * len(tasks)
+        for future in as_completed(futures):
+            k = futures[future]
+            results[k] = future.result()
+            if on_result is not None:
+                on_result(k, results[k])
+        return results
+
+    def submit(self, solve: Callable, args: tuple, kwargs: dict | None = None) -> Future:
+        """Runs solve(*args, distance_matrix, duration_matrix, **kwargs) in a worker."""
+        return self._executor.submit(_run, solve, args, kwargs or {})
+
+    def shutdown(self) -> None:
+        self._executor.shutdown()
+
+    def __enter__(self) -> "SourcePool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
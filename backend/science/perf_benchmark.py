@@ -0,0 +1,293 @@
+"""
+Performance benchmark.
+
+science/benchmark.py measures solution quality; this measures speed.
+
+    phases   — batch_containers / savings_batch_containers on the real matrix
+               (the benchmark.py scenarios), with per-phase timings, plus the
+               route improvers on routes of growing length
+    scaling  — both batchers on synthetic matrices, up to 10k containers and
+               thousands of nodes
+
+Every case runs --repeat times from a cold route cache and reports
+p50 / p90 / p99 / max wall-clock milliseconds (per-phase times are p50s).
+
+Results can be saved as JSON and compared against an earlier run: cases whose
+p50 got slower by more than --tolerance are flagged and the exit status is 1.
+
+Run with:
+    cd backend && .venv/bin/python -m science.perf_benchmark [--quick] [--repeat 5]
+        [--json out.json] [--baseline baseline.json] [--tolerance 0.25]
+"""
+
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+import warnings
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from science.batcher import ALGORITHM_VERSION, batch_containers, savings_batch_containers
+from science.benchmark import load_matrix, make_containers
+from science.matrix import Matrix
+from science.neighbors import neighbor_lists
+from science.route_cache import route_cache
+from science.router import nearest_neighbor_route, or_opt_improve, three_opt_improve, two_opt_improve
+from science.structs import PhaseTimer, TruckSize
+
+
+@dataclass
+class CaseResult:
+    case: str
+    samples_ms: list[float]
+    phases_ms: dict[str, float] = field(default_factory=dict)  # p50 per phase
+
+    @property
+    def p50_ms(self) -> float:
+        return percentile(self.samples_ms, 50)
+
+    @property
+    def p90_ms(self) -> float:
+        return percentile(self.samples_ms, 90)
+
+    @property
+    def p99_ms(self) -> float:
+        return percentile(self.samples_ms, 99)
+
+    @property
+    def max_ms(self) -> float:
+        return max(self.samples_ms)
+
+    def to_json(self) -> dict:
+        return {
+            **asdict(self),
+            "p50_ms": self.p50_ms,
+            "p90_ms": self.p90_ms,
+            "p99_ms": self.p99_ms,
+            "max_ms": self.max_ms,
+        }
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+
+def time_case(
+    case: str, run: Callable[[PhaseTimer], object], repeat: int, matrix: Matrix | None = None,
+) -> CaseResult:
+    """matrix: built into neighbour lists before each sample, as the server does at startup."""
+    samples: list[float] = []
+    phases: dict[str, list[float]] = {}
+    for _ in range(repeat):
+        route_cache.clear()  # every sample pays for its own routing
+        if matrix is not None:
+            neighbor_lists(matrix)
+        timer = PhaseTimer()
+        start = time.perf_counter()
+        run(timer)
+        samples.append((time.perf_counter() - start) * 1000)
+        for name, seconds in timer.phases.items():
+            phases.setdefault(name, []).append(seconds * 1000)
+    result = CaseResult(case, samples, {name: percentile(ms, 50) for name, ms in phases.items()})
+    print(f"  {case:<52} p50 {result.p50_ms:>10.1f} ms   max {result.max_ms:>10.1f} ms")
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Workloads
+# ---------------------------------------------------------------------------
+
+def synthetic_matrices(n_nodes: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Road-like int32 matrices: straight-line meters between random points in a
+    200 km square, inflated by up to 40% per direction (so asymmetric), and
+    durations at 50-90 km/h.
+    """
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(0, 200_000, size=(n_nodes, 2))
+    straight = np.hypot(*(points[:, None, :] - points[None, :, :]).transpose(2, 0, 1))
+    distance = (straight * rng.uniform(1.0, 1.4, size=straight.shape)).astype(np.int32)
+    speed = rng.uniform(50 / 3.6, 90 / 3.6, size=straight.shape)  # m/s
+    duration = (distance / speed).astype(np.int32)
+    np.fill_diagonal(distance, 0)
+    np.fill_diagonal(duration, 0)
+    return distance, duration
+
+
+def batcher_cases(
+    prefix: str,
+    containers,
+    source_node_ids: dict[str, int],
+    destination_node_ids: dict[str, int],
+    truck_size: TruckSize,
+    dist: Matrix,
+    dur: Matrix,
+    repeat: int,
+) -> list[CaseResult]:
+    args = (containers, source_node_ids, destination_node_ids, truck_size, dist, dur)
+    return [
+        time_case(f"{prefix} greedy", lambda timer: batch_containers(*args, timer=timer), repeat, dist),
+        time_case(f"{prefix} savings", lambda timer: savings_batch_containers(*args, timer=timer), repeat, dist),
+    ]
+
+
+def phase_cases(repeat: int, quick: bool) -> list[CaseResult]:
+    print("\nPhases (real matrix)")
+    dist, dur, id_to_name = load_matrix()
+    rng = random.Random(42)
+    scenarios = [
+        # (name, n_src, n_dst, n_containers, am_frac, truck_AM, truck_RE)
+        ("medium: 2src 8dst 40c", 2, 8, 40, 0.6, 10, 6),
+        ("large: 5src 10dst 100c", 5, 10, 100, 0.6, 15, 10),
+        ("loose capacity: 2src 6dst", 2, 6, 40, 0.7, 20, 15),
+    ]
+    results: list[CaseResult] = []
+    for name, n_src, n_dst, n_c, am_frac, truck_am, truck_re in scenarios:
+        src_ids = {f"src-{i}": i for i in range(n_src)}
+        dst_ids = {f"dst-{i}": n_src + i for i in range(n_dst)}
+        containers = make_containers(rng, list(src_ids), list(dst_ids), n_c, am_frac)
+        results += batcher_cases(name, containers, src_ids, dst_ids, TruckSize(truck_am, truck_re), dist, dur, repeat)
+
+    # Route improvers on one long route through synthetic nodes (lists, as the
+    # batchers hand them over), starting from nearest-neighbor.
+    lengths = (8, 16, 32) if quick else (8, 16, 32, 64, 128)
+    synth, _ = synthetic_matrices(max(lengths) + 1, seed=1)
+    synth = synth.tolist()
+    for n in lengths:
+        nn = nearest_neighbor_route(0, list(range(1, n + 1)), synth)
+        results.append(time_case(f"two_opt_improve {n} stops", lambda _: two_opt_improve(0, nn, synth), repeat))
+        results.append(time_case(f"or_opt_improve {n} stops", lambda _: or_opt_improve(0, nn, synth), repeat))
+        if n <= 32:  # O(n^3) per sweep; deprecated, timed as the reference Or-opt replaces
+            results.append(time_case(f"three_opt_improve {n} stops", lambda _: _three_opt(nn, synth), repeat))
+    return results
+
+
+def _three_opt(route: list[int], d: Matrix) -> list[int]:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        return three_opt_improve(0, route, d)
+
+
+def scaling_cases(repeat: int, quick: bool) -> list[CaseResult]:
+    print("\nScaling (synthetic matrices)")
+    sweeps = [
+        # (n_nodes, n_src, n_containers)
+        (100, 2, 100),
+        (500, 5, 1_000),
+        (2_000, 10, 5_000),
+        (3_000, 20, 10_000),
+    ]
+    if quick:
+        sweeps = sweeps[:2]
+    results: list[CaseResult] = []
+    for n_nodes, n_src, n_c in sweeps:
+        dist, dur = synthetic_matrices(n_nodes, seed=n_nodes)
+        rng = random.Random(n_nodes)
+        src_ids = {f"src-{i}": i for i in range(n_src)}
+        dst_ids = {f"dst-{i}": i for i in range(n_src, n_nodes)}
+        containers = make_containers(rng, list(src_ids), list(dst_ids), n_c)
+        results += batcher_cases(
+            f"{n_c}c {n_nodes} nodes {n_src}src", containers, src_ids, dst_ids, TruckSize(20, 12), dist, dur, repeat,
+        )
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+def print_results(results: list[CaseResult]):
+    col = [52, 10, 10, 10, 10]
+    header = ["Case", "p50 ms", "p90 ms", "p99 ms", "max ms"]
+    sep = "  ".join("-" * w for w in col)
+
+    def row(*vals):
+        return "  ".join(str(v).ljust(w) for v, w in zip(vals, col))
+
+    print()
+    print(row(*header))
+    print(sep)
+    for r in results:
+        print(row(r.case, f"{r.p50_ms:.1f}", f"{r.p90_ms:.1f}", f"{r.p99_ms:.1f}", f"{r.max_ms:.1f}"))
+        for name, ms in r.phases_ms.items():
+            print(row(f"    {name}", f"{ms:.1f}", "", "", ""))
+    print(sep)
+    print()
+
+
+def compare(results: list[CaseResult], baseline: dict, tolerance: float) -> list[str]:
+    """Prints p50 changes against a saved run; returns the cases that regressed."""
+    base_cases = {c["case"]: c for c in baseline["cases"]}
+    col = [52, 12, 12, 10]
+    sep = "  ".join("-" * w for w in col)
+
+    def row(*vals):
+        return "  ".join(str(v).ljust(w) for v, w in zip(vals, col))
+
+    print(row("Case", "base p50", "p50", "change"))
+    print(sep)
+    regressed = []
+    for r in results:
+        base = base_cases.get(r.case)
+        if base is None:
+            print(row(r.case, "—", f"{r.p50_ms:.1f}", "new"))
+            continue
+        change = (r.p50_ms - base["p50_ms"]) / base["p50_ms"] if base["p50_ms"] else 0.0
+        flag = ""
+        if change > tolerance:
+            flag = "  SLOWER"
+            regressed.append(r.case)
+        print(row(r.case, f"{base['p50_ms']:.1f}", f"{r.p50_ms:.1f}", f"{change:+.0%}") + flag)
+    print(sep)
+    if baseline.get("algorithm_version") != ALGORITHM_VERSION:
+        print(f"  note: baseline is from algorithm version {baseline.get('algorithm_version')}, now {ALGORITHM_VERSION}")
+    print()
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per case (default 5)")
+    parser.add_argument("--quick", action="store_true", help="skip the largest cases")
+    parser.add_argument("--only", choices=["phases", "scaling"], help="run one part only")
+    parser.add_argument("--json", type=Path, help="write results to this file")
+    parser.add_argument("--baseline", type=Path, help="compare against results saved with --json")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown (default 0.25 = 25%%)")
+    args = parser.parse_args()
+
+    results: list[CaseResult] = []
+    if args.only != "scaling":
+        results += phase_cases(args.repeat, args.quick)
+    if args.only != "phases":
+        results += scaling_cases(args.repeat, args.quick)
+    print_results(results)
+
+    if args.json:
+        args.json.write_text(json.dumps({
+            "algorithm_version": ALGORITHM_VERSION,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "repeat": args.repeat,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "cases": [r.to_json() for r in results],
+        }, indent=2))
+        print(f"Wrote {args.json}")
+
+    if args.baseline:
+        regressed = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        if regressed:
+            print(f"{len(regressed)} case(s) slower than baseline by more than {args.tolerance:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Process-wide cache of routed stop sets.
+
+The node set is fixed, so the same (source, stops) combinations come up again
+and again — across consolidation candidates, final routing, progress
+snapshots and separate requests. RouteCache maps
+
+    (matrices, source node, frozenset of destination nodes, algorithm)
+
+to the ordered route with its distance and duration, so each combination is
+routed once per process. Bounded, least recently used entries are evicted
+first (see science.lru). Entries are kept for at most MAX_MATRICES matrices:
+routing with another drops the oldest matrix and its entries. Worker
+processes (see parallel.py) each hold their own cache.
+
+Algorithms:
+    "nearest_neighbor" — nearest-neighbor from the source. Stops are visited
+                         in ascending node order when breaking distance ties,
+                         so the result depends only on the set.
+    "exact"            — held_karp_route (exact up to HELD_KARP_MAX_STOPS,
+                         NN + 2-opt + Or-opt above).
+
+Both use the matrix's precomputed candidate lists (science.neighbors).
+"""
+
+from dataclasses import dataclass
+from typing import Literal
+
+from science.lru import LRUCache
+from science.matrix import Matrix
+from science.neighbors import clear_neighbor_lists, neighbor_lists
+from science.router import held_karp_route, nearest_neighbor_route, total_route_distance
+from science.structs import PhaseTimer
+
+RouteAlgorithm = Literal["nearest_neighbor", "exact"]
+
+ROUTE_CACHE_SIZE = 100_000
+
+# Distance and duration matrices count separately, so this is 4 pairs.
+MAX_MATRICES = 8
+
+
+@dataclass(frozen=True, slots=True)
+class CachedRoute:
+    order: tuple[int, ...]
+    distance: int
+    duration: int
+
+
+class RouteCache(LRUCache):
+    """
+    Thread-safe LRU of CachedRoute (entries never expire). Matrices are
+    keyed by identity and kept alive here, so an id() can never be recycled
+    for a different matrix while its entries exist; forgetting a matrix
+    drops its entries with it.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        super().__init__(maxsize)
+        self._matrices: dict[int, Matrix] = {}
+
+    def route(
+        self,
+        algorithm: RouteAlgorithm,
+        source_node_id: int,
+        destination_node_ids: list[int],
+        distance_matrix: Matrix,
+        duration_matrix: Matrix,
+        timer: PhaseTimer | None = None,
+    ) -> CachedRoute:
+        """
+        The cached route for these stops, routing them on a miss. A timer, if
+        given, counts "route_cache_hits", "route_solves" (misses) and the
+        misses' "two_opt_passes".
+        """
+        stops = frozenset(destination_node_ids)
+        key = (id(distance_matrix), id(duration_matrix), source_node_id, stops, algorithm)
+        cached = self.get(key)
+        if cached is not None:
+            if timer is not None:
+                timer.count("route_cache_hits")
+            return cached
+        if timer is not None:
+            timer.count("route_solves")
+
+        # Route outside the lock: a duplicate solve on a race is harmless.
+        ordered = sorted(stops)
+        candidates = neighbor_lists(distance_matrix)
+        if algorithm == "nearest_neighbor":
+            ordered = nearest_neighbor_route(source_node_id, ordered, distance_matrix, candidates)
+        elif algorithm == "exact":
+            ordered = held_karp_route(source_node_id, ordered, distance_matrix, candidates=candidates, timer=timer)
+        else:
+            raise ValueError(f"Unknown routing algorithm: {algorithm!r}")
+        routed = CachedRoute(
+            order=tuple(ordered),
+            distance=total_route_distance(source_node_id, ordered, distance_matrix),
+            duration=total_route_distance(source_node_id, ordered, duration_matrix),
+        )
+
+        if self.maxsize > 0:
+            with self._lock:
+                self._remember(distance_matrix)
+                self._remember(duration_matrix)
+                self._store(key, routed)
+        return routed
+
+    def _remember(self, matrix: Matrix) -> None:
+        """Keep matrix alive, forgetting the oldest one past MAX_MATRICES. Lock held."""
+        if id(matrix) in self._matrices:
+            return
+        self._matrices[id(matrix)] = matrix
+        while len(self._matrices) > MAX_MATRICES:
+            dropped = next(iter(self._matrices))
+            del self._matrices[dropped]
+            for key in [key for key in self._entries if dropped in (key[0], key[1])]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        """Drop every entry and matrix, and the matrices' neighbour lists."""
+        super().clear()
+        with self._lock:
+            self._matrices.clear()
+        clear_neighbor_lists()
+
+
+route_cache = RouteCache(ROUTE_CACHE_SIZE)
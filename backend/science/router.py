@@ -3,21 +3,47 @@ Routing algorithms.
 
 nearest_neighbor_route  — greedy heuristic (baseline)
 two_opt_improve         — local-search improvement over any initial route
-three_opt_improve       — stronger local-search improvement (subsumes 2-opt)
+three_opt_improve       — exhaustive O(n^3) 3-opt; deprecated, unused by the solvers
+or_opt_improve          — neighbour-list 2-opt + Or-opt, fast enough for every route;
+                          the batchers' stand-in for 3-opt
+held_karp_route         — exact shortest route for short stop lists (heuristic fallback above)
+
+Every function accepts either nested lists or a MatrixStore array as the matrix.
+The 2-opt and Or-opt searches take an optional PhaseTimer and count their
+sweeps over the route as "two_opt_passes".
 """
 
+import warnings
+from collections import deque
+from functools import lru_cache
+from typing import Literal
+
+import numpy as np
+
+from science.matrix import Matrix, submatrix
+from science.neighbors import NeighborLists
+from science.structs import PhaseTimer
+
 
 def nearest_neighbor_route(
     source_node_id: int,
     destination_node_ids: list[int],
-    distance_matrix: list[list[int]],
+    distance_matrix: Matrix,
+    candidates: NeighborLists | None = None,
 ) -> list[int]:
     """
     Returns an ordered list of destination node IDs representing the visit order.
     Does not include the source in the returned list.
+
+    With candidates (NeighborLists of distance_matrix), each step takes the
+    first unvisited stop on the current node's out-list and only scans all
+    unvisited stops when none is on it. Distance ties then go to the lower
+    node ID, which is what the plain scan does for sorted input.
     """
     if not destination_node_ids:
         return []
+    if candidates is not None and len(set(destination_node_ids)) == len(destination_node_ids):
+        return _nearest_neighbor_indexed(source_node_id, destination_node_ids, distance_matrix, candidates)
 
     unvisited = list(destination_node_ids)
     route = []
@@ -32,25 +58,54 @@ def nearest_neighbor_route(
     return route
 
 
+def _nearest_neighbor_indexed(
+    source_node_id: int,
+    destination_node_ids: list[int],
+    distance_matrix: Matrix,
+    candidates: NeighborLists,
+) -> list[int]:
+    remaining = sorted(destination_node_ids)  # scanned in node order, so ties go to the lower ID
+    unvisited = set(remaining)
+    route = []
+    current = source_node_id
+
+    while unvisited:
+        for node in candidates.out_of(current):
+            if node in unvisited:
+                nearest = node
+                break
+        else:
+            nearest = min(remaining, key=distance_matrix[current].__getitem__)
+        route.append(nearest)
+        unvisited.remove(nearest)
+        remaining.remove(nearest)
+        current = nearest
+
+    return route
+
+
 def total_route_distance(
     source_node_id: int,
     ordered_destination_node_ids: list[int],
-    distance_matrix: list[list[int]],
+    distance_matrix: Matrix,
 ) -> int:
     """Returns total driving distance in meters for a source -> [destinations] route."""
     if not ordered_destination_node_ids:
         return 0
 
     stops = [source_node_id] + ordered_destination_node_ids
+    # int() so numpy scalars from an int32 matrix never leak out (or overflow)
     return sum(
-        distance_matrix[stops[i]][stops[i + 1]] for i in range(len(stops) - 1)
+        int(distance_matrix[stops[i]][stops[i + 1]]) for i in range(len(stops) - 1)
     )
 
 
 def two_opt_improve(
     source_node_id: int,
     route: list[int],
-    distance_matrix: list[list[int]],
+    distance_matrix: Matrix,
+    strategy: Literal["first", "best", "vectorized"] = "first",
+    timer: PhaseTimer | None = None,
 ) -> list[int]:
     """
     Improves a route using 2-opt local search.
@@ -58,36 +113,177 @@ def two_opt_improve(
     Repeatedly reverses sub-segments of the route when doing so reduces total
     distance. Continues until no improving swap exists (local optimum).
 
+    Each candidate reversal is scored from the edges it changes only. The
+    matrix is asymmetric, so the reversed segment is re-priced in the opposite
+    direction (tracked incrementally as the segment grows). Moves are applied
+    by reversing in place — no per-candidate allocation.
+
+    strategy:
+        "first" — apply the first improving move found, with don't-look bits
+                  so positions that yielded nothing are skipped until a
+                  move changes an edge they could reach (default, fastest).
+        "best"  — scan every move per pass and apply the best one.
+        "vectorized" — score every move per pass in one NumPy array pass and
+                  apply the best one. Same moves as "best"; pays off on long
+                  routes where the Python double loop dominates.
+
     Works on top of any initial route (e.g. nearest-neighbor output).
-    Returns a new list — does not mutate the input.
+    Returns a new list — does not mutate the input. A timer, if given, counts
+    "two_opt_passes": sweeps over the route, the last one finding nothing.
     """
-    if len(route) < 3:
+    if len(route) < 2:
         return list(route)
 
-    best = list(route)
-    best_dist = total_route_distance(source_node_id, best, distance_matrix)
-    improved = True
+    nodes = [source_node_id] + list(route)
+    stops = list(range(len(nodes)))  # local positions; index 0 is source, never moved
+    if strategy == "vectorized":
+        passes = _two_opt_vectorized(stops, submatrix(distance_matrix, nodes))
+    else:
+        # Search over local positions with a nested-list copy of just these stops:
+        # element access on lists is several times cheaper than on numpy arrays.
+        d = submatrix(distance_matrix, nodes).tolist()
+        if strategy == "first":
+            passes = _two_opt_first(stops, d)
+        elif strategy == "best":
+            passes = _two_opt_best(stops, d)
+        else:
+            raise ValueError(f"Unknown 2-opt strategy: {strategy!r}")
+    if timer is not None:
+        timer.count("two_opt_passes", passes)
+    return [nodes[k] for k in stops[1:]]
+
 
+def _two_opt_scan(stops: list[int], i: int, d: Matrix, first: bool) -> tuple[int, int]:
+    """
+    Scores every reversal of stops[i+1..j] for j > i+1 and returns (delta, j)
+    for the first improving move (first=True) or the best one. delta >= 0
+    means no improving move starts after position i.
+    """
+    n = len(stops)
+    a = i + 1
+    s_i = stops[i]
+    s_a = stops[a]
+    removed_head = d[s_i][s_a]
+    fwd = 0  # cost of stops[a..j] in route order
+    rev = 0  # cost of stops[a..j] traversed backwards
+    best_delta, best_j = 0, -1
+
+    for j in range(a + 1, n):
+        s_prev = stops[j - 1]
+        s_j = stops[j]
+        fwd += d[s_prev][s_j]
+        rev += d[s_j][s_prev]
+        delta = d[s_i][s_j] - removed_head + rev - fwd
+        if j + 1 < n:  # the route is open — reversing the tail adds no closing edge
+            s_next = stops[j + 1]
+            delta += d[s_a][s_next] - d[s_j][s_next]
+        if delta < best_delta:
+            best_delta, best_j = delta, j
+            if first:
+                break
+
+    return best_delta, best_j
+
+
+def _reverse(stops: list[int], a: int, b: int) -> None:
+    """Reverses stops[a..b] (inclusive) in place."""
+    while a < b:
+        stops[a], stops[b] = stops[b], stops[a]
+        a += 1
+        b -= 1
+
+
+def _two_opt_first(stops: list[int], d: Matrix) -> int:
+    n = len(stops)
+    dont_look = [False] * n
+    passes = 0
+    improved = True
     while improved:
+        passes += 1
         improved = False
-        for i in range(len(best) - 1):
-            for j in range(i + 2, len(best)):
-                # Reverse the segment between i+1 and j (inclusive)
-                candidate = best[: i + 1] + best[i + 1 : j + 1][::-1] + best[j + 1 :]
-                dist = total_route_distance(source_node_id, candidate, distance_matrix)
-                if dist < best_dist:
-                    best = candidate
-                    best_dist = dist
-                    improved = True
+        for i in range(n - 2):
+            if dont_look[i]:
+                continue
+            delta, j = _two_opt_scan(stops, i, d, first=True)
+            if delta >= 0:
+                dont_look[i] = True
+                continue
+            _reverse(stops, i + 1, j)
+            # Every edge from i to j+1 changed (reversed edges re-price on an
+            # asymmetric matrix). A move starting at any position up to j+1
+            # can span some of them, so all of those are worth another look;
+            # moves starting after j+1 see the same edges as before.
+            for k in range(min(j + 2, n)):
+                dont_look[k] = False
+            improved = True
+    return passes
+
+
+def _two_opt_best(stops: list[int], d: Matrix) -> int:
+    n = len(stops)
+    passes = 0
+    while True:
+        passes += 1
+        best_delta, best_i, best_j = 0, -1, -1
+        for i in range(n - 2):
+            delta, j = _two_opt_scan(stops, i, d, first=False)
+            if delta < best_delta:
+                best_delta, best_i, best_j = delta, i, j
+        if best_delta >= 0:
+            return passes
+        _reverse(stops, best_i + 1, best_j)
+
+def _two_opt_deltas(p: np.ndarray) -> np.ndarray:
+    """
+    Given p, the matrix permuted into route order (p[x][y] = cost from the
+    x-th stop to the y-th), returns delta[i][j] — the change in route length
+    from reversing stops[i+1..j]. Invalid moves (j < i+2) are 0.
+
+    Forward and backward prefix sums over consecutive legs price the reversed
+    segment's interior exactly on an asymmetric matrix.
+    """
+    n = p.shape[0]
+    pos = np.arange(n)
+    succ = np.minimum(pos + 1, n - 1)       # a = i+1 for row i; j+1 for column j
+    leg = np.append(p[pos[:-1], pos[1:]], 0)  # leg[k] = p[k][k+1], 0 past the end
+    fwd = np.zeros(n, dtype=np.int64)
+    back = np.zeros(n, dtype=np.int64)
+    np.cumsum(leg[:-1], out=fwd[1:])                  # fwd[k]  = stops 0..k in order
+    np.cumsum(p[pos[1:], pos[:-1]], out=back[1:])     # back[k] = stops 0..k backwards
+
+    head = p - leg[:, None]                                   # p[i][j] - p[i][a]
+    interior = (back[None, :] - back[succ][:, None]) - (fwd[None, :] - fwd[succ][:, None])
+    tail = p[np.ix_(succ, succ)] - leg[None, :]               # p[a][j+1] - p[j][j+1]
+    tail[:, n - 1] = 0                      # the route is open — no edge after the last stop
+
+    delta = head + interior + tail
+    delta[np.tril_indices(n, 1)] = 0        # keep only j >= i + 2
+    return delta
 
-    return best
 
-# Note: 3-opt is more powerful but can take a long time to run on complex routes so it is not 
-# used by default.
+def _two_opt_vectorized(stops: list[int], d: np.ndarray) -> int:
+    n = len(stops)
+    if n < 3:
+        return 0
+    passes = 0
+    while True:
+        passes += 1
+        order = np.asarray(stops)
+        delta = _two_opt_deltas(d[np.ix_(order, order)])
+        flat = int(np.argmin(delta))
+        if delta.flat[flat] >= 0:
+            return passes
+        i, j = divmod(flat, n)
+        _reverse(stops, i + 1, j)
+
+
+# Note: 3-opt is more powerful but can take a long time to run on complex routes so it is not
+# used by default. or_opt_improve gets most of its benefit at a fraction of the cost, and is what
+# the solvers use instead; this exhaustive version is kept only for existing callers.
 def three_opt_improve(
     source_node_id: int,
     route: list[int],
-    distance_matrix: list[list[int]],
+    distance_matrix: Matrix,
 ) -> list[int]:
     """
     Improves a route using 3-opt local search.
@@ -98,9 +294,18 @@ def three_opt_improve(
     the 2-opt ones for completeness.
 
     Distances are computed via segment-cost deltas to avoid redundant matrix
-    lookups. Continues until no improving move exists (local optimum).
+    lookups. Those deltas assume a closed, symmetric tour, so a candidate is
+    only applied once the actual open route is confirmed shorter — otherwise
+    an asymmetric matrix can make the search cycle forever. Continues until
+    no improving move exists (local optimum).
     Returns a new list — does not mutate the input.
+
+    Deprecated: every sweep scans all O(n^3) triples. Use or_opt_improve,
+    which searches the same segment moves from neighbour lists.
     """
+    warnings.warn(
+        "three_opt_improve is deprecated; use or_opt_improve", DeprecationWarning, stacklevel=2,
+    )
     if len(route) < 4:
         return two_opt_improve(source_node_id, route, distance_matrix)
 
@@ -111,6 +316,11 @@ def three_opt_improve(
     def seg_d(a: int, b: int) -> int:
         return d[stops[a]][stops[b]]
 
+    def length(route: list[int]) -> int:
+        return sum(d[route[p]][route[p + 1]] for p in range(n - 1))
+
+    current = length(stops)
+
     improved = True
     while improved:
         improved = False
@@ -166,7 +376,301 @@ def three_opt_improve(
                     else:  # d6
                         new_stops = A + C[::-1] + B[::-1] + D
 
+                    new_length = length(new_stops)
+                    if new_length >= current:
+                        continue
                     stops = new_stops
+                    current = new_length
                     improved = True
 
     return stops[1:]  # strip the source back off
+
+
+def or_opt_improve(
+    source_node_id: int,
+    route: list[int],
+    distance_matrix: Matrix,
+    neighbors: int = 8,
+    max_segment: int = 3,
+    candidates: NeighborLists | None = None,
+    timer: PhaseTimer | None = None,
+) -> list[int]:
+    """
+    Improves a route using 2-opt and Or-opt moves restricted to neighbour lists.
+
+    Or-opt relocates a segment of up to max_segment consecutive stops
+    (optionally reversed) to another position in the route — the 3-opt
+    reconnections that matter most in practice. Together with 2-opt this
+    reaches close to 3-opt quality while only ever trying moves that create
+    an edge to one of a stop's `neighbors` nearest stops, and only while that
+    edge is shorter than the one it would replace.
+
+    Search is first-improvement with don't-look bits: stops whose moves
+    yielded nothing are skipped until a move changes one of their edges.
+    Deltas are exact on the open, asymmetric route (reversed segments are
+    re-priced from running sums), so the result is never longer than the
+    input. Returns a new list — does not mutate the input.
+
+    With candidates (NeighborLists of distance_matrix), a stop's neighbours
+    are read off its precomputed lists where those hold enough of the route's
+    stops, and only the remaining stops are sorted here. A timer, if given,
+    counts "two_opt_passes": the first sweep looks at every stop, each later
+    one at the stops the previous sweep's moves touched.
+    """
+    if len(route) < 2:
+        return list(route)
+
+    nodes = [source_node_id] + list(route)
+    n = len(nodes)
+    sub = submatrix(distance_matrix, nodes)
+    k = min(neighbors, n - 1)
+    # Nearest stops by outgoing and by incoming distance, in local positions.
+    # Nothing can be moved in front of the source, so it is never an out-neighbour.
+    out_nb: list[list[int] | None] = [None] * n
+    in_nb: list[list[int] | None] = [None] * n
+    pos = {node: p for p, node in enumerate(nodes)}
+    if candidates is not None and len(pos) == n:
+        for u, node in enumerate(nodes):
+            out_nb[u] = _local_neighbors(candidates.out_of(node), pos, k, exclude_source=True)
+            in_nb[u] = _local_neighbors(candidates.into_of(node), pos, k, exclude_source=False)
+    if None in out_nb:
+        out_order = np.argsort(sub, axis=1, kind="stable").tolist()
+        for u, nb in enumerate(out_nb):
+            if nb is None:
+                out_nb[u] = [v for v in out_order[u] if v != u and v != 0][:k]
+    if None in in_nb:
+        in_order = np.argsort(sub.T, axis=1, kind="stable").tolist()
+        for u, nb in enumerate(in_nb):
+            if nb is None:
+                in_nb[u] = [v for v in in_order[u] if v != u][:k]
+
+    stops = list(range(n))  # local positions; index 0 is source, never moved
+    passes = _or_opt(stops, sub.tolist(), out_nb, in_nb, max_segment)
+    if timer is not None:
+        timer.count("two_opt_passes", passes)
+    return [nodes[u] for u in stops[1:]]
+
+
+def _local_neighbors(row: list[int], pos: dict[int, int], k: int, exclude_source: bool) -> list[int] | None:
+    """The first k route stops on a precomputed list, as local positions; None if it holds fewer."""
+    found = []
+    for node in row:
+        p = pos.get(node)
+        if p is not None and (p != 0 or not exclude_source):
+            found.append(p)
+            if len(found) == k:
+                return found
+    return None
+
+
+def _or_opt(
+    stops: list[int],
+    d: Matrix,
+    out_nb: list[list[int]],
+    in_nb: list[list[int]],
+    max_segment: int,
+) -> int:
+    n = len(stops)
+    pos = [0] * n
+    fwd = [0] * n   # fwd[p]  = cost of stops[0..p] in route order
+    back = [0] * n  # back[p] = cost of stops[0..p] traversed backwards
+
+    def reindex() -> None:
+        for p, u in enumerate(stops):
+            pos[u] = p
+        for p in range(1, n):
+            fwd[p] = fwd[p - 1] + d[stops[p - 1]][stops[p]]
+            back[p] = back[p - 1] + d[stops[p]][stops[p - 1]]
+
+    def edge(p: int) -> int:
+        """Cost of the edge leaving position p (0 past the end of the open route)."""
+        return d[stops[p]][stops[p + 1]] if p + 1 < n else 0
+
+    def two_opt_delta(i: int, j: int) -> int:
+        """Change from reversing stops[i+1..j]."""
+        a = i + 1
+        delta = d[stops[i]][stops[j]] - d[stops[i]][stops[a]] + (back[j] - back[a]) - (fwd[j] - fwd[a])
+        if j + 1 < n:
+            delta += d[stops[a]][stops[j + 1]] - d[stops[j]][stops[j + 1]]
+        return delta
+
+    def try_two_opt(u: int) -> list[int] | None:
+        p = pos[u]
+        # New edge u -> v, replacing u -> succ(u): reverse stops[p+1..pos[v]].
+        limit = edge(p)
+        for v in out_nb[u]:
+            if d[u][v] >= limit:
+                break
+            j = pos[v]
+            if j > p + 1 and two_opt_delta(p, j) < 0:
+                return [p, j]
+        # New edge v -> u, replacing pred(u) -> u: reverse stops[pos[v]+1..p].
+        if p > 0:
+            limit = d[stops[p - 1]][u]
+            for v in in_nb[u]:
+                if d[v][u] >= limit:
+                    break
+                i = pos[v]
+                if i < p - 1 and two_opt_delta(i, p) < 0:
+                    return [i, p]
+        return None
+
+    def try_or_opt(u: int) -> tuple[int, int, int, bool] | None:
+        p = pos[u]
+        if p == 0:
+            return None
+        for q in range(p, min(p + max_segment, n)):
+            first, last = stops[p], stops[q]
+            prev = stops[p - 1]
+            removed = d[prev][first] + edge(q)
+            if q + 1 < n:
+                removed -= d[prev][stops[q + 1]]
+            inner_fwd = fwd[q] - fwd[p]
+            inner_back = back[q] - back[p]
+            # (insert after x, reversed?) candidates: x -> first or x -> last
+            # is a short new edge, or last -> y / first -> y is.
+            candidates = [(x, False) for x in in_nb[first] if d[x][first] < removed]
+            candidates += [(x, True) for x in in_nb[last] if d[x][last] < removed]
+            for y, rev in ((y, False) for y in out_nb[last] if d[last][y] < removed):
+                candidates.append((stops[pos[y] - 1], rev))
+            for y in out_nb[first]:
+                if d[first][y] < removed:
+                    candidates.append((stops[pos[y] - 1], True))
+            for x, rev in candidates:
+                r = pos[x]
+                if p - 1 <= r <= q:
+                    continue  # same place, or inside the segment
+                y_cost = edge(r)
+                head, tail = (last, first) if rev else (first, last)
+                added = d[x][head] - y_cost + (inner_back - inner_fwd if rev else 0)
+                if r + 1 < n:
+                    added += d[tail][stops[r + 1]]
+                if added < removed:
+                    return p, q, r, rev
+        return None
+
+    reindex()
+    active = deque(stops)
+    queued = [True] * n
+    passes = 0
+    sweep_left = 0  # stops still to look at in the current sweep
+    while active:
+        if sweep_left == 0:
+            passes += 1
+            sweep_left = len(active)
+        sweep_left -= 1
+        u = active.popleft()
+        queued[u] = False
+
+        move = try_two_opt(u)
+        if move is not None:
+            i, j = move
+            touched = [stops[i], stops[i + 1], stops[j]] + ([stops[j + 1]] if j + 1 < n else [])
+            _reverse(stops, i + 1, j)
+        else:
+            relocation = try_or_opt(u)
+            if relocation is None:
+                continue  # don't look at u again until one of its edges changes
+            p, q, r, rev = relocation
+            touched = [stops[p - 1], stops[p], stops[q], stops[r]]
+            touched += [stops[t + 1] for t in (q, r) if t + 1 < n]
+            segment = stops[p:q + 1]
+            if rev:
+                segment.reverse()
+            rest = stops[:p] + stops[q + 1:]
+            at = r + 1 if r < p else r - len(segment) + 1
+            stops[:] = rest[:at] + segment + rest[at:]
+
+        reindex()
+        for t in touched + [u]:
+            if not queued[t]:
+                queued[t] = True
+                active.append(t)
+    return passes
+
+
+# Stop counts up to this are routed exactly by held_karp_route: 2^n * n^2
+# work, a few milliseconds at 12 stops, but doubling with every stop after.
+HELD_KARP_MAX_STOPS = 12
+
+# Cost of an impossible DP state: above any route, with room to add a leg.
+_INF = 1 << 60
+
+
+def held_karp_route(
+    source_node_id: int,
+    destination_node_ids: list[int],
+    distance_matrix: Matrix,
+    max_stops: int = HELD_KARP_MAX_STOPS,
+    candidates: NeighborLists | None = None,
+    timer: PhaseTimer | None = None,
+) -> list[int]:
+    """
+    Returns the shortest visit order of the (distinct) destinations, starting
+    at the source and not returning — exact, by Held-Karp dynamic programming.
+
+    Above max_stops the DP gets too expensive, so this falls back to
+    nearest-neighbor + 2-opt + Or-opt. The batchers go through
+    science.route_cache, so each stop set is only solved once per process.
+    candidates (NeighborLists of distance_matrix) speed up the fallback, and
+    a timer, if given, counts its "two_opt_passes".
+    """
+    if len(destination_node_ids) < 2:
+        return list(destination_node_ids)
+    if len(destination_node_ids) > max_stops:
+        route = nearest_neighbor_route(source_node_id, destination_node_ids, distance_matrix, candidates)
+        route = two_opt_improve(source_node_id, route, distance_matrix, timer=timer)
+        return or_opt_improve(source_node_id, route, distance_matrix, candidates=candidates, timer=timer)
+
+    nodes = [source_node_id] + list(destination_node_ids)
+    return [nodes[k] for k in _held_karp(submatrix(distance_matrix, nodes))]
+
+
+@lru_cache(maxsize=None)
+def _held_karp_plan(n: int) -> list[tuple[int, np.ndarray, np.ndarray]]:
+    """
+    For n stops: (j, masks, masks without j) for every subset mask of two or
+    more stops that contains stop j, grouped by subset size so each group only
+    depends on smaller subsets. Built once per n and reused by every solve.
+    """
+    masks = np.arange(1 << n)
+    sizes = np.zeros(1 << n, dtype=np.int64)
+    for b in range(n):
+        sizes += (masks >> b) & 1
+    plan = []
+    for size in range(2, n + 1):
+        layer = masks[sizes == size]
+        for j in range(n):
+            with_j = layer[(layer >> j) & 1 == 1]
+            plan.append((j, with_j, with_j ^ (1 << j)))
+    return plan
+
+
+def _held_karp(d: np.ndarray) -> list[int]:
+    """
+    d is the local matrix with the source at index 0. Returns the optimal
+    open-route visit order of stops 1..n as local indices.
+
+    dp[mask][j] is the cheapest route from the source through exactly the
+    stops in mask, ending at stop j (stops are bit j = local index j + 1).
+    Each (subset size, j) step fills dp[masks][j] in one vectorized min over
+    predecessors; stops outside a mask stay at _INF so they never win.
+    """
+    n = d.shape[0] - 1
+    between = d[1:, 1:]
+    dp = np.full((1 << n, n), _INF, dtype=np.int64)
+    dp[1 << np.arange(n), np.arange(n)] = d[0, 1:]
+    for j, masks, prev in _held_karp_plan(n):
+        dp[masks, j] = (dp[prev] + between[:, j]).min(axis=1)
+
+    # Walk back from the cheapest end stop, re-deriving each predecessor.
+    mask = (1 << n) - 1
+    j = int(np.argmin(dp[mask]))
+    order = [j]
+    while mask != 1 << j:
+        mask ^= 1 << j
+        j = int(np.argmin(dp[mask] + between[:, j]))
+        order.append(j)
+    order.reverse()
+    return [j + 1 for j in order]
+
@@ -1,8 +1,11 @@
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from typing import Literal
 
 
-@dataclass
+@dataclass(slots=True)
 class Container:
     container_id: str
     source_id: str
@@ -11,43 +14,202 @@ class Container:
     temperature: Literal["AM", "RE"]
 
 
-@dataclass
+@dataclass(slots=True)
 class TruckSize:
     AM: int
     RE: int
 
 
-@dataclass
+@dataclass(slots=True)
 class Truck:
     id: str
     source_id: str
     truck_size: TruckSize
     containers: list[Container] = field(default_factory=list)
+    # Running load totals and ordered destination set, kept in step with
+    # `containers` so capacity and destination queries are O(1).
+    # Only add containers through add() / absorb().
+    _am_used: int = field(default=0, init=False, repr=False, compare=False)
+    _re_used: int = field(default=0, init=False, repr=False, compare=False)
+    _destinations: dict[str, None] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        for c in self.containers:
+            self._count(c)
+
+    def _count(self, container: Container) -> None:
+        if container.temperature == "AM":
+            self._am_used += container.size
+        else:
+            self._re_used += container.size
+        self._destinations[container.destination_id] = None
 
     @property
     def am_used(self) -> int:
-        return sum(c.size for c in self.containers if c.temperature == "AM")
+        return self._am_used
 
     @property
     def re_used(self) -> int:
-        return sum(c.size for c in self.containers if c.temperature == "RE")
+        return self._re_used
 
     @property
     def am_remaining(self) -> int:
-        return self.truck_size.AM - self.am_used
+        return self.truck_size.AM - self._am_used
 
     @property
     def re_remaining(self) -> int:
-        return self.truck_size.RE - self.re_used
+        return self.truck_size.RE - self._re_used
 
     @property
     def destination_ids(self) -> list[str]:
-        return list(dict.fromkeys(c.destination_id for c in self.containers))
+        """Distinct destinations in the order they were first loaded."""
+        return list(self._destinations)
+
+    @property
+    def num_destinations(self) -> int:
+        return len(self._destinations)
+
+    def has_destination(self, destination_id: str) -> bool:
+        return destination_id in self._destinations
 
     def can_fit(self, container: Container) -> bool:
         if container.temperature == "AM":
             return self.am_remaining >= container.size
         return self.re_remaining >= container.size
 
+    def can_absorb(self, other: "Truck") -> bool:
+        """True if all of other's containers fit alongside this truck's load."""
+        return (
+            self._am_used + other._am_used <= self.truck_size.AM
+            and self._re_used + other._re_used <= self.truck_size.RE
+        )
+
     def add(self, container: Container) -> None:
         self.containers.append(container)
+        self._count(container)
+
+    def absorb(self, other: "Truck") -> None:
+        """Moves all of other's containers onto this truck (other is left unchanged)."""
+        self.containers.extend(other.containers)
+        self._am_used += other._am_used
+        self._re_used += other._re_used
+        self._destinations.update(other._destinations)
+
+
+class DisjointSet:
+    """
+    Union-find over hashable keys, with path compression and union by size,
+    so find/union are near-constant time (amortized inverse Ackermann).
+    """
+
+    __slots__ = ("_parent", "_size")
+
+    def __init__(self) -> None:
+        self._parent: dict = {}
+        self._size: dict = {}
+
+    def __contains__(self, x) -> bool:
+        return x in self._parent
+
+    def add(self, x) -> None:
+        """Adds x as a singleton set (no-op if already present)."""
+        if x not in self._parent:
+            self._parent[x] = x
+            self._size[x] = 1
+
+    def find(self, x):
+        """Returns the representative of x's set."""
+        parent = self._parent
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:  # path compression
+            parent[x], x = root, parent[x]
+        return root
+
+    def union(self, a, b):
+        """Merges the sets of a and b and returns the new representative."""
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return ra
+        if self._size[ra] < self._size[rb]:
+            ra, rb = rb, ra
+        self._parent[rb] = ra
+        self._size[ra] += self._size.pop(rb)
+        return ra
+
+
+@dataclass(slots=True)
+class Deadline:
+    """
+    A time.monotonic() cut-off for anytime algorithms. expired() records a
+    hit, so callers can tell afterwards whether any work was cut short.
+    """
+    at: float
+    hit: bool = False
+
+    @classmethod
+    def after_ms(cls, time_budget_ms: float) -> "Deadline":
+        return cls(at=time.monotonic() + time_budget_ms / 1000)
+
+    @classmethod
+    def never(cls) -> "Deadline":
+        """No time limit, but can still be cancelled."""
+        return cls(at=float("inf"))
+
+    def cancel(self) -> None:
+        """Expires the deadline now, from any thread: work checking it stops early."""
+        self.at = float("-inf")
+
+    def expired(self) -> bool:
+        if time.monotonic() >= self.at:
+            self.hit = True
+        return self.hit
+
+
+class PhaseTimer:
+    """
+    Accumulates wall-clock seconds per named phase, either around a block
+
+        with timer.phase("greedy"):
+            ...
+
+    or as consecutive laps through a function:
+
+        lap = timer.laps()
+        ...                      # work
+        lap("savings.merge")     # adds the time since laps() / the last lap
+
+    Re-entering a phase adds to its total, so per-source work sums up.
+    count() tallies events (merge evaluations, route solves, ...) alongside.
+    """
+    __slots__ = ("phases", "counts")
+
+    def __init__(self) -> None:
+        self.phases: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def add(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def laps(self) -> Callable[[str], None]:
+        last = time.perf_counter()
+
+        def lap(name: str) -> None:
+            nonlocal last
+            now = time.perf_counter()
+            self.add(name, now - last)
+            last = now
+
+        return lap
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
@@ -9,19 +9,30 @@ pass/fail results. No external test framework needed — run with:
 
 import json
 import sys
+import tempfile
+import threading
+import warnings
+from itertools import permutations
 from pathlib import Path
 
-from science.structs import Container, TruckSize
-from science.batcher import batch_containers
-from science.router import nearest_neighbor_route, total_route_distance
+import numpy as np
+
+from science.matrix import Matrix, MatrixStore, convert_json_matrix, open_matrix_store
+from science.neighbors import MAX_MATRICES as MAX_NEIGHBOR_MATRICES, NeighborLists, neighbor_lists
+from science.parallel import SourcePool
+from science.route_cache import MAX_MATRICES as MAX_CACHED_MATRICES, RouteCache, route_cache
+from science.structs import Container, Deadline, DisjointSet, PhaseTimer, Truck, TruckSize
+from science.batcher import _SavingsQueue, batch_containers, savings_batch_containers
+from science.router import (
+    held_karp_route, nearest_neighbor_route, or_opt_improve, three_opt_improve, total_route_distance, two_opt_improve,
+)
 
 DATA_DIR = Path(__file__).parent.parent / "data"
 
 
 def load_matrix():
-    with open(DATA_DIR / "distance_matrix.json") as f:
-        d = json.load(f)
-    return d["distance_matrix"], d["duration_matrix"], d["id_to_name"]
+    store = open_matrix_store(DATA_DIR / "distance_matrix.json")
+    return store.distance, store.duration, store.id_to_name
 
 
 # ---------------------------------------------------------------------------
@@ -46,7 +57,17 @@ def check(label: str, condition: bool, detail: str = ""):
 # Router tests
 # ---------------------------------------------------------------------------
 
-def test_router(dist: list[list[int]]):
+def _improving_reversals(route: list[int], dist: Matrix) -> list[tuple[int, int]]:
+    length = total_route_distance(0, route, dist)
+    return [
+        (i, j)
+        for i in range(len(route))
+        for j in range(i + 1, len(route))
+        if total_route_distance(0, route[:i] + route[i:j + 1][::-1] + route[j + 1:], dist) < length
+    ]
+
+
+def test_router(dist: Matrix):
     print("\n── Router ──────────────────────────────────────")
 
     # Single destination — trivial route
@@ -77,12 +98,244 @@ def test_router(dist: list[list[int]]):
     nn = total_route_distance(0, nearest_neighbor_route(0, [1, 2], dist), dist)
     check("NN route <= worst of two orderings", nn <= max(fwd, rev), f"nn={nn}, max={max(fwd,rev)}")
 
+    # 2-opt never worsens NN and keeps the same stops, for both strategies
+    stops = list(range(1, len(dist)))
+    nn_route = nearest_neighbor_route(0, stops, dist)
+    nn_dist = total_route_distance(0, nn_route, dist)
+    for strategy in ("first", "best", "vectorized"):
+        improved = two_opt_improve(0, nn_route, dist, strategy=strategy)
+        check(f"2-opt ({strategy}) keeps every stop", sorted(improved) == stops)
+        opt_dist = total_route_distance(0, improved, dist)
+        check(f"2-opt ({strategy}) <= NN distance", opt_dist <= nn_dist, f"{opt_dist} > {nn_dist}")
+
+    # Both scalar strategies end at a local optimum: no single reversal helps,
+    # including reversals that start right after the source. Random asymmetric
+    # matrices catch don't-look bits left set on moves a reversal changed.
+    rng = np.random.default_rng(1)
+    cases = [(dist, nn_route)]
+    for size in (15, 20, 25, 30) * 3:
+        d = rng.integers(1, 1000, size=(size, size)).tolist()
+        cases.append((d, rng.permutation(np.arange(1, size)).tolist()))
+    for strategy in ("first", "best"):
+        better = []
+        for d, route in cases:
+            better += _improving_reversals(two_opt_improve(0, route, d, strategy=strategy), d)
+        check(f"2-opt ({strategy}) is a local optimum", not better, f"improving reversals: {better[:3]}")
+    best = two_opt_improve(0, nn_route, dist, strategy="best")
+
+    # 3-opt (deprecated in favour of Or-opt) assumes a closed symmetric tour
+    # in its deltas; on these asymmetric open routes it must still finish and
+    # never lengthen the route.
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        three_opt_improve(0, [1, 2, 3, 4], dist)
+    check("3-opt warns that it is deprecated", any(w.category is DeprecationWarning for w in caught))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        for d, route in cases[:5]:
+            done = []
+            worker = threading.Thread(target=lambda: done.append(three_opt_improve(0, route, d)), daemon=True)
+            worker.start()
+            worker.join(timeout=10)
+            if not done:
+                check("3-opt terminates on an asymmetric matrix", False, f"{len(route)} stops still running after 10 s")
+                break
+            check(
+                f"3-opt ({len(route)} stops) keeps every stop and never lengthens",
+                sorted(done[0]) == sorted(route)
+                and total_route_distance(0, done[0], d) <= total_route_distance(0, route, d),
+            )
+
+    # The vectorized evaluator scores the same moves as the scalar best-improvement scan
+    vec = two_opt_improve(0, nn_route, dist, strategy="vectorized")
+    check("2-opt (vectorized) matches best-improvement", vec == best, f"{vec} != {best}")
+
+    # A timer counts sweeps over the route, the last one finding nothing.
+    for strategy in ("first", "best", "vectorized"):
+        timer = PhaseTimer()
+        two_opt_improve(0, nn_route, dist, strategy=strategy, timer=timer)
+        passes = timer.counts.get("two_opt_passes", 0)
+        timer = PhaseTimer()
+        two_opt_improve(0, best, dist, strategy=strategy, timer=timer)
+        check(
+            f"2-opt ({strategy}) counts its passes",
+            passes >= 2 and timer.counts.get("two_opt_passes") == 1,
+            f"{passes} on NN, {timer.counts.get('two_opt_passes')} on a local optimum",
+        )
+
+    # Asymmetric matrix: the reversed segment must be re-priced backwards.
+    # 0→1→2→3 costs 1+1+1. Reversing everything makes the first leg free
+    # (0→3 costs 0), but every backward leg costs 100, so it is a loss.
+    asym = [
+        [0, 1, 50, 0],
+        [100, 0, 1, 50],
+        [100, 100, 0, 1],
+        [100, 100, 100, 0],
+    ]
+    route = two_opt_improve(0, [1, 2, 3], asym)
+    check("2-opt prices reversed segments on asymmetric matrix", route == [1, 2, 3], f"got {route}")
+
+    # Or-opt on top of 2-opt: same stops, never longer, and reversed
+    # relocations are priced backwards too.
+    two_opt = two_opt_improve(0, nn_route, dist)
+    or_opt = or_opt_improve(0, two_opt, dist)
+    check("Or-opt keeps every stop", sorted(or_opt) == stops)
+    or_dist = total_route_distance(0, or_opt, dist)
+    two_opt_dist = total_route_distance(0, two_opt, dist)
+    check("Or-opt <= 2-opt distance", or_dist <= two_opt_dist, f"{or_dist} > {two_opt_dist}")
+    route = or_opt_improve(0, [1, 2, 3], asym)
+    check("Or-opt prices reversed segments on asymmetric matrix", route == [1, 2, 3], f"got {route}")
+    timer = PhaseTimer()
+    or_opt_improve(0, nn_route, dist, timer=timer)
+    passes = timer.counts.get("two_opt_passes", 0)
+    timer = PhaseTimer()
+    or_opt_improve(0, or_opt, dist, timer=timer)
+    check(
+        "Or-opt counts its passes",
+        passes >= 2 and timer.counts.get("two_opt_passes") == 1,
+        f"{passes} on NN, {timer.counts.get('two_opt_passes')} on its own output",
+    )
+
+    # Held-Karp is exact: it matches brute force over every order, on the
+    # asymmetric matrix too, and its answer doesn't depend on input order.
+    few = stops[:6]
+    exact = held_karp_route(0, few, dist)
+    brute = min(permutations(few), key=lambda order: total_route_distance(0, list(order), dist))
+    check(
+        "Held-Karp matches brute force",
+        total_route_distance(0, exact, dist) == total_route_distance(0, list(brute), dist),
+        f"{exact} vs {list(brute)}",
+    )
+    check("Held-Karp ignores input order", held_karp_route(0, few[::-1], dist) == exact)
+    route = held_karp_route(0, [3, 1, 2], asym)
+    check("Held-Karp on asymmetric matrix", route == [1, 2, 3], f"got {route}")
+    fallback = held_karp_route(0, stops, dist, max_stops=4)
+    check("Held-Karp falls back above max_stops", sorted(fallback) == stops)
+
+
+# ---------------------------------------------------------------------------
+# Neighbor list tests
+# ---------------------------------------------------------------------------
+
+def test_neighbor_lists(dist: Matrix):
+    print("\n── NeighborLists ───────────────────────────────")
+
+    n = len(dist)
+    lists = NeighborLists.build(dist, k=5)
+    check("out lists are (n, k) int32", lists.out.shape == (n, 5) and lists.out.dtype == np.int32)
+    row = lists.out_of(3)
+    expected = sorted((v for v in range(n) if v != 3), key=lambda v: (dist[3][v], v))[:5]
+    check("out list is the k nearest by outgoing distance", row == expected, f"got {row}, expected {expected}")
+    col = lists.into_of(3)
+    expected = sorted((u for u in range(n) if u != 3), key=lambda u: (dist[u][3], u))[:5]
+    check("in list is the k nearest by incoming distance", col == expected, f"got {col}, expected {expected}")
+    check("k is capped at n - 1", NeighborLists.build(dist, k=10 * n).k == n - 1)
+    check("lists are shared per matrix", neighbor_lists(dist) is neighbor_lists(dist))
+    shared = neighbor_lists(dist)
+    others = [[row[:] for row in dist] for _ in range(MAX_NEIGHBOR_MATRICES)]
+    for other in others:
+        neighbor_lists(other)
+    check("oldest matrix's lists are dropped past MAX_MATRICES", neighbor_lists(dist) is not shared)
+    shared = neighbor_lists(dist)
+    route_cache.clear()
+    check("route_cache.clear() drops the lists", neighbor_lists(dist) is not shared)
+
+    stops = list(range(1, n))
+    plain = nearest_neighbor_route(0, stops, dist)
+    check("indexed nearest-neighbor matches the full scan", nearest_neighbor_route(0, stops, dist, lists) == plain)
+    short = NeighborLists.build(dist, k=1)
+    check("falls back to a full scan past the list", nearest_neighbor_route(0, stops, dist, short) == plain)
+    improved = or_opt_improve(0, plain, dist, candidates=lists)
+    check(
+        "or-opt with candidate lists never lengthens the route",
+        sorted(improved) == stops and total_route_distance(0, improved, dist) <= total_route_distance(0, plain, dist),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Truck accounting tests
+# ---------------------------------------------------------------------------
+
+def test_truck():
+    print("\n── Truck ───────────────────────────────────────")
+
+    size = TruckSize(AM=10, RE=6)
+    a = Truck("a", "src-A", size, [Container("c0", "src-A", "dst-X", size=4, temperature="AM")])
+    a.add(Container("c1", "src-A", "dst-Y", size=2, temperature="RE"))
+    a.add(Container("c2", "src-A", "dst-X", size=1, temperature="AM"))
+    check("totals include constructor containers", (a.am_used, a.re_used) == (5, 2), f"{a.am_used}, {a.re_used}")
+    check("remaining tracks totals", (a.am_remaining, a.re_remaining) == (5, 4))
+    check("destinations ordered and distinct", a.destination_ids == ["dst-X", "dst-Y"], f"got {a.destination_ids}")
+    check("has_destination", a.has_destination("dst-Y") and not a.has_destination("dst-Z"))
+
+    b = Truck("b", "src-A", size)
+    b.add(Container("c3", "src-A", "dst-Z", size=5, temperature="AM"))
+    b.add(Container("c4", "src-A", "dst-X", size=5, temperature="RE"))
+    check("combined RE over capacity cannot absorb", not a.can_absorb(b))
+
+    b2 = Truck("b2", "src-A", size, [Container("c5", "src-A", "dst-Z", size=5, temperature="AM")])
+    check("combined load at capacity can absorb", a.can_absorb(b2))
+    a.absorb(b2)
+    check("absorb merges totals", (a.am_used, a.re_used, len(a.containers)) == (10, 2, 4))
+    check("absorb appends new destinations", a.destination_ids == ["dst-X", "dst-Y", "dst-Z"])
+    check("Truck is slotted", not hasattr(a, "__dict__"))
+
+
+def test_route_cache(dist: Matrix, dur: Matrix):
+    print("\n── RouteCache ──────────────────────────────────")
+
+    cache = RouteCache(maxsize=2)
+    first = cache.route("exact", 0, [5, 3, 7], dist, dur)
+    check("route covers the stops", sorted(first.order) == [3, 5, 7], f"got {first.order}")
+    check("distance matches the order", first.distance == total_route_distance(0, list(first.order), dist))
+    check("duration matches the order", first.duration == total_route_distance(0, list(first.order), dur))
+    again = cache.route("exact", 0, [7, 5, 3], dist, dur)
+    check("same stop set in another order hits", again is first and cache.hits == 1)
+    cache.route("nearest_neighbor", 0, [5, 3, 7], dist, dur)
+    check("algorithm is part of the key", cache.misses == 2)
+    cache.route("exact", 0, [1, 2], dist, dur)
+    check("evicts beyond maxsize", cache.stats()["size"] == 2)
+    cache.route("nearest_neighbor", 0, [3, 5, 7], dist, dur)
+    check("recently used entry survives eviction", cache.hits == 2, f"hits={cache.hits}")
+    cache.route("exact", 0, [3, 5, 7], dist, dur)
+    check("least recently used entry was evicted", cache.misses == 4, f"misses={cache.misses}")
+    timer = PhaseTimer()
+    cache.route("exact", 0, list(range(1, 13)), dist, dur, timer)
+    check("Held-Karp routes count no 2-opt passes", "two_opt_passes" not in timer.counts, f"{timer.counts}")
+    cache.route("exact", 0, list(range(1, 14)), dist, dur, timer)
+    check("routes past Held-Karp count their 2-opt passes", timer.counts.get("two_opt_passes", 0) >= 2, f"{timer.counts}")
+
+    cache = RouteCache(maxsize=100)
+    cache.route("exact", 0, [5, 3, 7], dist, dur)
+    for _ in range(MAX_CACHED_MATRICES // 2):
+        cache.route("exact", 0, [5, 3, 7], [row[:] for row in dist], [row[:] for row in dur])
+    check("forgetting a matrix drops its entries", cache.stats()["size"] == MAX_CACHED_MATRICES // 2)
+    cache.route("exact", 0, [5, 3, 7], dist, dur)
+    check("forgotten matrix routes again", cache.misses == 2 + MAX_CACHED_MATRICES // 2, f"misses={cache.misses}")
+
+
+def test_disjoint_set():
+    print("\n── DisjointSet ─────────────────────────────────")
+
+    ds = DisjointSet()
+    for x in "abcdef":
+        ds.add(x)
+    check("singletons are their own root", all(ds.find(x) == x for x in "abcdef"))
+
+    ds.union("a", "b")
+    ds.union("c", "d")
+    root = ds.union("b", "d")
+    check("union joins sets transitively", ds.find("a") == ds.find("c") == root)
+    check("untouched elements stay apart", ds.find("e") != ds.find("a") and ds.find("e") != ds.find("f"))
+    check("union returns existing root when already joined", ds.union("a", "d") == root)
+    check("larger set's root survives", ds.union("e", "a") == root)
+
 
 # ---------------------------------------------------------------------------
 # Batcher tests
 # ---------------------------------------------------------------------------
 
-def test_batcher(dist: list[list[int]], dur: list[list[int]]):
+def test_batcher(dist: Matrix, dur: Matrix):
     print("\n── Batcher ─────────────────────────────────────")
 
     truck_size = TruckSize(AM=10, RE=6)
@@ -134,6 +387,93 @@ def test_batcher(dist: list[list[int]], dur: list[list[int]]):
     )
     check("AM+RE within capacity → 1 truck", len(trucks3) == 1, f"got {len(trucks3)}")
 
+    # Savings pairs come out lazily in the order of a full descending sort
+    dest_ids = [f"dst-{i}" for i in range(len(dist) - 1, 0, -1)]
+    dest_nodes = {d: int(d.split("-")[1]) for d in dest_ids}
+    full = sorted(
+        (
+            (dist[0][dest_nodes[di]] + dist[0][dest_nodes[dj]] - dist[dest_nodes[di]][dest_nodes[dj]], di, dj)
+            for a, di in enumerate(dest_ids) for dj in dest_ids[a + 1:]
+        ),
+        reverse=True,
+    )
+    queue = _SavingsQueue(0, dest_ids, dest_nodes, dist, block_size=7)
+    lazy = []
+    while (block := queue.next_block()) is not None:
+        lazy += block
+    check("savings queue yields every pair in sorted order", lazy == [(di, dj) for _, di, dj in full])
+    queue = _SavingsQueue(0, dest_ids, dest_nodes, dist)
+    n_dest = len(dest_ids)
+    queue.prune(
+        np.zeros(n_dest, dtype=np.int32), np.zeros(n_dest, dtype=np.int64), np.zeros(n_dest, dtype=np.int64), truck_size,
+    )
+    check("pruning drops pairs already on one truck", queue.next_block() is None)
+    cut = _SavingsQueue(0, dest_ids, dest_nodes, dist, deadline=Deadline.after_ms(0))
+    check("expired deadline stops the savings scan", cut.next_block() is None)
+
+    # Scanning a few rows at a time with small blocks: still the full order,
+    # ties included (savings here take a handful of values), and no block
+    # holds more than max_block pairs.
+    rng = np.random.default_rng(3)
+    tied = rng.integers(0, 4, size=(120, 120)).tolist()
+    many = [f"d{v:03d}" for v in rng.permutation(np.arange(1, 120))]
+    many_nodes = {d: int(d[1:]) for d in many}
+    full = sorted(
+        (
+            (tied[0][many_nodes[di]] + tied[0][many_nodes[dj]] - tied[many_nodes[di]][many_nodes[dj]], di, dj)
+            for a, di in enumerate(many) for dj in many[a + 1:]
+        ),
+        reverse=True,
+    )
+    queue = _SavingsQueue(0, many, many_nodes, tied, block_size=50, max_block=300, scan_pairs=500)
+    blocks = []
+    while (block := queue.next_block()) is not None:
+        blocks.append(list(block))
+    check("sliced scans yield every pair in sorted order", [p for b in blocks for p in b] == [(di, dj) for _, di, dj in full])
+    check("blocks stay within max_block", max(map(len, blocks)) <= 300, f"largest {max(map(len, blocks))}")
+
+    # A truck with no AM room left still takes RE containers, at any stop
+    containers_full = [
+        Container("c0", "src-A", "dst-X", size=10, temperature="AM"),
+        Container("c1", "src-A", "dst-Y", size=2, temperature="RE"),
+        Container("c2", "src-A", "dst-Y", size=1, temperature="AM"),
+    ]
+    trucks_full = batch_containers(
+        containers_full,
+        source_node_ids={"src-A": 0},
+        destination_node_ids={"dst-X": 3, "dst-Y": 5},
+        truck_size=truck_size,
+        distance_matrix=dist,
+        duration_matrix=dur,
+    )
+    loads = sorted(sorted(c.container_id for c in rt.truck.containers) for rt in trucks_full)
+    check("AM-full truck still takes RE; AM opens a new truck", loads == [["c0", "c1"], ["c2"]], f"got {loads}")
+
+    # Indexed assignment matches the plain greedy rule: same destination
+    # first, else the fitting truck with the nearest stop, else a new truck
+    n = len(dist)
+    dest_nodes = {f"dst-{i}": i for i in range(1, n)}
+    many = [
+        Container(f"c{i:03d}", "src-A", f"dst-{1 + (i * 7) % (n - 1)}", size=1 + i % 4, temperature="AM" if i % 3 else "RE")
+        for i in range(150)
+    ]
+    expected: list[Truck] = []
+    for c in many:
+        fitting = [t for t in expected if t.can_fit(c)]
+        same = [t for t in fitting if t.has_destination(c.destination_id)]
+        if same:
+            same[0].add(c)
+        elif fitting:
+            min(fitting, key=lambda t: min(dist[dest_nodes[d]][dest_nodes[c.destination_id]] for d in t.destination_ids)).add(c)
+        else:
+            expected.append(Truck(id=str(len(expected)), source_id="src-A", truck_size=truck_size, containers=[c]))
+    got = batch_containers(many, {"src-A": 0}, dest_nodes, truck_size, dist, dur)
+    check(
+        "indexed greedy matches the plain greedy rule",
+        [[c.container_id for c in rt.truck.containers] for rt in got]
+        == [[c.container_id for c in t.containers] for t in expected],
+    )
+
     # Two sources → trucks never mix sources
     containers4 = [
         Container("c0", "src-A", "dst-X", size=1, temperature="AM"),
@@ -167,12 +507,206 @@ def test_batcher(dist: list[list[int]], dur: list[list[int]]):
     check("multi-stop route_distance_meters > 0", trucks5[0].route_distance_meters > 0)
     check("multi-stop route_duration_seconds > 0", trucks5[0].route_duration_seconds > 0)
 
+    # Savings + consolidation: every container assigned, capacity respected,
+    # and no two remaining trucks could still be merged.
+    containers6 = [
+        Container(f"c{k}", "src-A", f"dst-{k % 7}", size=1 + k % 3, temperature="AM" if k % 3 else "RE")
+        for k in range(30)
+    ]
+    trucks6 = savings_batch_containers(
+        containers6,
+        source_node_ids={"src-A": 0},
+        destination_node_ids={f"dst-{k}": k + 2 for k in range(7)},
+        truck_size=truck_size,
+        distance_matrix=dist,
+        duration_matrix=dur,
+    )
+    assigned = sorted(c.container_id for rt in trucks6 for c in rt.truck.containers)
+    check("savings assigns every container once", assigned == sorted(c.container_id for c in containers6))
+    check(
+        "savings respects capacity",
+        all(rt.truck.am_remaining >= 0 and rt.truck.re_remaining >= 0 for rt in trucks6),
+    )
+    mergeable = [
+        (a.truck.id[:8], b.truck.id[:8])
+        for i, a in enumerate(trucks6)
+        for b in trucks6[i + 1:]
+        if a.truck.can_absorb(b.truck)
+    ]
+    check("consolidation leaves no mergeable pair", not mergeable, f"{mergeable[:3]}")
+
+    # Progress reports: every report covers all of the source's containers,
+    # and the last one per source is "final" and matches the returned trucks.
+    reports: list[tuple[str, str, list]] = []
+    trucks7 = savings_batch_containers(
+        containers6,
+        source_node_ids={"src-A": 0},
+        destination_node_ids={f"dst-{k}": k + 2 for k in range(7)},
+        truck_size=truck_size,
+        distance_matrix=dist,
+        duration_matrix=dur,
+        on_progress=lambda src, phase, routed: reports.append((src, phase, routed)),
+    )
+    phases = [phase for _, phase, _ in reports]
+    check("progress reports savings first, final last", phases[0] == "savings" and phases[-1] == "final", f"{phases}")
+    check(
+        "every progress report covers all containers",
+        all(sum(len(rt.truck.containers) for rt in routed) == len(containers6) for _, _, routed in reports),
+    )
+    check("final report is the returned solution", reports[-1][2] == trucks7)
+
+    # Anytime mode: an already-expired deadline still yields a complete,
+    # feasible plan (one truck per destination, NN-routed) and records the hit.
+    deadline = Deadline.after_ms(0)
+    trucks8 = savings_batch_containers(
+        containers6,
+        source_node_ids={"src-A": 0},
+        destination_node_ids={f"dst-{k}": k + 2 for k in range(7)},
+        truck_size=truck_size,
+        distance_matrix=dist,
+        duration_matrix=dur,
+        deadline=deadline,
+    )
+    assigned = sorted(c.container_id for rt in trucks8 for c in rt.truck.containers)
+    check("expired deadline is recorded", deadline.hit)
+    check("expired deadline still assigns every container", assigned == sorted(c.container_id for c in containers6))
+    check(
+        "expired deadline respects capacity",
+        all(rt.truck.am_remaining >= 0 and rt.truck.re_remaining >= 0 for rt in trucks8),
+    )
+    check("expired deadline skips merging", len(trucks8) >= len(trucks6), f"{len(trucks8)} < {len(trucks6)}")
+    generous = Deadline.after_ms(60_000)
+    trucks9 = savings_batch_containers(
+        containers6,
+        source_node_ids={"src-A": 0},
+        destination_node_ids={f"dst-{k}": k + 2 for k in range(7)},
+        truck_size=truck_size,
+        distance_matrix=dist,
+        duration_matrix=dur,
+        deadline=generous,
+    )
+    check("unexpired deadline changes nothing", not generous.hit and len(trucks9) == len(trucks6))
+
+    # Phase timers: each batcher records its phases, summed across sources.
+    timer = PhaseTimer()
+    sources4 = {"src-A": 0, "src-B": 1}
+    batch_containers(containers4, sources4, {"dst-X": 3}, truck_size, dist, dur, timer=timer)
+    savings_batch_containers(containers4, sources4, {"dst-X": 3}, truck_size, dist, dur, timer=timer)
+    check(
+        "timer records every phase",
+        set(timer.phases) == {"greedy.assign", "greedy.route", "savings.merge", "savings.consolidate", "savings.route"},
+        f"got {sorted(timer.phases)}",
+    )
+    routed = timer.counts.get("route_solves", 0) + timer.counts.get("route_cache_hits", 0)
+    check("timer counts every route lookup", routed >= 4, f"counts: {timer.counts}")
+
+
+# ---------------------------------------------------------------------------
+# Matrix store tests
+# ---------------------------------------------------------------------------
+
+def test_matrix_store():
+    print("\n── Matrix store ────────────────────────────────")
+
+    with open(DATA_DIR / "distance_matrix.json") as f:
+        d = json.load(f)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bin_path = Path(tmp) / "distance_matrix.bin"
+        convert_json_matrix(DATA_DIR / "distance_matrix.json", bin_path)
+        store = MatrixStore.open(bin_path)
+
+        check("store has one row per node", store.n == len(d["distance_matrix"]), f"n={store.n}")
+        check("distance round-trips exactly", store.distance.tolist() == d["distance_matrix"])
+        check("duration round-trips exactly", store.duration.tolist() == d["duration_matrix"])
+        check("id_to_name preserved", store.id_to_name == d["id_to_name"])
+        check("stored as int32", store.distance.dtype.itemsize == 4, f"dtype={store.distance.dtype}")
+
+        # Batcher output is identical whether given nested lists or the store
+        containers = [
+            Container("c0", "src-A", "dst-X", size=3, temperature="AM"),
+            Container("c1", "src-A", "dst-Y", size=2, temperature="RE"),
+            Container("c2", "src-A", "dst-Z", size=4, temperature="AM"),
+        ]
+        kwargs = dict(
+            source_node_ids={"src-A": 0},
+            destination_node_ids={"dst-X": 3, "dst-Y": 5, "dst-Z": 9},
+            truck_size=TruckSize(AM=10, RE=6),
+        )
+        from_lists = batch_containers(containers, **kwargs,
+                                      distance_matrix=d["distance_matrix"], duration_matrix=d["duration_matrix"])
+        from_store = batch_containers(containers, **kwargs,
+                                      distance_matrix=store.distance, duration_matrix=store.duration)
+        check(
+            "batcher agrees on lists and store",
+            [(t.ordered_destination_node_ids, t.route_distance_meters) for t in from_lists]
+            == [(t.ordered_destination_node_ids, t.route_distance_meters) for t in from_store],
+        )
+        check(
+            "route distance is a plain int",
+            all(type(t.route_distance_meters) is int for t in from_store),
+        )
+
+        del store, from_store  # release the mapping before the temp dir is removed
+
+
+# ---------------------------------------------------------------------------
+# Parallel per-source solving
+# ---------------------------------------------------------------------------
+
+def test_parallel():
+    print("\n── Parallel ────────────────────────────────────")
+
+    store = open_matrix_store(DATA_DIR / "distance_matrix.json")
+    sources = {f"src-{k}": k for k in range(4)}
+    destinations = {f"dst-{k}": k + 4 for k in range(12)}
+    containers = [
+        Container(f"c{k}", f"src-{k % 4}", f"dst-{k * 7 % 12}", size=1 + k % 4, temperature="AM" if k % 3 else "RE")
+        for k in range(80)
+    ]
+    args = (containers, sources, destinations, TruckSize(AM=12, RE=8), store.distance, store.duration)
+
+    def summary(routed):
+        return [
+            (rt.truck.source_id, [c.container_id for c in rt.truck.containers], rt.ordered_destination_node_ids)
+            for rt in routed
+        ]
+
+    with SourcePool.from_store(store, max_workers=2) as pool:
+        for solve in (batch_containers, savings_batch_containers):
+            serial = solve(*args)
+            parallel = solve(*args, pool=pool)
+            check(f"{solve.__name__}: pool matches serial, in order", summary(parallel) == summary(serial))
+
+        # Workers report their own deadline hits: time running out after
+        # every worker finished doesn't mark the run as cut short.
+        deadline = Deadline.after_ms(60_000)
+        landed = []
+
+        def out_of_time_after_worker(source_id, phase, routed):
+            # Only once every task has run: tasks are pickled as they are dispatched.
+            landed.append(source_id)
+            if len(landed) == len(sources):
+                deadline.at = float("-inf")
+
+        savings_batch_containers(*args, pool=pool, deadline=deadline, on_progress=out_of_time_after_worker)
+        check("pool: deadline passing after the workers finish is no hit", not deadline.hit)
+        expired = Deadline.after_ms(0)
+        savings_batch_containers(*args, pool=pool, deadline=expired)
+        check("pool: workers cut short report a hit", expired.hit)
+
+        try:
+            batch_containers(*args[:4], store.distance.tolist(), store.duration.tolist(), pool=pool)
+            check("pool rejects other matrices", False, "no error raised")
+        except ValueError:
+            check("pool rejects other matrices", True)
+
 
 # ---------------------------------------------------------------------------
 # Integration: test_data.json
 # ---------------------------------------------------------------------------
 
-def test_integration(dist: list[list[int]], dur: list[list[int]], id_to_name: dict):
+def test_integration(dist: Matrix, dur: Matrix, id_to_name: dict):
     print("\n── Integration (test_data.json) ────────────────")
 
     with open(DATA_DIR / "test_data.json") as f:
@@ -257,7 +791,13 @@ def main():
     dist, dur, id_to_name = load_matrix()
 
     test_router(dist)
+    test_neighbor_lists(dist)
+    test_truck()
+    test_route_cache(dist, dur)
+    test_disjoint_set()
     test_batcher(dist, dur)
+    test_matrix_store()
+    test_parallel()
     test_integration(dist, dur, id_to_name)
 
     print(f"\n{'='*50}")
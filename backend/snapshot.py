@@ -0,0 +1,200 @@
+"""
+Precompiled startup snapshot of config.jsonc, distance_matrix.json and
+route_geometries.json.
+
+Parsing the source JSON on every worker start is slow and gets slower as the
+data grows. The snapshot directory (data/snapshot/) holds:
+
+    manifest.json       — snapshot version, SHA-256 of each source file, node list
+    matrix.bin          — MatrixStore file, memory-mapped on load
+    geometries.pickle   — route geometries, unpickled on first use only
+
+load_snapshot() checks the manifest hashes against the current source files and
+rebuilds the snapshot when anything has changed, so it can never serve stale
+data; a missing or unreadable artifact counts as a change too. If the rebuild
+can't be written (say a read-only image shipped with a stale snapshot), it
+parses the source files directly instead, as if there were no snapshot. Build ahead of time (e.g. in the image build) with:
+
+    cd backend && python snapshot.py
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from geometries import GeometryStore
+from science.matrix import MatrixStore, write_matrix_store
+
+SNAPSHOT_VERSION = 1
+SOURCE_FILES = ("config.jsonc", "distance_matrix.json", "route_geometries.json")
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Snapshot:
+    nodes: list[dict]
+    matrix: MatrixStore
+    geometries: GeometryStore | None  # None when route_geometries.json was never precomputed
+
+
+def _file_hash(path: Path) -> str | None:
+    if not path.exists():
+        return None
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _source_hashes(data_dir: Path) -> dict[str, str | None]:
+    return {name: _file_hash(data_dir / name) for name in SOURCE_FILES}
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    # Unique temp name so concurrently starting workers never collide.
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+
+
+def _read_nodes(data_dir: Path) -> list[dict]:
+    with open(data_dir / "config.jsonc") as f:
+        config = json.load(f)
+    return [
+        {
+            "id": i,
+            "name": list(entry.keys())[0],
+            "lat": list(entry.values())[0][0],
+            "lon": list(entry.values())[0][1],
+        }
+        for i, entry in enumerate(config["locations"])
+    ]
+
+
+def build_snapshot(data_dir: Path, snapshot_dir: Path) -> None:
+    """Compiles the source files in data_dir into snapshot_dir."""
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    hashes = _source_hashes(data_dir)
+    nodes = _read_nodes(data_dir)
+
+    with open(data_dir / "distance_matrix.json") as f:
+        dm = json.load(f)
+    matrix_tmp = snapshot_dir / f".matrix.bin.{os.getpid()}.tmp"
+    write_matrix_store(matrix_tmp, dm["distance_matrix"], dm["duration_matrix"], dm["id_to_name"])
+    matrix_tmp.replace(snapshot_dir / "matrix.bin")
+
+    geometries_path = data_dir / "route_geometries.json"
+    if geometries_path.exists():
+        with open(geometries_path) as f:
+            geometries = json.load(f)
+        _write_atomic(snapshot_dir / "geometries.pickle", pickle.dumps(geometries, protocol=pickle.HIGHEST_PROTOCOL))
+    else:
+        (snapshot_dir / "geometries.pickle").unlink(missing_ok=True)
+
+    # Manifest last: a snapshot only counts once its manifest matches the sources.
+    manifest = {"version": SNAPSHOT_VERSION, "sources": hashes, "nodes": nodes}
+    _write_atomic(snapshot_dir / "manifest.json", json.dumps(manifest, indent=2).encode())
+
+
+def _read_manifest(snapshot_dir: Path) -> dict | None:
+    try:
+        with open(snapshot_dir / "manifest.json") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _parse_sources(data_dir: Path) -> Snapshot:
+    """The snapshot's contents read straight from the source files, held in memory."""
+    with open(data_dir / "distance_matrix.json") as f:
+        dm = json.load(f)
+    matrix = MatrixStore(
+        path=None,
+        distance=np.asarray(dm["distance_matrix"], dtype=np.int32),
+        duration=np.asarray(dm["duration_matrix"], dtype=np.int32),
+        id_to_name=dm["id_to_name"],
+    )
+
+    geometries = None
+    geometries_path = data_dir / "route_geometries.json"
+    if geometries_path.exists():
+
+        def load_geometries() -> dict[str, dict]:
+            with open(geometries_path) as f:
+                return json.load(f)
+
+        geometries = GeometryStore(loader=load_geometries)
+
+    return Snapshot(nodes=_read_nodes(data_dir), matrix=matrix, geometries=geometries)
+
+
+def _open_snapshot(data_dir: Path, snapshot_dir: Path, manifest: dict, hashes: dict[str, str | None]) -> Snapshot:
+    """
+    The snapshot in snapshot_dir. Raises OSError or ValueError if an artifact
+    is missing or unreadable. The geometries pickle is only checked for
+    existence here; should it fail to unpickle on first use, the geometries
+    are read from route_geometries.json instead.
+    """
+    matrix = MatrixStore.open(snapshot_dir / "matrix.bin")
+
+    geometries = None
+    if hashes["route_geometries.json"] is not None:
+        geometries_path = snapshot_dir / "geometries.pickle"
+        if not geometries_path.is_file():
+            raise FileNotFoundError(f"{geometries_path} is missing")
+
+        def load_geometries() -> dict[str, dict]:
+            try:
+                with open(geometries_path, "rb") as f:
+                    return pickle.load(f)
+            except (OSError, EOFError, pickle.UnpicklingError) as e:
+                logger.warning("Can't read %s (%s); parsing route_geometries.json", geometries_path, e)
+            with open(data_dir / "route_geometries.json") as f:
+                geometries = json.load(f)
+            try:
+                _write_atomic(geometries_path, pickle.dumps(geometries, protocol=pickle.HIGHEST_PROTOCOL))
+            except OSError:
+                pass
+            return geometries
+
+        geometries = GeometryStore(loader=load_geometries)
+
+    return Snapshot(nodes=manifest["nodes"], matrix=matrix, geometries=geometries)
+
+
+def load_snapshot(data_dir: Path, snapshot_dir: Path | None = None) -> Snapshot:
+    """
+    Loads the snapshot, rebuilding it first if it is missing, from another
+    snapshot version, was built from different source files, or has a
+    missing or unreadable artifact. Falls back to parsing the source files
+    if the rebuild can't be written.
+    """
+    snapshot_dir = snapshot_dir or data_dir / "snapshot"
+    hashes = _source_hashes(data_dir)
+    manifest = _read_manifest(snapshot_dir)
+    if manifest is not None and manifest.get("version") == SNAPSHOT_VERSION and manifest.get("sources") == hashes:
+        try:
+            return _open_snapshot(data_dir, snapshot_dir, manifest, hashes)
+        except (OSError, ValueError) as e:
+            logger.warning("Snapshot in %s is unreadable (%s); rebuilding", snapshot_dir, e)
+
+    try:
+        build_snapshot(data_dir, snapshot_dir)
+    except OSError as e:
+        logger.warning("Can't rebuild snapshot in %s (%s); parsing %s directly", snapshot_dir, e, data_dir)
+        return _parse_sources(data_dir)
+    return _open_snapshot(data_dir, snapshot_dir, _read_manifest(snapshot_dir), hashes)
+
+
+if __name__ == "__main__":
+    data_dir = Path(__file__).parent / "data"
+    build_snapshot(data_dir, data_dir / "snapshot")
+    print(f"Built snapshot in {data_dir / 'snapshot'}")
@@ -0,0 +1,87 @@
+"""
+Nearest-node lookup for request coordinates.
+
+Requests name locations by lat/lon strings, and clients don't all format them
+the way data/config.jsonc does. NodeIndex snaps each point to the nearest
+known node within a tolerance (in meters) instead of demanding an exact float
+match.
+
+Nodes are bucketed in a uniform lat/lon grid whose cells are at least the
+tolerance wide everywhere the nodes are, so any node within tolerance of a
+point lies in the point's cell or one of its 8 neighbours. A lookup is an
+exact-match dict probe plus at most 9 bucket probes, whatever the node count.
+Longitudes are not wrapped: nodes straddling the antimeridian won't snap
+across it.
+"""
+
+import math
+from collections import defaultdict
+from collections.abc import Iterable
+
+EARTH_RADIUS_METERS = 6_371_008.8
+_METERS_PER_DEGREE = math.pi * EARTH_RADIUS_METERS / 180
+
+
+def haversine_meters(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_METERS * math.asin(min(math.sqrt(a), 1.0))
+
+
+class NodeIndex:
+    """
+    Resolves (lat, lon) to the nearest node ID within tolerance_meters, or
+    None. An exact coordinate match always wins; tolerance_meters <= 0 allows
+    exact matches only. Read-only once built, so safe to share across threads.
+    """
+
+    def __init__(self, nodes: list[dict], tolerance_meters: float) -> None:
+        self.tolerance_meters = tolerance_meters
+        self._exact: dict[tuple[float, float], int] = {}
+        for n in nodes:
+            self._exact.setdefault((n["lat"], n["lon"]), n["id"])
+        self._cells: dict[tuple[int, int], list[tuple[float, float, int]]] = defaultdict(list)
+        if tolerance_meters <= 0 or not nodes:
+            return
+
+        # A degree of longitude shrinks towards the poles: size cells for the
+        # highest latitude a match can occur at, so they are wide enough there
+        # and wider everywhere else.
+        self._cell_lat = tolerance_meters / _METERS_PER_DEGREE
+        max_lat = min(max(abs(n["lat"]) for n in nodes) + self._cell_lat, 89.0)
+        self._cell_lon = self._cell_lat / math.cos(math.radians(max_lat))
+        for n in nodes:
+            self._cells[self._cell(n["lat"], n["lon"])].append((n["lat"], n["lon"], n["id"]))
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return math.floor(lat / self._cell_lat), math.floor(lon / self._cell_lon)
+
+    def nearest(self, lat: float, lon: float) -> int | None:
+        node_id = self._exact.get((lat, lon))
+        if node_id is not None or not self._cells:
+            return node_id
+        if not (math.isfinite(lat) and math.isfinite(lon)):
+            return None
+
+        row, col = self._cell(lat, lon)
+        best: tuple[float, int] | None = None
+        for r in (row - 1, row, row + 1):
+            for c in (col - 1, col, col + 1):
+                for node_lat, node_lon, candidate in self._cells.get((r, c), ()):
+                    meters = haversine_meters(lat, lon, node_lat, node_lon)
+                    if meters <= self.tolerance_meters and (best is None or (meters, candidate) < best):
+                        best = (meters, candidate)
+        return best[1] if best is not None else None
+
+    def nearest_many(self, points: Iterable[tuple[float, float]]) -> list[int | None]:
+        """nearest() for each point, looking up repeated points once."""
+        resolved: dict[tuple[float, float], int | None] = {}
+        out = []
+        for point in points:
+            if point not in resolved:
+                resolved[point] = self.nearest(*point)
+            out.append(resolved[point])
+        return out
@@ -0,0 +1,639 @@
+"""
+Service layer tests: job queue, caches and request handling around the
+science layer (see science/tests.py for the solvers themselves).
+
+Same harness as science/tests.py — run with:
+
+    cd backend && .venv/bin/python -m tests
+"""
+
+import asyncio
+import gzip
+import json
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from fastapi import Request
+
+import main as server
+import snapshot
+from geometries import GeometryStore, decode_polyline, encode_polyline
+from jobs import JobQueue, QueueFull
+from science.lru import LRUCache
+from science.parallel import SourcePool
+from spatial import NodeIndex, haversine_meters
+from utils.compute_distance_matrix import Location, MatrixBuilder, ProviderError, RetryPolicy
+
+DATA_DIR = Path(__file__).parent / "data"
+
+
+def load_request() -> server.OptimizeRequest:
+    """data/test_data.json is a complete /optimize request body."""
+    with open(DATA_DIR / "test_data.json") as f:
+        return server.OptimizeRequest(**json.load(f))
+
+
+# ---------------------------------------------------------------------------
+# Minimal test harness
+# ---------------------------------------------------------------------------
+
+_passed = 0
+_failed = 0
+
+
+def check(label: str, condition: bool, detail: str = ""):
+    global _passed, _failed
+    if condition:
+        _passed += 1
+        print(f"  PASS  {label}")
+    else:
+        _failed += 1
+        print(f"  FAIL  {label}" + (f" — {detail}" if detail else ""))
+
+
+def http_request(**headers: str) -> Request:
+    """A bare GET request carrying the given headers (underscores become dashes)."""
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+def asgi_post(path: str, body: dict, disconnect_after: int | None = None) -> tuple[int, list[bytes]]:
+    """
+    POSTs body as JSON through the whole ASGI app, returning the status and
+    the body chunks. With disconnect_after, the client goes away once it has
+    received that many chunks, and the call returns when the app finishes.
+    """
+    status, chunks = 0, []
+    gone = asyncio.Event()
+    payload = json.dumps(body).encode()
+
+    async def receive():
+        nonlocal payload
+        if payload is not None:
+            message, payload = {"type": "http.request", "body": payload, "more_body": False}, None
+            return message
+        if not gone.is_set():  # like a server: a disconnect is reported without suspending
+            await gone.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message.get("body"):
+            chunks.append(message["body"])
+            if disconnect_after is not None and len(chunks) >= disconnect_after:
+                gone.set()
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": b"", "headers": [(b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 1234), "server": ("127.0.0.1", 80),
+    }
+    asyncio.run(asyncio.wait_for(server.app(scope, receive, send), 10))
+    return status, chunks
+
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    """Polls condition() until it holds or timeout seconds pass."""
+    give_up = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > give_up:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Job queue tests
+# ---------------------------------------------------------------------------
+
+def test_jobs():
+    print("\n── Job queue ───────────────────────────────────")
+
+    release = threading.Event()
+    jobs = JobQueue(max_workers=1, queue_depth=2)
+    try:
+        running = jobs.submit(release.wait)
+        waiting = [jobs.submit(lambda: "ok"), jobs.submit(lambda: 1 / 0)]
+        check("first job runs", wait_for(lambda: jobs.get(running.id).status == "running"))
+        check("later jobs queue behind it", [jobs.get(j.id).status for j in waiting] == ["queued", "queued"])
+        try:
+            jobs.submit(lambda: None)
+            check("max_workers + queue_depth jobs fill the queue", False, "no QueueFull raised")
+        except QueueFull:
+            check("max_workers + queue_depth jobs fill the queue", True)
+
+        release.set()
+        ok, failing = waiting
+        check("queued jobs finish", wait_for(lambda: jobs.get(failing.id).finished_at is not None))
+        check("result kept for polling", (jobs.get(ok.id).status, jobs.get(ok.id).result) == ("done", "ok"))
+        job = jobs.get(failing.id)
+        check("exception marks the job failed", job.status == "failed" and "ZeroDivisionError" in job.error,
+              f"{job.status}: {job.error}")
+        try:
+            jobs.submit(lambda: None)
+            check("slots free up once jobs finish", True)
+        except QueueFull:
+            check("slots free up once jobs finish", False, "QueueFull raised")
+    finally:
+        release.set()
+        jobs.shutdown()
+
+    jobs = JobQueue(max_workers=1, queue_depth=0, ttl_seconds=0.05)
+    try:
+        job = jobs.submit(lambda: "ok")
+        check("job finishes", wait_for(lambda: jobs.get(job.id).finished_at is not None))
+        check("finished job survives within its TTL", jobs.get(job.id) is not None)
+        time.sleep(0.1)
+        check("lookups expire finished jobs past their TTL", jobs.get(job.id) is None)
+    finally:
+        jobs.shutdown()
+
+
+# ---------------------------------------------------------------------------
+# Result cache tests
+# ---------------------------------------------------------------------------
+
+def test_result_cache():
+    print("\n── Result cache ────────────────────────────────")
+
+    cache = LRUCache(maxsize=2, ttl_seconds=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    check("hit returns the value", cache.get("a") == 1)
+    cache.put("c", 3)  # evicts b: a was used more recently
+    check("least recently used entry evicted", cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3)
+    stats = cache.stats()
+    check("stats count hits and misses", (stats["hits"], stats["misses"], stats["size"]) == (3, 1, 2), f"{stats}")
+    disabled = LRUCache(maxsize=0, ttl_seconds=60)
+    disabled.put("a", 1)
+    check("maxsize 0 stores nothing", disabled.get("a") is None)
+
+    cache = LRUCache(maxsize=2, ttl_seconds=0.05)
+    cache.put("a", 1)
+    check("entry valid within its TTL", cache.get("a") == 1)
+    time.sleep(0.1)
+    check("entry past its TTL is a miss", cache.get("a") is None and cache.stats()["size"] == 0)
+
+    # The key depends on the plan, not on how the request lists it
+    request = load_request()
+    _, _, key, _ = server._prepare(request)
+    shuffled = request.model_copy(update={
+        "containers": request.containers[::-1],
+        "sources": request.sources[::-1],
+        "destinations": request.destinations[::-1],
+    })
+    kwargs, _, shuffled_key, _ = server._prepare(shuffled)
+    check("reordered request gives the same cache key", shuffled_key == key)
+    check(
+        "solver sees containers in canonical order",
+        [c.container_id for c in kwargs["containers"]] == sorted(c.container_id for c in request.containers),
+    )
+    resized = request.model_copy(update={"truck_size": server.TruckSizeIn(AM=request.truck_size.AM + 1, RE=request.truck_size.RE)})
+    check("different truck size gives a different key", server._prepare(resized)[2] != key)
+
+
+# ---------------------------------------------------------------------------
+# Geometry delivery tests
+# ---------------------------------------------------------------------------
+
+def test_geometries():
+    print("\n── Geometries ──────────────────────────────────")
+
+    # The worked example from Google's polyline algorithm documentation
+    points = [[38.5, -120.2], [40.7, -120.95], [43.252, -126.453]]
+    check("polyline matches the reference encoding", encode_polyline(points) == "_p~iF~ps|U_ulLnnqC_mqNvxq`@")
+    check("polyline round-trips", decode_polyline(encode_polyline(points)) == points)
+    check("empty polyline", encode_polyline([]) == "" and decode_polyline("") == [])
+
+    store = GeometryStore({"0-1": {"coordinates": points, "distance": 10, "duration": 20}})
+    check("polyline leg keeps distance and duration",
+          store.leg("0-1", "polyline") == {"polyline": encode_polyline(points), "distance": 10, "duration": 20})
+    payload = store.payload("coords")
+    check("payload is reused", store.payload("coords") is payload)
+    check("gzipped payload decompresses to the body", gzip.decompress(payload.gzipped) == payload.body)
+
+    response = server._encoded_response(http_request(if_none_match=payload.etag), payload)
+    check("matching ETag gives 304", response.status_code == 304 and not response.body)
+    check("304 keeps the ETag", response.headers["etag"] == payload.etag)
+    response = server._encoded_response(http_request(if_none_match=f'"other", W/{payload.etag}'), payload)
+    check("weak ETag in a list still matches", response.status_code == 304)
+    response = server._encoded_response(http_request(if_none_match='"other"'), payload)
+    check("stale ETag gets the body", response.status_code == 200 and response.body == payload.body)
+
+    for header, gzipped in [
+        ("gzip", True),
+        ("br, gzip;q=0.5", True),
+        ("*", True),
+        ("gzip;q=0", False),
+        ("gzip; q=0.0, deflate", False),
+        ("gzip;q=0, *", False),
+        ("identity", False),
+        ("", False),
+    ]:
+        response = server._encoded_response(http_request(accept_encoding=header), payload)
+        served = response.headers.get("content-encoding") == "gzip"
+        check(f"Accept-Encoding {header!r} -> {'gzip' if gzipped else 'identity'}",
+              served == gzipped and response.body == (payload.gzipped if gzipped else payload.body))
+
+
+# ---------------------------------------------------------------------------
+# Location snapping tests
+# ---------------------------------------------------------------------------
+
+def test_node_index():
+    print("\n── Node index ──────────────────────────────────")
+
+    nodes = [
+        {"id": 0, "lat": 40.0, "lon": -86.0},
+        {"id": 1, "lat": 40.0001, "lon": -86.0},   # ~11 m north of node 0
+        {"id": 2, "lat": 40.0, "lon": -85.99},     # ~850 m east
+    ]
+    index = NodeIndex(nodes, tolerance_meters=50)
+    meters_per_degree_lat = haversine_meters(40.0, -86.0, 41.0, -86.0)
+
+    check("exact coordinates resolve", [index.nearest(n["lat"], n["lon"]) for n in nodes] == [0, 1, 2])
+    check("nearest of several within tolerance", index.nearest(40.00008, -86.0) == 1)
+    check("snaps within tolerance", index.nearest(40.0, -85.9905) == 2)
+    just_inside = 40.0 - 49.9 / meters_per_degree_lat
+    just_outside = 40.0 - 50.1 / meters_per_degree_lat
+    check("tolerance boundary: 49.9 m snaps", index.nearest(just_inside, -86.0) == 0)
+    check("tolerance boundary: 50.1 m doesn't", index.nearest(just_outside, -86.0) is None)
+    check("unparseable coordinates match nothing", index.nearest(float("nan"), -86.0) is None)
+
+    # A node just below a cell edge, found from a point just above it
+    edge = (index._cell(40.0, -86.0)[0] + 1) * index._cell_lat
+    near_edge = NodeIndex([{"id": 7, "lat": edge - 1e-7, "lon": -86.0}], tolerance_meters=50)
+    point = (edge + 20 / meters_per_degree_lat, -86.0)
+    check("point and node in neighbouring cells",
+          near_edge._cell(*point) != near_edge._cell(edge - 1e-7, -86.0))
+    check("match found in a neighbouring cell", near_edge.nearest(*point) == 7)
+
+    twins = NodeIndex([{"id": 3, "lat": 40.0, "lon": -86.0}, {"id": 4, "lat": 40.0, "lon": -86.0}], 50)
+    check("exact match wins, lowest ID first", twins.nearest(40.0, -86.0) == 3 and twins.nearest(40.00001, -86.0) == 3)
+
+    exact_only = NodeIndex(nodes, tolerance_meters=0)
+    check("tolerance 0 still resolves exact coordinates", exact_only.nearest(40.0001, -86.0) == 1)
+    check("tolerance 0 snaps nothing", exact_only.nearest(40.0, -85.9999999) is None)
+    check("repeated points resolved once each",
+          index.nearest_many([(40.0, -86.0), (0.0, 0.0), (40.0, -86.0)]) == [0, None, 0])
+
+    # Two destinations snapping onto one node can't both be routed
+    request = load_request()
+    first = request.destinations[0]
+    nearby = server.LocationIn(id="dst-nearby", lat=f"{float(first.lat) + 0.00001:.6f}", lon=first.lon)
+    duplicate = request.model_copy(update={"destinations": request.destinations + [nearby]})
+    try:
+        server._prepare(duplicate)
+        check("destinations on one node are a 400", False, "no error raised")
+    except server.HTTPException as e:
+        check("destinations on one node are a 400",
+              e.status_code == 400 and first.id in e.detail and "dst-nearby" in e.detail, f"{e.detail}")
+
+
+# ---------------------------------------------------------------------------
+# Snapshot tests
+# ---------------------------------------------------------------------------
+
+def test_snapshot():
+    print("\n── Snapshot ────────────────────────────────────")
+
+    build = snapshot.build_snapshot
+    builds = []
+
+    def counting_build(data_dir, snapshot_dir):
+        builds.append(snapshot_dir)
+        build(data_dir, snapshot_dir)
+
+    def refuse_build(data_dir, snapshot_dir):
+        raise PermissionError(f"Read-only file system: {snapshot_dir}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        for name in snapshot.SOURCE_FILES:
+            shutil.copy(DATA_DIR / name, data_dir / name)
+        manifest_path = data_dir / "snapshot" / "manifest.json"
+
+        snapshot.build_snapshot = counting_build
+        try:
+            first = snapshot.load_snapshot(data_dir)
+            check("missing snapshot is built", len(builds) == 1 and manifest_path.exists())
+            snapshot.load_snapshot(data_dir)
+            check("current snapshot is reused", len(builds) == 1)
+
+            with open(data_dir / "config.jsonc", "a") as f:
+                f.write("\n")
+            snapshot.load_snapshot(data_dir)
+            check("changed source file triggers a rebuild", len(builds) == 2)
+
+            manifest = json.loads(manifest_path.read_text())
+            manifest["version"] = snapshot.SNAPSHOT_VERSION - 1
+            manifest_path.write_text(json.dumps(manifest))
+            snapshot.load_snapshot(data_dir)
+            check("other snapshot version triggers a rebuild", len(builds) == 3)
+
+            matrix_path = data_dir / "snapshot" / "matrix.bin"
+            matrix_path.unlink()
+            rebuilt = snapshot.load_snapshot(data_dir)
+            check("missing matrix.bin triggers a rebuild", len(builds) == 4 and matrix_path.exists())
+            check("rebuilt matrix matches", (rebuilt.matrix.distance == first.matrix.distance).all())
+            del rebuilt
+
+            data = matrix_path.read_bytes()
+            matrix_path.unlink()  # a new file, so no live mapping sees the truncation
+            matrix_path.write_bytes(data[: len(data) // 2])
+            snapshot.load_snapshot(data_dir)
+            check("truncated matrix.bin triggers a rebuild",
+                  len(builds) == 5 and matrix_path.stat().st_size == len(data))
+
+            geometries_path = data_dir / "snapshot" / "geometries.pickle"
+            geometries_path.unlink()
+            snapshot.load_snapshot(data_dir)
+            check("missing geometries.pickle triggers a rebuild", len(builds) == 6 and geometries_path.exists())
+
+            data = geometries_path.read_bytes()
+            geometries_path.write_bytes(data[: len(data) // 2])
+            truncated = snapshot.load_snapshot(data_dir)
+            check("truncated geometries.pickle loads from JSON",
+                  truncated.geometries.geometries == first.geometries.geometries and len(builds) == 6)
+            check("truncated geometries.pickle is rewritten", geometries_path.read_bytes() == data)
+            del truncated
+
+            # A stale snapshot that can't be rewritten: parse the sources instead
+            manifest_path.write_text(json.dumps({**manifest, "version": snapshot.SNAPSHOT_VERSION, "sources": {}}))
+            snapshot.build_snapshot = refuse_build
+            fallback = snapshot.load_snapshot(data_dir)
+        finally:
+            snapshot.build_snapshot = build
+
+        check("unwritable snapshot falls back to the sources", fallback.matrix.path is None)
+        check("fallback nodes match", fallback.nodes == first.nodes)
+        check("fallback matrices match",
+              (fallback.matrix.distance == first.matrix.distance).all()
+              and (fallback.matrix.duration == first.matrix.duration).all()
+              and fallback.matrix.id_to_name == first.matrix.id_to_name)
+        check("fallback geometries load from JSON",
+              fallback.geometries.geometries == first.geometries.geometries)
+        del first, fallback  # release the mapping before the temp dir is removed
+
+
+# ---------------------------------------------------------------------------
+# Endpoint tests
+# ---------------------------------------------------------------------------
+
+def test_endpoints():
+    print("\n── Endpoints ───────────────────────────────────")
+
+    request = load_request()
+    with_geometry = server.optimize(request, http_request(), include_geometry=True, geometry_format="coords")
+    plain = server.optimize(request, http_request())
+    geometry = with_geometry.geometry
+    trucks = with_geometry.greedy.trucks + with_geometry.optimized.trucks
+    check("geometry lists every truck's legs", set(geometry.trucks) == {t.id for t in trucks})
+    check("one leg per stop",
+          all(len(geometry.trucks[t.id]) == len(t.destination_ids) for t in with_geometry.optimized.trucks))
+    check("legs cover exactly the trucks' routes",
+          set(geometry.legs) == {key for keys in geometry.trucks.values() for key in keys})
+    check("legs come in the requested format", all("coordinates" in leg for leg in geometry.legs.values()))
+    check("geometry is only added when asked for", plain.geometry is None)
+
+    solve, geometries = server._solve, server.route_geometries
+    solved = []
+    server._solve = lambda *args, **kwargs: solved.append(args) or solve(*args, **kwargs)
+    server.route_geometries = None
+    try:
+        server.optimize(request, http_request(), include_geometry=True)
+        check("geometry without precomputed legs is a 404", False, "no error raised")
+    except server.HTTPException as e:
+        check("geometry without precomputed legs is a 404", e.status_code == 404, f"got {e.status_code}")
+    finally:
+        server._solve, server.route_geometries = solve, geometries
+    check("missing geometries fail before solving", not solved)
+
+    # Stream: greedy first, optimized last; a client disconnect stops the solve
+    server.result_cache.clear()
+    status, chunks = asgi_post("/optimize/stream", request.model_dump())
+    lines = [json.loads(line) for line in b"".join(chunks).splitlines()]
+    check("stream responds 200", status == 200, f"got {status}")
+    check("stream starts with greedy", lines[0]["stage"] == "greedy")
+    check("stream ends with the complete optimized plan",
+          lines[-1]["stage"] == "optimized" and lines[-1]["complete"] is True, f"{lines[-1]['stage']}")
+
+    stopped = threading.Event()
+
+    def endless_savings(**kwargs):
+        # One progress report, then silence — like consolidation pricing its pairs.
+        deadline = kwargs["deadline"]
+        kwargs["on_progress"](request.sources[0].id, "savings", [])
+        give_up = time.monotonic() + 5
+        while not deadline.expired() and time.monotonic() < give_up:
+            time.sleep(0.005)
+        if deadline.hit:
+            stopped.set()
+        return []
+
+    savings = server.savings_batch_containers
+    server.savings_batch_containers = endless_savings
+    server.result_cache.clear()
+    try:
+        started = time.monotonic()
+        _, chunks = asgi_post("/optimize/stream", request.model_dump(), disconnect_after=2)
+        stages = [json.loads(chunk)["stage"] for chunk in chunks]
+        check("disconnect cancels the running solve", stages == ["greedy", "progress"] and stopped.wait(2), f"{stages}")
+        check("stream ends soon after the disconnect", time.monotonic() - started < 2, f"{time.monotonic() - started:.1f}s")
+    finally:
+        server.savings_batch_containers = savings
+
+    # Batch: results in scenario order, failures confined to their scenario,
+    # both on threads and whole-scenario in worker processes.
+    bigger = request.model_copy(update={"truck_size": server.TruckSizeIn(AM=20, RE=12)})
+    unknown = request.model_copy(update={"sources": [server.LocationIn(id="src-0", lat="0", lon="0")]})
+    broken = request.model_copy(update={"containers": [request.containers[0].model_copy(update={"source_id": "nowhere"})]})
+    scenarios = [request, unknown, bigger, broken]
+
+    def plan(solution):
+        return sorted((t.source_id, t.destination_ids, sorted(t.container_ids), t.route_distance_meters)
+                      for t in solution.trucks)
+
+    server.result_cache.clear()
+    expected = [server._solve(*server._prepare(scenario)) for scenario in (request, bigger)]
+    pool = SourcePool.from_store(server._matrix_store, max_workers=2)
+    try:
+        for label, workers in [("threads", None), ("workers", pool)]:
+            server.result_cache.clear()
+            server.source_pool = workers
+            try:
+                results = server.optimize_batch(server.BatchOptimizeRequest(scenarios=scenarios)).results
+            finally:
+                server.source_pool = None
+            check(f"batch ({label}): one result per scenario", len(results) == len(scenarios))
+            check(f"batch ({label}): results in scenario order",
+                  [plan(r.result.optimized) for r in (results[0], results[2])]
+                  == [plan(e.optimized) for e in expected]
+                  and [plan(r.result.greedy) for r in (results[0], results[2])]
+                  == [plan(e.greedy) for e in expected])
+            check(f"batch ({label}): unknown location fails its scenario with 400",
+                  (results[1].ok, results[1].status_code) == (False, 400) and "Unknown location" in results[1].error,
+                  f"{results[1]}")
+            check(f"batch ({label}): solver error fails its scenario with 500",
+                  (results[3].ok, results[3].status_code) == (False, 500), f"{results[3]}")
+            check(f"batch ({label}): complete results are cached",
+                  server.result_cache.get(server._prepare(bigger)[2]) is not None)
+    finally:
+        pool.shutdown()
+
+
+# ---------------------------------------------------------------------------
+# Distance matrix builder tests
+# ---------------------------------------------------------------------------
+
+class FakeProvider:
+    """
+    In-process Provider: meters and seconds derived from the coordinates.
+    Records the (origin, destination) pairs it is asked for; the first
+    fail_first calls raise, and calls past fail_after raise without retry.
+    """
+
+    max_origins = 2
+    max_destinations = 3
+    max_elements = 6
+
+    def __init__(self, fail_first: int = 0, fail_after: int | None = None) -> None:
+        self.fail_first = fail_first
+        self.fail_after = fail_after
+        self.calls = 0
+        self.pairs: list[tuple[tuple[float, float], tuple[float, float]]] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def meters(a: tuple[float, float], b: tuple[float, float]) -> int:
+        return round(haversine_meters(*a, *b) * 1.3) + 1
+
+    def fetch(self, origins, destinations):
+        with self._lock:
+            self.calls += 1
+            if self.calls <= self.fail_first:
+                raise ProviderError("rate limited", retryable=True)
+            if self.fail_after is not None and self.calls > self.fail_after:
+                raise ProviderError("provider went away", retryable=False)
+            self.pairs += [(o, d) for o in origins for d in destinations]
+        distances = [[self.meters(o, d) for d in destinations] for o in origins]
+        return distances, [[m // 15 for m in row] for row in distances]
+
+
+def expected_distances(locations: list[Location]) -> list[list[int]]:
+    return [
+        [0 if i == j else FakeProvider.meters(a.coord, b.coord) for j, b in enumerate(locations)]
+        for i, a in enumerate(locations)
+    ]
+
+
+def test_matrix_builder():
+    print("\n── Distance matrix builder ─────────────────────")
+
+    locations = [Location(f"loc-{k}", 52.0 + k / 100, 4.0 + (k % 3) / 100) for k in range(7)]
+    no_wait = RetryPolicy(attempts=3, backoff_seconds=0)
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpoint = Path(tmp) / "matrix.checkpoint.jsonl"
+
+        def builder(
+            locs: list[Location], provider: FakeProvider, retry: RetryPolicy = no_wait, workers: int = 2,
+        ) -> MatrixBuilder:
+            return MatrixBuilder(locs, provider, checkpoint, workers=workers, rate=0, retry=retry)
+
+        first = builder(locations[:5], FakeProvider())
+        first.run()
+        check("full build fills every cell", first.distance == expected_distances(locations[:5]))
+        check("durations come with it", first.duration[1][2] == first.distance[1][2] // 15)
+        checkpoint.unlink()
+        previous = {
+            "locations": [{"name": loc.name, "lat": loc.lat, "lon": loc.lon} for loc in locations[:5]],
+            "distance_matrix": first.distance,
+            "duration_matrix": first.duration,
+        }
+
+        # Two locations added: only rows and columns touching them are fetched.
+        provider = FakeProvider()
+        grown = builder(locations, provider)
+        check("reuse matches existing locations by coordinates", grown.reuse(previous) == 5)
+        grown.run()
+        old = {loc.coord for loc in locations[:5]}
+        check("incremental build fills every cell", grown.distance == expected_distances(locations))
+        check(
+            "known cells are not fetched again",
+            not any(o in old and d in old for o, d in provider.pairs),
+            f"{sum(o in old and d in old for o, d in provider.pairs)} known cells fetched",
+        )
+        checkpoint.unlink()
+
+        # A run that dies part way resumes from its checkpoint (one worker,
+        # so exactly the blocks before the failure land).
+        blocks = len(builder(locations, FakeProvider()).missing_blocks())
+        dying = builder(locations, FakeProvider(fail_after=3), workers=1)
+        try:
+            dying.run()
+            died = False
+        except ProviderError:
+            died = True
+        check("non-retryable error stops the run", died)
+        provider = FakeProvider()
+        resumed = builder(locations, provider)
+        done = resumed.resume()
+        check("resume loads the finished blocks", done == 3, f"{done} of {blocks}")
+        resumed.run()
+        check("resumed run fetches only the rest", provider.calls == blocks - done, f"{provider.calls} calls")
+        check("resumed build fills every cell", resumed.distance == expected_distances(locations))
+        other = builder(locations[:4], FakeProvider())
+        check("checkpoint for other locations is ignored", other.resume() == 0 and not checkpoint.exists())
+
+        # Retryable failures are retried up to the policy's attempts.
+        flaky = builder(locations[:2], FakeProvider(fail_first=2))
+        flaky.run()
+        check("retries past retryable errors", flaky.distance == expected_distances(locations[:2]))
+        checkpoint.unlink()
+        provider = FakeProvider(fail_first=2)
+        try:
+            builder(locations[:2], provider, RetryPolicy(attempts=2, backoff_seconds=0)).run()
+            gave_up = False
+        except ProviderError:
+            gave_up = True
+        check("gives up after the last attempt", gave_up and provider.calls == 2, f"{provider.calls} calls")
+        checkpoint.unlink()
+        once = builder(locations[:2], FakeProvider(), RetryPolicy(attempts=1))
+        once.run()
+        check("a single attempt (--retries 0) still fetches", once.distance == expected_distances(locations[:2]))
+    try:
+        RetryPolicy(attempts=0)
+        rejected = False
+    except ValueError:
+        rejected = True
+    check("RetryPolicy rejects zero attempts", rejected)
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def main():
+    test_jobs()
+    test_result_cache()
+    test_geometries()
+    test_node_index()
+    test_snapshot()
+    test_endpoints()
+    test_matrix_builder()
+
+    print(f"\n{'='*50}")
+    print(f"  {_passed} passed, {_failed} failed")
+    if _failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,62 +1,429 @@
-import os
+"""Build data/distance_matrix.json: driving distance and duration between every
+pair of locations in config.jsonc.
+
+The matrix is built incrementally. Cells already in distance_matrix.json are
+kept, so after adding locations only their rows and columns are fetched.
+Locations are matched by coordinates; files written before coordinates were
+recorded are matched by name. Pass --full to refetch everything.
+
+Requests run concurrently (--workers) under a shared rate limit (--rate
+requests per second). Failed requests are retried with exponential backoff,
+up to --retries times after the first attempt. Each finished block is appended to a checkpoint file next to the
+output, so a run that fails or is interrupted resumes where it stopped. The
+checkpoint is removed once the matrix is written.
+
+Providers (--provider):
+    google  Google Distance Matrix API, key from GOOGLE_MAPS_API_KEY
+    osrm    an OSRM server's table service (default: the public demo server)
+--base-url points either one at another server, e.g. a local stub.
+
+Usage:
+    python compute_distance_matrix.py [--provider google] [--workers 4] [--rate 10]
+        [--retries 4] [--base-url URL] [--full]
+"""
+
+import argparse
 import json
-import googlemaps
+import math
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Protocol
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+Coord = tuple[float, float]  # (lat, lon)
+
+
+class ProviderError(Exception):
+    """A request failed. retryable: worth trying again (rate limited, server or network error)."""
+
+    def __init__(self, message: str, retryable: bool) -> None:
+        super().__init__(message)
+        self.retryable = retryable
+
+
+# ---------------------------------------------------------------------------
+# Providers
+# ---------------------------------------------------------------------------
+
+class Provider(Protocol):
+    # Most origins, destinations and origin x destination pairs per request.
+    max_origins: int
+    max_destinations: int
+    max_elements: int
+
+    def fetch(self, origins: list[Coord], destinations: list[Coord]) -> tuple[list[list[int]], list[list[int]]]:
+        """(meters, seconds) for every origin x destination, as origin-major rows."""
+        ...
+
+
+def _get_json(url: str, timeout: float = 60) -> dict:
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as resp:
+            return json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        raise ProviderError(f"HTTP {e.code} from {url.split('?')[0]}", retryable=e.code == 429 or e.code >= 500)
+    except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+        raise ProviderError(f"{type(e).__name__}: {e}", retryable=True)
+
+
+class GoogleProvider:
+    # The API's per-request limits.
+    max_origins = 25
+    max_destinations = 25
+    max_elements = 100
+
+    RETRYABLE = {"OVER_QUERY_LIMIT", "UNKNOWN_ERROR"}
+
+    def __init__(self, api_key: str, base_url: str = "https://maps.googleapis.com") -> None:
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+
+    def fetch(self, origins: list[Coord], destinations: list[Coord]) -> tuple[list[list[int]], list[list[int]]]:
+        params = urllib.parse.urlencode({
+            "origins": "|".join(f"{lat},{lon}" for lat, lon in origins),
+            "destinations": "|".join(f"{lat},{lon}" for lat, lon in destinations),
+            "mode": "driving",
+            "units": "metric",
+            "key": self.api_key,
+        })
+        data = _get_json(f"{self.base_url}/maps/api/distancematrix/json?{params}")
+        status = data.get("status")
+        if status != "OK":
+            raise ProviderError(f"Google status {status}: {data.get('error_message', '')}", retryable=status in self.RETRYABLE)
+
+        distances, durations = [], []
+        for i, row in enumerate(data["rows"]):
+            for j, element in enumerate(row["elements"]):
+                if element.get("status") != "OK":
+                    raise ProviderError(f"no route {origins[i]} -> {destinations[j]}: {element.get('status')}", retryable=False)
+            distances.append([e["distance"]["value"] for e in row["elements"]])
+            durations.append([e["duration"]["value"] for e in row["elements"]])
+        return distances, durations
+
+
+class OsrmProvider:
+    # The public server caps a table at 100 coordinates.
+    max_origins = 50
+    max_destinations = 50
+    max_elements = 50 * 50
+
+    def __init__(self, base_url: str = "https://router.project-osrm.org") -> None:
+        self.base_url = base_url.rstrip("/")
+
+    def fetch(self, origins: list[Coord], destinations: list[Coord]) -> tuple[list[list[int]], list[list[int]]]:
+        coords = ";".join(f"{lon},{lat}" for lat, lon in origins + destinations)
+        params = urllib.parse.urlencode({
+            "sources": ";".join(str(i) for i in range(len(origins))),
+            "destinations": ";".join(str(len(origins) + j) for j in range(len(destinations))),
+            "annotations": "distance,duration",
+        })
+        data = _get_json(f"{self.base_url}/table/v1/driving/{coords}?{params}")
+        if data.get("code") != "Ok":
+            raise ProviderError(f"OSRM code {data.get('code')}: {data.get('message', '')}", retryable=False)
+
+        def cells(rows: list[list[float | None]]) -> list[list[int]]:
+            if any(v is None for row in rows for v in row):
+                raise ProviderError("OSRM found no route for some pairs", retryable=False)
+            return [[round(v) for v in row] for row in rows]
+
+        return cells(data["distances"]), cells(data["durations"])
+
+
+PROVIDERS = {"google": GoogleProvider, "osrm": OsrmProvider}
+
+
+# ---------------------------------------------------------------------------
+# Rate limit and retries
+# ---------------------------------------------------------------------------
+
+class RateLimiter:
+    """Spaces acquire() calls at least 1 / rate seconds apart, across threads."""
+
+    def __init__(self, rate: float) -> None:
+        self._interval = 1 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            at = max(now, self._next)
+            self._next = at + self._interval
+        if at > now:
+            time.sleep(at - now)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    attempts: int = 5  # including the first
+    backoff_seconds: float = 1.0
+    max_backoff_seconds: float = 60.0
+
+    def __post_init__(self) -> None:
+        if self.attempts < 1:
+            raise ValueError(f"RetryPolicy needs at least 1 attempt, got {self.attempts}")
+
+    def delay(self, attempt: int) -> float:
+        """Exponential backoff with jitter before retry number attempt (0-based)."""
+        return min(self.backoff_seconds * 2 ** attempt, self.max_backoff_seconds) * random.uniform(0.5, 1.0)
+
+
+# ---------------------------------------------------------------------------
+# Builder
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Block:
+    origins: tuple[int, ...]       # location indexes
+    destinations: tuple[int, ...]
+
+
+@dataclass
+class Location:
+    name: str
+    lat: float
+    lon: float
+
+    @property
+    def coord(self) -> Coord:
+        return (self.lat, self.lon)
+
+
+class MatrixBuilder:
+    """
+    Fills an n x n distance / duration matrix for locations, reusing known
+    cells and fetching the rest from provider in blocks.
+    """
+
+    def __init__(
+        self,
+        locations: list[Location],
+        provider: Provider,
+        checkpoint_path: Path,
+        workers: int = 4,
+        rate: float = 10.0,
+        retry: RetryPolicy = RetryPolicy(),
+    ) -> None:
+        self.locations = locations
+        self.provider = provider
+        self.checkpoint_path = checkpoint_path
+        self.workers = workers
+        self.limiter = RateLimiter(rate)
+        self.retry = retry
+        n = len(locations)
+        self.distance: list[list[int | None]] = [[0 if i == j else None for j in range(n)] for i in range(n)]
+        self.duration: list[list[int | None]] = [[0 if i == j else None for j in range(n)] for i in range(n)]
+
+    def reuse(self, previous: dict) -> int:
+        """
+        Copies cells from a previously written distance_matrix.json for
+        locations present in both. Returns the number of locations matched.
+        """
+        if "locations" in previous:
+            old_index = {(loc["lat"], loc["lon"]): k for k, loc in enumerate(previous["locations"])}
+            keys = [loc.coord for loc in self.locations]
+        else:  # written before coordinates were recorded
+            old_index = {name: int(k) for k, name in previous["id_to_name"].items()}
+            keys = [loc.name for loc in self.locations]
+        matched = [(i, old_index[key]) for i, key in enumerate(keys) if key in old_index]
+        for i, oi in matched:
+            for j, oj in matched:
+                self.distance[i][j] = previous["distance_matrix"][oi][oj]
+                self.duration[i][j] = previous["duration_matrix"][oi][oj]
+        return len(matched)
+
+    def resume(self) -> int:
+        """Loads the blocks finished by an earlier, interrupted run. Returns how many."""
+        if not self.checkpoint_path.exists():
+            return 0
+        with open(self.checkpoint_path) as f:
+            lines = f.read().splitlines()
+        if not lines or json.loads(lines[0]).get("locations") != self._fingerprint():
+            print("  checkpoint is for a different set of locations — ignoring it")
+            self.checkpoint_path.unlink()
+            return 0
+        done = 0
+        for line in lines[1:]:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                break  # torn last line of a killed run
+            self._store(Block(tuple(record["origins"]), tuple(record["destinations"])), record["distance"], record["duration"])
+            done += 1
+        return done
+
+    def missing_blocks(self) -> list[Block]:
+        """
+        Unknown cells, grouped into provider-sized blocks. Rows missing the
+        same columns are fetched together — after adding locations, the new
+        rows (missing everything) and the old ones (missing only the new
+        columns) — so no known cell is fetched again.
+        """
+        n = len(self.locations)
+        rows_by_gap: dict[tuple[int, ...], list[int]] = {}
+        for i in range(n):
+            gap = [j for j in range(n) if self.distance[i][j] is None]
+            if len(gap) == n - 1:
+                gap.insert(i, i)  # a new location: fetch its (unused) diagonal, so new rows share one gap
+            if gap:
+                rows_by_gap.setdefault(tuple(gap), []).append(i)
+
+        provider = self.provider
+        blocks = []
+        for gap, rows in rows_by_gap.items():
+            # Square-ish blocks, or as many rows as fit when few columns are missing.
+            columns = min(len(gap), provider.max_destinations, max(math.isqrt(provider.max_elements), 1))
+            per_block = max(min(provider.max_origins, provider.max_elements // columns), 1)
+            blocks += [
+                Block(origins, destinations)
+                for origins in _chunks(rows, per_block)
+                for destinations in _chunks(list(gap), columns)
+            ]
+        return blocks
+
+    def run(self) -> None:
+        blocks = self.missing_blocks()
+        if not blocks:
+            return
+        print(f"  fetching {len(blocks)} block(s) with {self.workers} worker(s)...")
+        new_checkpoint = not self.checkpoint_path.exists()
+        with open(self.checkpoint_path, "a") as checkpoint, ThreadPoolExecutor(self.workers) as pool:
+            if new_checkpoint:
+                checkpoint.write(json.dumps({"locations": self._fingerprint()}) + "\n")
+            pending = {pool.submit(self._fetch, block): block for block in blocks}
+            done = 0
+            try:
+                while pending:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    failed = None
+                    for future in finished:
+                        block = pending.pop(future)
+                        if future.exception() is not None:
+                            failed = failed or future
+                            continue
+                        distance, duration = future.result()
+                        self._store(block, distance, duration)
+                        checkpoint.write(json.dumps({
+                            "origins": block.origins,
+                            "destinations": block.destinations,
+                            "distance": distance,
+                            "duration": duration,
+                        }) + "\n")
+                        checkpoint.flush()
+                        done += 1
+                        if done % 10 == 0 or done == len(blocks):
+                            print(f"  {done}/{len(blocks)} blocks done")
+                    if failed is not None:
+                        failed.result()  # raises, once the blocks that did finish are checkpointed
+            except BaseException:
+                for future in pending:
+                    future.cancel()
+                raise
+
+    def _fetch(self, block: Block) -> tuple[list[list[int]], list[list[int]]]:
+        origins = [self.locations[i].coord for i in block.origins]
+        destinations = [self.locations[j].coord for j in block.destinations]
+        for attempt in range(self.retry.attempts):
+            self.limiter.acquire()
+            try:
+                return self.provider.fetch(origins, destinations)
+            except ProviderError as e:
+                if not e.retryable or attempt == self.retry.attempts - 1:
+                    raise
+                delay = self.retry.delay(attempt)
+                print(f"  WARN: {e}; retrying in {delay:.1f}s")
+                time.sleep(delay)
+        raise AssertionError("unreachable")
 
-API_KEY = os.getenv('GOOGLE_MAPS_API_KEY')
-gmaps = googlemaps.Client(key=API_KEY)
+    def _store(self, block: Block, distance: list[list[int]], duration: list[list[int]]) -> None:
+        for a, i in enumerate(block.origins):
+            for b, j in enumerate(block.destinations):
+                if i == j:
+                    continue
+                self.distance[i][j] = distance[a][b]
+                self.duration[i][j] = duration[a][b]
 
-# Read in lat/lon locations from config.jsonc
-with open('config.jsonc', 'r') as f:
-    config = json.load(f)
+    def _fingerprint(self) -> list[list[float]]:
+        return [[loc.lat, loc.lon] for loc in self.locations]
 
-# Build parallel lists: node IDs (0..N-1), human-readable names, and coords
-location_names = [list(l.keys())[0] for l in config['locations']]
-location_coords = [list(l.values())[0] for l in config['locations']]
-node_ids = list(range(len(location_names)))
 
-# id -> name lookup for use by other code
-id_to_name = {i: name for i, name in enumerate(location_names)}
+def _chunks(items: list[int], size: int) -> Iterator[tuple[int, ...]]:
+    for k in range(0, len(items), size):
+        yield tuple(items[k:k + size])
 
 
-BATCH_SIZE = 10  # max 100 elements per request (10x10)
+def load_locations(config_path: Path) -> list[Location]:
+    with open(config_path) as f:
+        config = json.load(f)
+    return [Location(name, *coords) for entry in config["locations"] for name, coords in entry.items()]
 
-def get_distance_matrix_batched(coords):
-    n = len(coords)
-    distance_matrix = [[0] * n for _ in range(n)]
-    duration_matrix = [[0] * n for _ in range(n)]
 
-    origin_batches = [coords[i:i+BATCH_SIZE] for i in range(0, n, BATCH_SIZE)]
-    dest_batches = [coords[j:j+BATCH_SIZE] for j in range(0, n, BATCH_SIZE)]
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--provider", choices=sorted(PROVIDERS), default="google")
+    parser.add_argument("--base-url", help="provider server, e.g. http://localhost:8080 for a stub")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent requests (default 4)")
+    parser.add_argument("--rate", type=float, default=10.0, help="most requests per second (default 10; 0 = unlimited)")
+    parser.add_argument("--retries", type=int, default=4, help="retries per request after the first attempt (default 4)")
+    parser.add_argument("--full", action="store_true", help="refetch every cell instead of reusing the existing matrix")
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    args = parser.parse_args()
+    if args.retries < 0:
+        parser.error("--retries must be 0 or more")
 
-    for oi, origin_batch in enumerate(origin_batches):
-        for di, dest_batch in enumerate(dest_batches):
-            result = gmaps.distance_matrix(
-                origins=origin_batch,
-                destinations=dest_batch,
-                mode="driving",
-                units="metric"
-            )
-            row_offset = oi * BATCH_SIZE
-            col_offset = di * BATCH_SIZE
-            for i, row in enumerate(result['rows']):
-                for j, element in enumerate(row['elements']):
-                    distance_matrix[row_offset + i][col_offset + j] = element['distance']['value']
-                    duration_matrix[row_offset + i][col_offset + j] = element['duration']['value']
+    output_path = args.data_dir / "distance_matrix.json"
+    locations = load_locations(args.data_dir / "config.jsonc")
+    kwargs = {"base_url": args.base_url} if args.base_url else {}
+    if args.provider == "google":
+        provider = GoogleProvider(os.getenv("GOOGLE_MAPS_API_KEY", ""), **kwargs)
+    else:
+        provider = OsrmProvider(**kwargs)
 
-    return distance_matrix, duration_matrix
+    builder = MatrixBuilder(
+        locations,
+        provider,
+        checkpoint_path=output_path.with_suffix(".checkpoint.jsonl"),
+        workers=args.workers,
+        rate=args.rate,
+        retry=RetryPolicy(attempts=args.retries + 1),
+    )
+    n = len(locations)
+    if args.full:
+        builder.checkpoint_path.unlink(missing_ok=True)
+    elif output_path.exists():
+        with open(output_path) as f:
+            matched = builder.reuse(json.load(f))
+        print(f"Reusing {matched} of {n} locations from {output_path.name}")
+    resumed = builder.resume()
+    if resumed:
+        print(f"Resuming: {resumed} block(s) from {builder.checkpoint_path.name}")
 
+    builder.run()
 
-# NxN matrix of meters (int), indexed by node ID
-n = len(node_ids)
-distance_matrix, duration_matrix = get_distance_matrix_batched(location_coords)
+    output = {
+        "id_to_name": {i: loc.name for i, loc in enumerate(locations)},
+        "locations": [{"name": loc.name, "lat": loc.lat, "lon": loc.lon} for loc in locations],
+        "distance_matrix": builder.distance,
+        "duration_matrix": builder.duration,
+    }
+    tmp_path = output_path.with_suffix(".json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(output, f, indent=2)
+    os.replace(tmp_path, output_path)
+    builder.checkpoint_path.unlink(missing_ok=True)
 
-output = {
-    "id_to_name": id_to_name,
-    "distance_matrix": distance_matrix,
-    "duration_matrix": duration_matrix,
-}
+    print(f"Saved {n}x{n} distance matrix for {n} locations.")
 
-with open('distance_matrix.json', 'w') as f:
-    json.dump(output, f, indent=2)
 
-print(f"Saved {n}x{n} distance matrix for {n} locations.")
+if __name__ == "__main__":
+    main()